@@ -0,0 +1,108 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from mention_writer import as_utc
+
+logger = logging.getLogger(__name__)
+
+TWITTER_EPOCH_MS = 1288834974657  # Snowflake status IDs count milliseconds from here
+
+
+def snowflake_time(status_id: int) -> datetime:
+    """Creation time encoded in a status ID"""
+    return datetime.fromtimestamp(((status_id >> 22) + TWITTER_EPOCH_MS) / 1000, timezone.utc)
+
+
+def newer_than(tweets: Iterable[Dict], since_id: Optional[int]) -> List[Dict]:
+    """Tweets of a newest-first timeline above the cursor; stops at the first one already covered"""
+    if since_id is None:
+        return list(tweets)
+    fresh = []
+    for tweet in tweets:
+        if tweet['status_id'] <= since_id:
+            break
+        fresh.append(tweet)
+    return fresh
+
+
+class AccountCursor:
+    __slots__ = ('since_id', 'since_at', 'dirty')
+
+    def __init__(self, since_id: int, since_at: Optional[datetime], dirty: bool = True):
+        self.since_id = since_id
+        self.since_at = since_at
+        self.dirty = dirty
+
+
+class AccountCursors:
+    """Per-account high-water mark (newest status ID and its time) of processed tweets
+
+    Fetchers ask for `since_id(account)` and only request/parse tweets above it, so a check
+    costs O(new tweets). The cursor moves forward only after a check finished, and the
+    sidecar `account_cursors` collection is written with $max, so neither a failed check nor
+    a late or concurrent save can ever move it backwards.
+    """
+
+    def __init__(self):
+        self.accounts: Dict[str, AccountCursor] = {}
+        self.advances = 0
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def since_id(self, account: str) -> Optional[int]:
+        cursor = self.accounts.get(account)
+        return cursor.since_id if cursor else None
+
+    def advance(self, account: str, status_id: int, at: Optional[datetime] = None):
+        cursor = self.accounts.get(account)
+        if cursor is not None and status_id <= cursor.since_id:
+            return
+        at = at or snowflake_time(status_id)
+        if cursor is None:
+            self.accounts[account] = AccountCursor(status_id, at)
+        else:
+            cursor.since_id, cursor.since_at, cursor.dirty = status_id, at, True
+        self.advances += 1
+
+    async def load(self, db: AsyncIOMotorDatabase, accounts: Iterable[str]):
+        try:
+            async for document in db.account_cursors.find({"_id": {"$in": list(accounts)}}):
+                cursor = self.accounts.get(document['_id'])
+                if cursor is None or document['since_id'] > cursor.since_id:
+                    since_at = document.get('since_at')
+                    self.accounts[document['_id']] = AccountCursor(
+                        document['since_id'], as_utc(since_at) if since_at else None, dirty=False
+                    )
+            logger.info(f"Loaded since-ID cursors for {len(self.accounts)} accounts")
+        except Exception as e:
+            logger.error(f"Error loading account cursors: {e}")
+
+    async def save(self, db: AsyncIOMotorDatabase):
+        dirty = [(account, cursor) for account, cursor in self.accounts.items() if cursor.dirty]
+        if not dirty:
+            return
+        now = datetime.now(timezone.utc)
+        try:
+            await db.account_cursors.bulk_write(
+                [UpdateOne({"_id": account},
+                           {"$max": {"since_id": cursor.since_id, "since_at": cursor.since_at}, "$set": {"updated_at": now}},
+                           upsert=True)
+                 for account, cursor in dirty],
+                ordered=False
+            )
+            for _, cursor in dirty:
+                cursor.dirty = False
+        except Exception as e:
+            logger.error(f"Error saving account cursors: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "accounts": len(self.accounts),
+            "advances": self.advances,
+            "unsaved": sum(1 for cursor in self.accounts.values() if cursor.dirty),
+        }
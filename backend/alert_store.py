@@ -0,0 +1,142 @@
+import base64
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def _as_utc(value) -> datetime:
+    """Aware UTC datetime at Mongo's millisecond precision, so memory and DB keys compare equal"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        return _EPOCH
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+
+def encode_cursor(created_at: datetime, alert_id: str) -> str:
+    raw = f"{_as_utc(created_at).isoformat()}|{alert_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_cursor; raises ValueError on malformed input"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, alert_id = raw.split('|', 1)
+        return _as_utc(datetime.fromisoformat(created_at)), alert_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class AlertStore:
+    """Fixed-capacity in-memory view of recent alerts, backed by a Mongo collection for history
+
+    Pages are newest first and keyset-paginated on (created_at, id), so response size and memory
+    stay flat however long the server runs. Pages that go past the oldest buffered alert fall
+    through to an indexed Mongo query.
+    """
+
+    def __init__(self, collection: AsyncIOMotorCollection, capacity: int = 1000):
+        self.collection = collection
+        self.capacity = capacity
+        self.alerts: Deque[Dict] = deque(maxlen=capacity)
+        self.version = 0  # bumped on every change, so views of the buffer know when to rebuild
+
+    @staticmethod
+    def key(alert: Dict) -> Tuple[datetime, str]:
+        return _as_utc(alert.get('created_at')), str(alert.get('id', ''))
+
+    def append(self, alert: Dict):
+        """Add an alert, keeping the buffer ordered by (created_at, id)"""
+        alert_key = self.key(alert)
+        self.version += 1
+        if not self.alerts or self.key(self.alerts[-1]) <= alert_key:
+            self.alerts.append(alert)
+            return
+        # Late arrival: walk back to its slot (rare, and bounded by capacity)
+        position = len(self.alerts)
+        while position > 0 and self.key(self.alerts[position - 1]) > alert_key:
+            position -= 1
+        if len(self.alerts) == self.capacity:
+            if position == 0:
+                return  # older than everything buffered; it is only in Mongo
+            self.alerts.popleft()
+            position -= 1
+        self.alerts.insert(position, alert)
+
+    def replace(self, alerts: Iterable[Dict]):
+        """Swap the buffer contents (version restore); keeps only the newest `capacity` alerts"""
+        self.alerts = deque(sorted(alerts, key=self.key), maxlen=self.capacity)
+        self.version += 1
+
+    def tail(self, count: int) -> List[Dict]:
+        """Last `count` alerts in insertion order"""
+        if count <= 0:
+            return []
+        return list(self.alerts)[-count:]
+
+    def to_list(self) -> List[Dict]:
+        return list(self.alerts)
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def __iter__(self):
+        return iter(list(self.alerts))
+
+    async def page(self, limit: int = 100, cursor: Optional[str] = None, since: Optional[datetime] = None) -> Dict:
+        """One page of alerts older than `cursor` and not older than `since`, newest first"""
+        before = decode_cursor(cursor) if cursor else None
+        since = _as_utc(since) if since else None
+
+        results: List[Dict] = []
+        reached_since = False
+        for alert in reversed(self.alerts):
+            alert_key = self.key(alert)
+            if before is not None and alert_key >= before:
+                continue
+            if since is not None and alert_key[0] < since:
+                reached_since = True
+                break
+            results.append(alert)
+            if len(results) >= limit:
+                break
+
+        # Older history lives only in Mongo
+        if len(results) < limit and not reached_since:
+            boundary = before
+            if self.alerts:
+                oldest_buffered = self.key(self.alerts[0])
+                boundary = oldest_buffered if boundary is None else min(boundary, oldest_buffered)
+            results.extend(await self._query_history(limit - len(results), boundary, since))
+
+        next_cursor = encode_cursor(*self.key(results[-1])) if len(results) >= limit else None
+        return {"alerts": results, "next_cursor": next_cursor, "count": len(results)}
+
+    async def _query_history(self, limit: int, before: Optional[Tuple[datetime, str]],
+                             since: Optional[datetime]) -> List[Dict]:
+        conditions = []
+        if before is not None:
+            created_at, alert_id = before
+            conditions.append({"$or": [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "id": {"$lt": alert_id}},
+            ]})
+        if since is not None:
+            conditions.append({"created_at": {"$gte": since}})
+        query = {"$and": conditions} if conditions else {"created_at": {"$exists": True}}
+        try:
+            return await self.collection.find(query, {"_id": 0}) \
+                .sort([("created_at", -1), ("id", -1)]).limit(limit).to_list(limit)
+        except Exception as e:
+            logger.error(f"Error querying alert history: {e}")
+            return []
@@ -0,0 +1,94 @@
+import random
+from typing import List
+
+from token_extraction import KNOWN_MEME_TOKENS, MEME_SUFFIXES, TOKEN_KEYWORDS
+
+# Hand-picked tweets covering the edge cases of the extraction rules
+GOLDEN_TWEETS = [
+    "Just aped into $WAGMI, this is going to the moon 🚀",
+    "$BONK $WIF $POPCAT all pumping today",
+    "$btc and $eth are boring, $GIGA is where it's at",
+    "$A is too short, $ABCDEFGHIJK is too long, $ABCDEFGHIJ is fine",
+    "$PEPE2 and $PEPE_ are not tickers, $PEPE. is",
+    "MOODENG coin is the next 100x",
+    "CHILLGUY token listed, WAGMI to the moon, FWOG diamond hands",
+    "PNUT to  the\tmoon and GOAT TO THE MOON",
+    "AB COIN COIN TOKEN",
+    "X1ABC coin and _TEST coin are not mentions",
+    "SOL coin and ETH token are established",
+    "PEPE dollar, DOGE euro, BONK yen, WIF new zealand",
+    "PEPE2 real vs PEPE realm vs BENJI land",
+    "BEN MARK COIN and ELON time zone",
+    "PEPE.COIN and PEPE-dollar are not spaced",
+    "İSTANBUL coin, KİTTY token, $KING, BOOK dollar",
+    "pepe dollar lowercase, wagmi coin lowercase, $wagmi lowercase",
+    "Straße coin and ßB token",
+    "COINS are not coin, TOKENS neither",
+    "https://x.com/someone/status/1234567890 $LINK $CRV $SLERF",
+    "",
+    "no tokens here at all, just vibes",
+]
+
+_NOISE_WORDS = [
+    "gm", "wagmi", "ngmi", "ser", "fren", "lfg", "send", "it", "ape", "in", "now", "the", "chart",
+    "looks", "insane", "dev", "based", "rug", "or", "not", "100x", "easy", "jeet", "bags", "alpha",
+    "https://pump.fun/coin", "🚀", "🔥", "💎", "@someone", "#memecoin", "CA:", "soon", "1k", "mc",
+]
+
+_TICKER_WORDS = [
+    "MOODENG", "CHILLGUY", "PNUT", "GOAT", "FWOG", "MICHI", "GIGA", "RETARDIO", "SIGMA", "WAGMI",
+    "BTC", "ETH", "SOL", "USDC", "AB", "A", "ABCDEFGHIJK", "PEPE2", "X1", "İŞ", "KING", "ßB",
+]
+
+
+def _random_word(rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.35:
+        return rng.choice(_NOISE_WORDS)
+    if roll < 0.5:
+        return rng.choice(['$', '', '', '#']) + rng.choice(_TICKER_WORDS + list(KNOWN_MEME_TOKENS))
+    if roll < 0.65:
+        return rng.choice(KNOWN_MEME_TOKENS)
+    if roll < 0.8:
+        return rng.choice(TOKEN_KEYWORDS)
+    word = rng.choice(MEME_SUFFIXES)
+    return word.upper() if rng.random() < 0.5 else word
+
+
+def generate_tweets(count: int, seed: int = 1337) -> List[str]:
+    """Deterministic synthetic tweets mixing tickers, keywords, meme coins and noise"""
+    rng = random.Random(seed)
+    separators = [' ', ' ', ' ', '  ', '\n', '\t', ', ', '. ', '-', '/']
+    tweets = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(3, 40)):
+            parts.append(_random_word(rng))
+            parts.append(rng.choice(separators))
+        tweets.append(''.join(parts).strip())
+    return tweets
+
+
+def golden_corpus(synthetic_count: int = 5000) -> List[str]:
+    """Golden tweets plus a fixed synthetic sample"""
+    return GOLDEN_TWEETS + generate_tweets(synthetic_count)
+
+
+def generate_pump_frames(count: int, token_names: List[str], seed: int = 1337) -> List[dict]:
+    """Deterministic pump.fun new-token frames named after `token_names`, plus some noise frames"""
+    rng = random.Random(seed)
+    alphabet = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+    frames = []
+    for _ in range(count):
+        if rng.random() < 0.05:
+            frames.append({"message": "Successfully subscribed to token creation events."})
+            continue
+        frames.append({
+            "type": "tokenCreate",
+            "data": {
+                "name": rng.choice(token_names),
+                "mint": ''.join(rng.choice(alphabet) for _ in range(40)) + 'pump',
+                "marketCap": round(rng.uniform(3000, 80000), 2),
+            },
+        })
+    return frames
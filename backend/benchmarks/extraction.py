@@ -0,0 +1,80 @@
+"""Equivalence check and throughput benchmark for RealTimeXMonitor.extract_token_names
+
+Run from the backend directory:  python -m benchmarks.extraction [--tweets N]
+Exits non-zero if the compiled extractor disagrees with the reference regex patterns.
+"""
+import argparse
+import re
+import sys
+import time
+from typing import Callable, List
+
+from benchmarks.corpus import golden_corpus
+from x_monitor_realtime import RealTimeXMonitor
+
+
+def reference_extract(patterns: List[str], excluded_tokens: set) -> Callable[[str], List[str]]:
+    """The original re.findall implementation, used as the source of truth"""
+    def extract(text: str) -> List[str]:
+        tokens = set()
+        text = text.upper()
+        for pattern in patterns:
+            for match in re.findall(pattern, text, re.IGNORECASE):
+                token = match.strip() if isinstance(match, str) else match[0].strip()
+                if len(token) >= 2 and token not in excluded_tokens:
+                    tokens.add(token.upper())
+        return list(tokens)
+    return extract
+
+
+def check_equivalence(corpus: List[str], extract: Callable, reference: Callable) -> List[str]:
+    """Return the tweets on which the two extractors disagree"""
+    return [tweet for tweet in corpus if set(extract(tweet)) != set(reference(tweet))]
+
+
+def measure_throughput(corpus: List[str], extract: Callable, min_seconds: float = 1.0) -> float:
+    """Tweets per second over repeated passes of the corpus"""
+    processed = 0
+    started = time.perf_counter()
+    while True:
+        for tweet in corpus:
+            extract(tweet)
+        processed += len(corpus)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return processed / elapsed
+
+
+def run(tweet_count: int = 5000) -> dict:
+    monitor = RealTimeXMonitor(db=None)
+    corpus = golden_corpus(tweet_count)
+    reference = reference_extract(monitor.token_patterns, monitor.established_tokens)
+
+    mismatches = check_equivalence(corpus, monitor.extract_token_names, reference)
+    compiled_rate = measure_throughput(corpus, monitor.extract_token_names)
+    reference_rate = measure_throughput(corpus, reference)
+
+    return {
+        "corpus_size": len(corpus),
+        "mismatches": len(mismatches),
+        "mismatch_samples": mismatches[:5],
+        "compiled_tweets_per_sec": round(compiled_rate),
+        "regex_tweets_per_sec": round(reference_rate),
+        "speedup": round(compiled_rate / reference_rate, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tweets', type=int, default=5000, help="synthetic tweets added to the golden set")
+    args = parser.parse_args()
+
+    result = run(args.tweets)
+    for key, value in result.items():
+        print(f"{key}: {value}")
+    if result["mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+"""Minimal in-memory stand-in for AsyncIOMotorDatabase, covering the calls the app makes
+
+Only the query operators, aggregation stages and commands the app uses are supported; anything
+else raises UnsupportedOperation naming what is missing. Good enough to time the Python side of
+the pipeline without a mongod; it does not model index or network costs (explain only reports
+whether some declared index leads with a queried field).
+"""
+import copy
+import itertools
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo.errors import OperationFailure
+
+_ids = itertools.count(1)
+_MISSING = object()
+
+
+class UnsupportedOperation(NotImplementedError):
+    """The app issued something the in-memory database does not implement"""
+
+    def __init__(self, kind: str, name: str, supported: Iterable[str]):
+        super().__init__(f"{kind} {name!r} is not supported by the in-memory database "
+                         f"(supported: {', '.join(sorted(supported))})")
+
+
+QUERY_OPERATORS = ('$exists', '$ne', '$in', '$nin', '$gte', '$gt', '$lte', '$lt')
+
+
+def _get(document: Dict, path: str):
+    value = document
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _compare(value, operator: str, operand) -> bool:
+    if operator == '$exists':
+        return (value is not _MISSING) == bool(operand)
+    if operator == '$ne':
+        return value is _MISSING or value != operand
+    if operator == '$in':
+        return value is not _MISSING and value in operand
+    if operator == '$nin':
+        return value is _MISSING or value not in operand
+    if operator not in QUERY_OPERATORS:
+        raise UnsupportedOperation("Query operator", operator, QUERY_OPERATORS)
+    if value is _MISSING or value is None:
+        return False
+    if operator == '$gte':
+        return value >= operand
+    if operator == '$gt':
+        return value > operand
+    if operator == '$lte':
+        return value <= operand
+    return value < operand
+
+
+def matches(document: Dict, query: Optional[Dict]) -> bool:
+    for key, condition in (query or {}).items():
+        if key == '$and':
+            if not all(matches(document, part) for part in condition):
+                return False
+        elif key == '$or':
+            if not any(matches(document, part) for part in condition):
+                return False
+        elif key.startswith('$'):
+            raise UnsupportedOperation("Query operator", key, ('$and', '$or'))
+        elif isinstance(condition, dict) and condition and all(op.startswith('$') for op in condition):
+            value = _get(document, key)
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif _get(document, key) != condition:
+            return False
+    return True
+
+
+GROUP_ACCUMULATORS = ('$sum', '$max', '$min')
+
+
+def _evaluate(document: Dict, expression):
+    """Aggregation expressions: literals, "$field" paths and $cond"""
+    if isinstance(expression, str) and expression.startswith('$'):
+        value = _get(document, expression[1:])
+        return None if value is _MISSING else value
+    if isinstance(expression, dict):
+        if set(expression) != {'$cond'}:
+            raise UnsupportedOperation("Expression", next(iter(expression), ''), ('$cond',))
+        condition, if_true, if_false = expression['$cond']
+        return _evaluate(document, if_true) if _evaluate(document, condition) else _evaluate(document, if_false)
+    return expression
+
+
+def _group(documents: List[Dict], spec: Dict) -> List[Dict]:
+    groups: Dict[Any, Dict] = {}
+    for document in documents:
+        key = _evaluate(document, spec['_id'])
+        group = groups.setdefault(key, {'_id': key})
+        for field, accumulator in spec.items():
+            if field == '_id':
+                continue
+            (operator, expression), = accumulator.items()
+            value = _evaluate(document, expression)
+            if operator == '$sum':
+                group[field] = group.get(field, 0) + (value if isinstance(value, (int, float)) else 0)
+            elif operator in ('$max', '$min'):
+                if value is None:
+                    group.setdefault(field, None)
+                elif group.get(field) is None:
+                    group[field] = value
+                else:
+                    group[field] = max(group[field], value) if operator == '$max' else min(group[field], value)
+            else:
+                raise UnsupportedOperation("Accumulator", operator, GROUP_ACCUMULATORS)
+    return list(groups.values())
+
+
+def _project(document: Dict, projection: Optional[Dict]) -> Dict:
+    if not projection:
+        return copy.deepcopy(document)
+    included = [key for key, flag in projection.items() if flag and key != '_id']
+    if included:
+        result = {key: copy.deepcopy(document[key]) for key in included if key in document}
+        if projection.get('_id', 1) and '_id' in document:
+            result['_id'] = document['_id']
+        return result
+    return {key: copy.deepcopy(value) for key, value in document.items() if projection.get(key, 1)}
+
+
+def _sort_key(path: str):
+    """Missing fields sort first, as in Mongo"""
+    def key(document: Dict):
+        value = _get(document, path)
+        return (0, 0) if value is _MISSING else (1, value)
+    return key
+
+
+class MemoryCursor:
+    def __init__(self, documents: List[Dict], projection: Optional[Dict] = None):
+        self.documents = documents
+        self.projection = projection
+
+    def sort(self, keys, direction: int = None):
+        if isinstance(keys, str):
+            keys = [(keys, direction or 1)]
+        for key, key_direction in reversed(list(keys)):
+            self.documents.sort(key=_sort_key(key), reverse=key_direction < 0)
+        return self
+
+    def limit(self, count: int):
+        if count:
+            self.documents = self.documents[:count]
+        return self
+
+    async def to_list(self, length: Optional[int]):
+        documents = self.documents[:length] if length else self.documents
+        return [_project(document, self.projection) for document in documents]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield _project(document, self.projection)
+
+
+class MemoryCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.documents: List[Dict] = []
+        self.indexes: Dict[str, Dict] = {}
+        self.operations = 0
+
+    def _apply_update(self, document: Dict, update, inserting: bool = False):
+        if isinstance(update, list):
+            return  # aggregation-pipeline updates are only used for backfills
+        for field, value in update.get('$set', {}).items():
+            document[field] = copy.deepcopy(value)
+        for field, value in update.get('$max', {}).items():
+            current = document.get(field)
+            if field not in document or (value is not None and (current is None or value > current)):
+                document[field] = copy.deepcopy(value)
+        if inserting:
+            for field, value in update.get('$setOnInsert', {}).items():
+                document[field] = copy.deepcopy(value)
+
+    async def insert_one(self, document: Dict):
+        self.operations += 1
+        document.setdefault('_id', next(_ids))
+        self.documents.append(copy.deepcopy(document))
+
+    async def insert_many(self, documents: Iterable[Dict], ordered: bool = True):
+        self.operations += 1
+        for document in documents:
+            document.setdefault('_id', next(_ids))
+            self.documents.append(copy.deepcopy(document))
+
+    def find(self, query: Optional[Dict] = None, projection: Optional[Dict] = None) -> MemoryCursor:
+        self.operations += 1
+        return MemoryCursor([document for document in self.documents if matches(document, query)], projection)
+
+    async def find_one(self, query: Optional[Dict] = None, projection: Optional[Dict] = None):
+        self.operations += 1
+        for document in self.documents:
+            if matches(document, query):
+                return _project(document, projection)
+        return None
+
+    async def _update(self, query: Dict, update, many: bool, upsert: bool = False):
+        matched = 0
+        for document in self.documents:
+            if matches(document, query):
+                self._apply_update(document, update)
+                matched += 1
+                if not many:
+                    break
+        if not matched and upsert:
+            document = {key: value for key, value in query.items() if not key.startswith('$')}
+            document.setdefault('_id', next(_ids))
+            self._apply_update(document, update, inserting=True)
+            self.documents.append(document)
+
+    async def update_one(self, query: Dict, update, upsert: bool = False):
+        self.operations += 1
+        await self._update(query, update, many=False, upsert=upsert)
+
+    async def replace_one(self, query: Dict, replacement: Dict, upsert: bool = False):
+        self.operations += 1
+        for index, document in enumerate(self.documents):
+            if matches(document, query):
+                self.documents[index] = {'_id': document['_id'], **copy.deepcopy(replacement)}
+                return
+        if upsert:
+            document = {key: value for key, value in query.items() if not key.startswith('$')}
+            document.setdefault('_id', next(_ids))
+            document.update(copy.deepcopy(replacement))
+            self.documents.append(document)
+
+    async def update_many(self, query: Dict, update, upsert: bool = False):
+        self.operations += 1
+        await self._update(query, update, many=True, upsert=upsert)
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True):
+        self.operations += 1
+        for request in requests:
+            await self._update(request._filter, request._doc, many=False, upsert=request._upsert)
+
+    async def count_documents(self, query: Optional[Dict] = None) -> int:
+        self.operations += 1
+        return sum(1 for document in self.documents if matches(document, query))
+
+    async def delete_many(self, query: Dict):
+        self.operations += 1
+        self.documents = [document for document in self.documents if not matches(document, query)]
+
+    def aggregate(self, pipeline: List[Dict]) -> MemoryCursor:
+        """$match and $group stages"""
+        self.operations += 1
+        documents = self.documents
+        for stage in pipeline:
+            (name, spec), = stage.items()
+            if name == '$match':
+                documents = [document for document in documents if matches(document, spec)]
+            elif name == '$group':
+                documents = _group(documents, spec)
+            else:
+                raise UnsupportedOperation("Aggregation stage", name, ('$match', '$group'))
+        return MemoryCursor(list(documents))
+
+    async def create_index(self, keys, **kwargs):
+        keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        name = '_'.join(f"{key}_{direction}" for key, direction in keys)
+        self.indexes[name] = {"key": dict(keys), **kwargs}
+        return name
+
+    async def create_indexes(self, indexes):
+        for index in indexes:
+            document = dict(index.document)
+            name = document.pop('name')
+            existing = self.indexes.get(name)
+            if existing is not None and existing != document:
+                raise OperationFailure(f"An existing index has the same name as the requested index: {name}",
+                                       code=85)
+            self.indexes[name] = document
+        return list(self.indexes)
+
+    def explain_find(self, query: Optional[Dict], sort: Optional[Dict]) -> Dict:
+        """IXSCAN if some index leads with a filtered or sorted field, else COLLSCAN"""
+        fields = set(query or {}) | set(sort or {})
+        indexed = any(next(iter(index['key'])) in fields for index in self.indexes.values())
+        return {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}} if indexed else {"stage": "COLLSCAN"}
+
+
+class MemoryDatabase:
+    def __init__(self):
+        self.collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self.collections:
+            self.collections[name] = MemoryCollection(name)
+        return self.collections[name]
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    async def command(self, command, value=None, **kwargs):
+        """ping, collMod (index options) and explain of a find, the commands the app issues"""
+        if isinstance(command, dict):
+            (command, value), *rest = command.items()
+            kwargs.update(rest)
+        if command == 'ping':
+            return {"ok": 1.0}
+        if command == 'collMod':
+            collection = self[value]
+            options = dict(kwargs.get('index', {}))
+            key_pattern = options.pop('keyPattern', None)
+            for index in collection.indexes.values():
+                if index['key'] == key_pattern:
+                    index.update(options)
+                    return {"ok": 1.0}
+            raise ValueError(f"collMod: no index {key_pattern} on {value}")
+        if command == 'explain' and isinstance(value, dict) and 'find' in value:
+            plan = self[value['find']].explain_find(value.get('filter'), value.get('sort'))
+            return {"queryPlanner": {"winningPlan": plan}, "ok": 1.0}
+        raise UnsupportedOperation("Command", command, ('ping', 'collMod', 'explain (find)'))
+
+    def operation_counts(self) -> Dict[str, int]:
+        return {name: collection.operations for name, collection in self.collections.items()}
@@ -0,0 +1,366 @@
+"""Offline benchmarks for the mention -> alert -> broadcast pipeline
+
+Run from the backend directory:
+    python -m benchmarks.pipeline [--output results.json] [--compare previous.json] [--quick]
+
+Needs no network and no mongod: Mongo is replaced by benchmarks.memory_db. Results are written
+as JSON (with the git commit) so runs from different commits can be compared with --compare.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from benchmarks import extraction
+from benchmarks.corpus import generate_pump_frames
+from benchmarks.memory_db import MemoryDatabase
+from alert_store import AlertStore
+from broadcaster import Broadcaster
+from ca_index import CAIndex
+from ingestion import LatencyTracker
+from mention_writer import MentionWriter
+from token_matcher import TokenMatcher
+from tracing import AlertTracer
+from x_monitor_realtime import RealTimeXMonitor
+
+FAN_OUT_CLIENTS = (1, 10, 100)
+# Bigger is better for these; everything else (latencies) is smaller is better
+HIGHER_IS_BETTER = ('per_sec', 'speedup')
+
+
+def _mention_stream(count: int, accounts: int, tokens: int, seed: int = 7) -> List[tuple]:
+    """(token, account, tweet_url) with a skewed token popularity, like real mention traffic"""
+    rng = random.Random(seed)
+    token_names = [f"MEME{index}" for index in range(tokens)]
+    weights = [1 / (rank + 1) for rank in range(tokens)]
+    stream = []
+    for index in range(count):
+        account = f"account{rng.randrange(accounts)}"
+        token = rng.choices(token_names, weights)[0]
+        stream.append((token, account, f"https://x.com/{account}/status/{index}"))
+    return stream
+
+
+class AppStack:
+    """The server.py components wired the way server.py wires them, on an injected database
+
+    Built through the same constructors server.py uses, so no server module global is rebound;
+    importing server only defines its own (never connected) Mongo client.
+    """
+
+    def __init__(self, db: MemoryDatabase):
+        os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+        os.environ.setdefault('DB_NAME', 'benchmark')
+        import server
+
+        self.db = db
+        self.encoder = server.DateTimeEncoder
+        self.alert_tracer = AlertTracer(db)
+        self.broadcaster = Broadcaster(encoder=self.encoder, on_sent=self.alert_tracer.record_send)
+        self.name_alerts = AlertStore(db.name_alerts, capacity=server.ALERT_BUFFER_SIZE)
+        self.ca_alerts = AlertStore(db.ca_alerts, capacity=server.ALERT_BUFFER_SIZE)
+        self.mention_writer = MentionWriter(db.token_mentions)
+        self.ca_index = CAIndex(db)
+        self.token_matcher = TokenMatcher()
+        self.real_time_monitor = RealTimeXMonitor(db, ca_index=self.ca_index, tracer=self.alert_tracer,
+                                                  token_matcher=self.token_matcher, mention_writer=self.mention_writer,
+                                                  alert_store=self.name_alerts, broadcast=self.broadcast_to_clients)
+        self.pump_client = server.PumpFunWebSocketClient(db, self.ca_index, self.token_matcher, self.ca_alerts,
+                                                         self.alert_tracer, self.broadcast_to_clients,
+                                                         self.real_time_monitor.ca_watchlist)
+        self.tracked_accounts: List[Dict] = []
+        self.initial_state = server.build_initial_state(self.broadcaster, self.name_alerts, self.ca_alerts,
+                                                        lambda: self.tracked_accounts)
+
+    async def broadcast_to_clients(self, data: dict, trace_id: str = None):
+        """server.broadcast_to_clients on this stack's broadcaster and tracer"""
+        queued = self.broadcaster.publish(data, trace_id)
+        if trace_id is not None:
+            self.alert_tracer.expect_sends(trace_id, queued)
+
+
+async def bench_realtime_quorum(mentions: int) -> Dict:
+    """RealTimeXMonitor.record_mention + process_mentions_for_alerts"""
+    db = MemoryDatabase()
+    monitor = RealTimeXMonitor(db)
+    stream = _mention_stream(mentions, accounts=300, tokens=mentions // 10)
+    latency = LatencyTracker(window=mentions)
+
+    started = time.perf_counter()
+    for token, account, tweet_url in stream:
+        mention_started = time.perf_counter()
+        await monitor.record_mention(token, account, tweet_url)
+        latency.record(time.perf_counter() - mention_started)
+    sweep_started = time.perf_counter()
+    await monitor.process_mentions_for_alerts()
+    sweep_seconds = time.perf_counter() - sweep_started
+    elapsed = time.perf_counter() - started
+
+    return {
+        "mentions": mentions,
+        "alerts": len(db.name_alerts.documents),
+        "mentions_per_sec": round(mentions / elapsed),
+        "record_mention": latency.summary(),
+        "sweep_ms": round(sweep_seconds * 1000, 3),
+    }
+
+
+async def bench_server_name_alerts(stack, mentions: int) -> Dict:
+    """RealTimeXMonitor.ingest_mention as wired in server.py, including buffered writes and broadcasts"""
+    stream = _mention_stream(mentions, accounts=300, tokens=max(10, mentions // 10), seed=11)
+    latency = LatencyTracker(window=mentions)
+    alerts_before = len(stack.name_alerts)
+
+    started = time.perf_counter()
+    for token, account, tweet_url in stream:
+        mention_started = time.perf_counter()
+        await stack.real_time_monitor.ingest_mention(token, account, tweet_url)
+        latency.record(time.perf_counter() - mention_started)
+    await stack.mention_writer.flush()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "mentions": mentions,
+        "alerts": len(stack.name_alerts) - alerts_before,
+        "mentions_per_sec": round(mentions / elapsed),
+        "ingest_mention": latency.summary(),
+        "mention_writes": stack.mention_writer.stats(),
+    }
+
+
+async def bench_pump_messages(stack, frames: int) -> Dict:
+    """PumpFunWebSocketClient.process_pump_message, with a share of tokens on the watchlist"""
+    token_names = [f"PUMP{index}" for index in range(frames // 4)]
+    for token_name in token_names[::10]:
+        await stack.db.ca_monitoring_queue.insert_one({
+            "token_name": token_name, "token_name_norm": token_name, "status": "active", "mention_count": 3,
+        })
+    await stack.token_matcher.load(stack.db, exclude=stack.ca_index.token_names)
+    latency = LatencyTracker(window=frames)
+
+    started = time.perf_counter()
+    for frame in generate_pump_frames(frames, token_names):
+        frame_started = time.perf_counter()
+        await stack.pump_client.process_pump_message(frame)
+        latency.record(time.perf_counter() - frame_started)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "frames": frames,
+        "alerts": len(stack.db.ca_alerts.documents),
+        "trending_alerts": sum(1 for alert in stack.db.ca_alerts.documents if alert.get('was_trending')),
+        "frames_per_sec": round(frames / elapsed),
+        "process_pump_message": latency.summary(),
+    }
+
+
+def bench_initial_state(stack, connects: int) -> Dict:
+    """initial_state frame per WebSocket connect (reconnect storm), with a new CA alert every 100 connects"""
+    latency = LatencyTracker(window=connects)
+    builds_before = stack.initial_state.builds
+    for index in range(connects):
+        if index % 100 == 0:
+            stack.ca_alerts.append({"id": f"storm{index}", "token_name": "STORM", "created_at": datetime.now(timezone.utc)})
+        started = time.perf_counter()
+        stack.initial_state.get()
+        latency.record(time.perf_counter() - started)
+    return {
+        "connects": connects,
+        "rebuilds": stack.initial_state.builds - builds_before,
+        "frame_bytes": stack.initial_state.stats()['bytes'],
+        "initial_state": latency.summary(),
+    }
+
+
+class _FakeWebSocket:
+    """Accepts frames instantly and tells the benchmark when it has seen a given number"""
+
+    def __init__(self):
+        self.received = 0
+        self.target = 0
+        self.reached = asyncio.Event()
+
+    async def send_text(self, frame: str):
+        self.received += 1
+        if self.received >= self.target:
+            self.reached.set()
+
+    async def close(self):
+        pass
+
+
+async def bench_fan_out(stack, clients: int, events: int) -> Dict:
+    """Broadcaster.publish: publish-to-delivered latency per event, and burst throughput"""
+    broadcaster = Broadcaster(encoder=stack.encoder, max_queue_size=max(256, events))
+    sockets = [_FakeWebSocket() for _ in range(clients)]
+    for websocket in sockets:
+        broadcaster.register(websocket)
+    event = {"type": "ca_alert", "data": {
+        "id": "benchmark", "token_name": "BENCH", "contract_address": "x" * 44, "market_cap": 12345.6,
+        "created_at": datetime.now(timezone.utc), "priority": "HIGH", "was_trending": True,
+    }}
+
+    async def deliver(count: int):
+        for websocket in sockets:
+            websocket.target = websocket.received + count
+            websocket.reached.clear()
+        publish_started = time.perf_counter()
+        for _ in range(count):
+            broadcaster.publish(event)
+        publish_seconds = time.perf_counter() - publish_started
+        await asyncio.gather(*(websocket.reached.wait() for websocket in sockets))
+        return publish_seconds
+
+    delivered = LatencyTracker(window=events)
+    published = LatencyTracker(window=events)
+    for _ in range(events):
+        started = time.perf_counter()
+        published.record(await deliver(1))
+        delivered.record(time.perf_counter() - started)
+
+    burst_started = time.perf_counter()
+    await deliver(events)
+    burst_seconds = time.perf_counter() - burst_started
+
+    await broadcaster.close_all()
+    return {
+        "clients": clients,
+        "events": events,
+        "publish": published.summary(),
+        "delivered_to_all": delivered.summary(),
+        "burst_events_per_sec": round(events / burst_seconds),
+        "dropped": broadcaster.dropped,
+    }
+
+
+async def bench_filtered_fan_out(stack, clients: int, events: int) -> Dict:
+    """Pump.fun firehose to clients subscribed to trending (HIGH) CA alerts or a few token names"""
+    broadcaster = Broadcaster(encoder=stack.encoder, max_queue_size=max(256, events))
+    sockets = [_FakeWebSocket() for _ in range(clients)]
+    for index, websocket in enumerate(sockets):
+        broadcaster.register(websocket)
+        filters = {"types": ["ca_alert"], "priority": "HIGH"} if index % 2 else {"token_names": [f"TOKEN{index}"]}
+        broadcaster.subscribe(websocket, filters)
+    latency = LatencyTracker(window=events)
+    for index in range(events):
+        event = {"type": "ca_alert", "data": {
+            "id": f"benchmark{index}", "token_name": f"TOKEN{index % 1000}", "contract_address": "x" * 44,
+            "market_cap": 12345.6, "created_at": datetime.now(timezone.utc),
+            "priority": "HIGH" if index % 100 == 0 else "NORMAL", "was_trending": index % 100 == 0,
+        }}
+        started = time.perf_counter()
+        broadcaster.publish(event)
+        latency.record(time.perf_counter() - started)
+    frames = sum(channel.sent + len(channel.queue) for channel in broadcaster.channels.values())
+    await broadcaster.close_all()
+    return {
+        "clients": clients,
+        "events": events,
+        "publish": latency.summary(),
+        "frames_per_event": round(frames / events, 3),
+        "unencoded_events": broadcaster.unencoded,
+    }
+
+
+async def run_async(quick: bool = False) -> Dict:
+    scale = 0.2 if quick else 1.0
+    stack = AppStack(MemoryDatabase())
+    return {
+        "realtime_quorum": await bench_realtime_quorum(int(20000 * scale)),
+        "server_name_alerts": await bench_server_name_alerts(stack, int(2000 * scale)),
+        "pump_messages": await bench_pump_messages(stack, int(5000 * scale)),
+        "ws_connects": bench_initial_state(stack, int(10000 * scale)),
+        "fan_out": {
+            f"{clients}_clients": await bench_fan_out(stack, clients, int(500 * scale))
+            for clients in FAN_OUT_CLIENTS
+        },
+        "filtered_fan_out": await bench_filtered_fan_out(stack, 100, int(5000 * scale)),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(quick: bool = False) -> Dict:
+    extraction_result = extraction.run(1000 if quick else 5000)
+    results = {"extraction": extraction_result, **asyncio.run(run_async(quick))}
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def _flatten(data: Dict, prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(previous: Dict, current: Dict, threshold: float = 0.1) -> List[str]:
+    """Metrics that got worse by more than `threshold` (relative) between two result files"""
+    before, after = _flatten(previous['results']), _flatten(current['results'])
+    regressions = []
+    for name, old in before.items():
+        new = after.get(name)
+        # Single worst samples are too noisy to compare; percentiles and rates are not
+        if new is None or not old or name.endswith('max_ms') or not name.endswith(('_ms', *HIGHER_IS_BETTER)):
+            continue
+        change = (new - old) / old
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        if worse > threshold:
+            regressions.append(f"{name}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='benchmark_results.json', help="where to write the JSON results")
+    parser.add_argument('--compare', help="previous results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.1, help="relative change reported as a regression")
+    parser.add_argument('--quick', action='store_true', help="smaller workloads for a fast smoke run")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    result = run(args.quick)
+    with open(args.output, 'w') as output:
+        json.dump(result, output, indent=2, default=str)
+    print(json.dumps(result['results'], indent=2, default=str))
+    print(f"Results written to {args.output}")
+
+    if result['results']['extraction']['mismatches']:
+        sys.exit(1)
+    if args.compare:
+        with open(args.compare) as previous_file:
+            regressions = compare(json.load(previous_file), result, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
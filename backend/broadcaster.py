@@ -0,0 +1,382 @@
+import asyncio
+import itertools
+import json
+import logging
+import uuid
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Tuple, Type
+
+from fastapi import WebSocket
+
+from subscriptions import Subscription, SubscriptionIndex
+
+logger = logging.getLogger(__name__)
+
+SLOW_CLIENT_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+
+class QueuedFrame:
+    """An encoded frame waiting in a client's send queue"""
+    __slots__ = ('event_type', 'frame', 'trace_id', 'seq', 'replace_key')
+
+    def __init__(self, event_type: Optional[str], frame: str, trace_id: Optional[str] = None,
+                 seq: Optional[int] = None, replace_key: Optional[Hashable] = None):
+        self.event_type = event_type
+        self.frame = frame
+        self.trace_id = trace_id
+        self.seq = seq
+        self.replace_key = replace_key  # a newer queued frame with the same key supersedes this one
+
+
+class ClientChannel:
+    """One WebSocket client with its own bounded send queue and sender task
+
+    The sender task is the only writer on the socket, so every frame for this client (initial
+    state, pongs, broadcasts) must go through send(). When frames are dropped to make room, the
+    client is sent a `resync` frame ahead of the rest of its queue, so it never silently misses
+    events; frames superseded by a newer one with the same `replace_key` are dropped silently.
+    """
+
+    def __init__(self, websocket: WebSocket, broadcaster: "Broadcaster"):
+        self.websocket = websocket
+        self.broadcaster = broadcaster
+        self.queue: Deque[QueuedFrame] = deque()
+        self.wakeup = asyncio.Event()
+        self.is_open = True
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        # Frames lost since the client was last told: count and the first lost seq
+        self.gap_dropped = 0
+        self.gap_first_seq: Optional[int] = None
+        self.task = asyncio.create_task(self._drain())
+
+    def send(self, frame: str, event_type: Optional[str] = None, trace_id: Optional[str] = None,
+             seq: Optional[int] = None, replace_key: Optional[Hashable] = None) -> bool:
+        """Queue an encoded frame without waiting; returns False if the client was dropped"""
+        if not self.is_open:
+            return False
+        item = QueuedFrame(event_type, frame, trace_id, seq, replace_key)
+        if len(self.queue) >= self.broadcaster.max_queue_size and not self._make_room(item):
+            return False
+        self.queue.append(item)
+        self.max_depth = max(self.max_depth, len(self.queue))
+        self.wakeup.set()
+        return True
+
+    def _make_room(self, incoming: QueuedFrame) -> bool:
+        policy = self.broadcaster.slow_client_policy
+        if policy == "disconnect":
+            logger.warning(f"Disconnecting slow WebSocket client ({len(self.queue)} frames queued)")
+            self.broadcaster.disconnected_slow += 1
+            self.broadcaster.unregister(self.websocket)
+            asyncio.create_task(self.close())
+            return False
+        if policy == "coalesce":
+            # Drop frames superseded by a newer frame with the same replace key (never distinct alerts)
+            newest = {item.replace_key: item for item in itertools.chain(self.queue, (incoming,))
+                      if item.replace_key is not None}
+            kept = deque(item for item in self.queue if item.replace_key is None or newest[item.replace_key] is item)
+            coalesced = len(self.queue) - len(kept)
+            if coalesced:
+                self.queue = kept
+                self.coalesced += coalesced
+                self.broadcaster.coalesced += coalesced
+            if len(self.queue) < self.broadcaster.max_queue_size:
+                return True
+        # drop_oldest (and coalesce when nothing queued was superseded)
+        dropped = self.queue.popleft()
+        self.dropped += 1
+        self.broadcaster.dropped += 1
+        if dropped.replace_key is None:
+            self.gap_dropped += 1
+            if self.gap_first_seq is None:
+                self.gap_first_seq = dropped.seq
+        return True
+
+    async def _drain(self):
+        try:
+            while self.is_open:
+                if not self.queue:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+                    continue
+                if self.gap_dropped:
+                    # The lost frames were the oldest queued, so the notice goes ahead of the rest
+                    frame = self.broadcaster.resync_frame(
+                        self.gap_first_seq - 1 if self.gap_first_seq is not None else None, dropped=self.gap_dropped
+                    )
+                    self.gap_dropped, self.gap_first_seq = 0, None
+                    self.broadcaster.gap_notices += 1
+                    await asyncio.wait_for(self.websocket.send_text(frame), self.broadcaster.send_timeout_seconds)
+                    continue
+                item = self.queue.popleft()
+                await asyncio.wait_for(self.websocket.send_text(item.frame), self.broadcaster.send_timeout_seconds)
+                self.sent += 1
+                if item.trace_id is not None and self.broadcaster.on_sent is not None:
+                    self.broadcaster.on_sent(item.trace_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"WebSocket client send failed: {e}")
+        finally:
+            self.is_open = False
+            self.broadcaster.unregister(self.websocket)
+
+    async def close(self):
+        self.broadcaster.unregister(self.websocket)
+        try:
+            await self.websocket.close()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict:
+        return {"queue_depth": len(self.queue), "max_depth": self.max_depth, "sent": self.sent,
+                "dropped": self.dropped, "coalesced": self.coalesced}
+
+
+class SnapshotFrame:
+    """Pre-encoded frame of some server state, rebuilt only when that state changed
+
+    `state_key()` must be cheap (e.g. version counters): it is compared on every `get()`, and
+    only a changed key runs `build()` and the JSON encoding again. Every rebuild bumps the
+    `version` sent with the frame. Fast-moving scalars that must not invalidate the cache
+    (e.g. the broadcast seq) come from `live()` and are spliced into the top level of the
+    cached frame on every `get()`.
+    """
+
+    def __init__(self, event_type: str, build: Callable[[], dict], state_key: Callable[[], Hashable],
+                 encode: Callable[[dict], str], live: Optional[Callable[[], dict]] = None):
+        self.event_type = event_type
+        self.build = build
+        self.state_key = state_key
+        self.encode = encode
+        self.live = live
+        self.version = 0
+        self.built_key: Optional[Hashable] = None
+        self.frame: Optional[str] = None
+        self.builds = 0
+        self.hits = 0
+
+    def get(self) -> str:
+        key = self.state_key()
+        if self.frame is None or key != self.built_key:
+            self.version += 1
+            self.frame = self.encode({"type": self.event_type, "version": self.version, "data": self.build()})
+            self.built_key = key
+            self.builds += 1
+        else:
+            self.hits += 1
+        if self.live is None:
+            return self.frame
+        live = self.encode(self.live())
+        # Both are JSON objects: drop the cached frame's closing brace and the live one's opening brace
+        return f"{self.frame[:-1]}, {live[1:]}" if len(live) > 2 else self.frame
+
+    def stats(self) -> Dict:
+        return {"version": self.version, "builds": self.builds, "hits": self.hits,
+                "bytes": len(self.frame) if self.frame is not None else 0}
+
+
+class LoggedEvent:
+    """A published event in the replay log; encoded on first use, so events nobody wanted never are"""
+    __slots__ = ('seq', 'event_type', 'data', 'encoded')
+
+    def __init__(self, seq: int, data: dict):
+        self.seq = seq
+        self.event_type = data.get('type')
+        self.data = data
+        self.encoded: Optional[str] = None
+
+    @property
+    def payload(self) -> Dict:
+        payload = self.data.get('data')
+        return payload if isinstance(payload, dict) else {}
+
+    def frame(self, encode: Callable[[dict], str]) -> str:
+        if self.encoded is None:
+            self.encoded = encode({**self.data, "seq": self.seq})
+        return self.encoded
+
+
+class Broadcaster:
+    """Fan-out of events to WebSocket clients: encode once, enqueue per client, never await a send
+
+    Every published event carries `seq`, increasing by one per event within this process's
+    `stream_id`. The last `replay_log_size` events are kept, so a client reconnecting with the
+    last seq it saw gets only what it missed (see replay()). Clients can subscribe to a subset
+    of events; an event is encoded only if some client wants it and queued only for those.
+    Every `watermark_interval` events subscribed clients get a `watermark` frame carrying the
+    current seq, so a client whose filters match rarely still resumes from within the replay log.
+    """
+
+    def __init__(self, encoder: Type[json.JSONEncoder] = json.JSONEncoder, max_queue_size: int = 256,
+                 slow_client_policy: str = "drop_oldest", send_timeout_seconds: float = 10.0,
+                 on_sent: Optional[Callable[[str], None]] = None, replay_log_size: int = 1000,
+                 watermark_interval: Optional[int] = None):
+        if slow_client_policy not in SLOW_CLIENT_POLICIES:
+            raise ValueError(f"Unknown slow client policy: {slow_client_policy}")
+        self.encoder = encoder
+        self.max_queue_size = max_queue_size
+        self.slow_client_policy = slow_client_policy
+        self.send_timeout_seconds = send_timeout_seconds
+        self.on_sent = on_sent  # called with the trace id after each traced frame reaches a client
+        self.channels: Dict[WebSocket, ClientChannel] = {}
+        self.stream_id = uuid.uuid4().hex  # seqs restart with the process; clients must not mix streams
+        self.seq = 0
+        self.replay_log: Deque[LoggedEvent] = deque(maxlen=replay_log_size)
+        self.watermark_interval = watermark_interval or max(1, replay_log_size // 4)
+        self.subscriptions = SubscriptionIndex()
+        self.filtered_out = 0  # client sends saved by subscriptions
+        self.unencoded = 0  # events no client wanted
+        self.replays = 0
+        self.replayed_frames = 0
+        self.resyncs = 0
+        self.watermarks = 0
+        self.published = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.gap_notices = 0
+        self.disconnected_slow = 0
+
+    def encode(self, data: dict) -> str:
+        return json.dumps(data, cls=self.encoder)
+
+    def register(self, websocket: WebSocket) -> ClientChannel:
+        channel = ClientChannel(websocket, self)
+        self.channels[websocket] = channel
+        self.subscriptions.add(websocket)
+        return channel
+
+    def subscribe(self, websocket: WebSocket, filters: Optional[Dict]) -> Optional[Subscription]:
+        """Set a client's filters (None or {} for everything); raises ValueError on invalid filters"""
+        subscription = Subscription(filters) if filters else None
+        if websocket in self.channels:
+            self.subscriptions.subscribe(websocket, subscription)
+        return subscription
+
+    def unregister(self, websocket: WebSocket):
+        channel = self.channels.pop(websocket, None)
+        self.subscriptions.remove(websocket)
+        if channel:
+            channel.is_open = False
+            channel.wakeup.set()
+
+    def publish(self, data: dict, trace_id: Optional[str] = None) -> int:
+        """Number and log an event, encode it once and queue it for every interested client
+
+        Returns the number of clients queued.
+        """
+        event = LoggedEvent(self.seq + 1, data)
+        recipients = self.subscriptions.recipients(event.event_type, event.payload)
+        if recipients:
+            try:
+                frame = event.frame(self.encode)
+            except Exception as e:
+                logger.error(f"Failed to encode broadcast event {event.event_type}: {e}")
+                return 0
+        else:
+            self.unencoded += 1
+        self.seq = event.seq
+        self.published += 1
+        self.replay_log.append(event)
+        self.filtered_out += len(self.channels) - len(recipients)
+        queued = 0
+        for websocket in recipients:
+            channel = self.channels.get(websocket)
+            if channel is not None and channel.send(frame, event.event_type, trace_id, seq=event.seq):
+                queued += 1
+        if self.seq % self.watermark_interval == 0:
+            self.send_watermark()
+        return queued
+
+    def resync_frame(self, last_seq: Optional[int], **data) -> str:
+        """Tells a client events after `last_seq` were lost to it (reload over REST)"""
+        return self.encode({
+            "type": "resync",
+            "data": {"last_seq": last_seq, "seq": self.seq, "stream": self.stream_id, **data}
+        })
+
+    def watermark_frame(self) -> str:
+        """A frame telling the client it has been sent everything it wants up to the current seq
+
+        Only valid when queued behind every event published so far, i.e. sent right away.
+        """
+        return self.encode({"type": "watermark", "seq": self.seq, "stream": self.stream_id})
+
+    def send_watermark(self):
+        """Advance the resume point of subscribed clients that were filtered out of recent events"""
+        if not self.subscriptions.subscriptions:
+            return
+        frame = self.watermark_frame()
+        for websocket in list(self.subscriptions.subscriptions):
+            channel = self.channels.get(websocket)
+            if channel is not None:
+                channel.send(frame, "watermark", replace_key="watermark")
+        self.watermarks += 1
+
+    def replay(self, last_seq: int, stream_id: Optional[str],
+               subscription: Optional[Subscription] = None) -> Optional[List[Tuple[Optional[str], str, int]]]:
+        """(event type, frame, seq) of every event after `last_seq` that `subscription` wants
+
+        None if the client has to resync: the seq belongs to another stream (server restarted),
+        is ahead of this one, or is older than the replay log. Gaps that would not fit a client
+        queue are resynced too.
+        """
+        if stream_id != self.stream_id or last_seq > self.seq:
+            self.resyncs += 1
+            return None
+        missed = self.seq - last_seq
+        oldest = self.replay_log[0].seq if self.replay_log else self.seq + 1
+        if missed and last_seq + 1 < oldest:
+            self.resyncs += 1
+            return None
+        events = [event for event in itertools.islice(self.replay_log, len(self.replay_log) - missed, None)
+                  if subscription is None or subscription.matches(event.event_type, event.payload)]
+        if len(events) > self.max_queue_size:
+            self.resyncs += 1
+            return None
+        frames = []
+        for event in events:
+            try:
+                frames.append((event.event_type, event.frame(self.encode), event.seq))
+            except Exception as e:
+                logger.error(f"Failed to encode replayed event {event.event_type}: {e}")
+        self.replays += 1
+        self.replayed_frames += len(frames)
+        return frames
+
+    async def close_all(self):
+        for channel in list(self.channels.values()):
+            await channel.close()
+            channel.task.cancel()
+        self.channels.clear()
+
+    def __len__(self) -> int:
+        return len(self.channels)
+
+    def stats(self) -> Dict:
+        depths: List[int] = [len(channel.queue) for channel in self.channels.values()]
+        return {
+            "clients": len(self.channels),
+            "slow_client_policy": self.slow_client_policy,
+            "max_queue_size": self.max_queue_size,
+            "published": self.published,
+            "stream_id": self.stream_id,
+            "seq": self.seq,
+            "replay_log": len(self.replay_log),
+            "replays": self.replays,
+            "replayed_frames": self.replayed_frames,
+            "resyncs": self.resyncs,
+            "watermarks": self.watermarks,
+            "filtered_out": self.filtered_out,
+            "unencoded": self.unencoded,
+            "subscriptions": self.subscriptions.stats(),
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "gap_notices": self.gap_notices,
+            "disconnected_slow": self.disconnected_slow,
+            "queue_depth_max": max(depths) if depths else 0,
+            "queue_depth_total": sum(depths),
+        }
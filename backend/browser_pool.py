@@ -0,0 +1,421 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Playwright, Route, Request
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-features=VizDisplayCompositor',
+    f'--user-agent={USER_AGENT}',
+    '--disable-web-security',
+    '--start-maximized'
+]
+STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined,
+    });
+"""
+
+# Lean mode: what X pages can do without when we only read text and JSON
+LEAN_BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font'}
+LEAN_BLOCKED_DOMAINS = (
+    'video.twimg.com', 'pbs.twimg.com', 'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+    'ads-twitter.com', 'ads-api.x.com', 'ads-api.twitter.com', 'analytics.twitter.com', 'static.ads-twitter.com',
+)
+LEAN_BLOCKED_PATHS = ('/jot/', '/client_event', '/1.1/live_pipeline/', '/i/api/1.1/keyregistry/')
+
+browser_lease_wait_seconds = metrics.histogram(
+    'browser_lease_wait_seconds', 'Time spent waiting for a pooled browser page')
+navigation_seconds = metrics.histogram(
+    'browser_navigation_seconds', 'Wall time of a browser navigation until its content was ready',
+    (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0))
+navigation_bytes = metrics.histogram(
+    'browser_navigation_bytes', 'Bytes transferred by a browser navigation',
+    (50e3, 100e3, 250e3, 500e3, 1e6, 2.5e6, 5e6, 10e6, 25e6, 50e6))
+
+
+def is_lean_blocked(resource_type: str, url: str, blocked_types: Set[str] = LEAN_BLOCKED_RESOURCE_TYPES) -> bool:
+    if resource_type in blocked_types:
+        return True
+    parts = urlsplit(url)
+    host = parts.hostname or ''
+    if any(host == domain or host.endswith('.' + domain) for domain in LEAN_BLOCKED_DOMAINS):
+        return True
+    return any(path in parts.path for path in LEAN_BLOCKED_PATHS)
+
+
+def descendant_pids(root_pid: int) -> Optional[List[int]]:
+    """Every descendant of `root_pid` from one scan of /proc, Linux only"""
+    try:
+        children: Dict[int, List[int]] = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as stat_file:
+                    # Fields after the parenthesised command name; ppid is the second one
+                    fields = stat_file.read().rsplit(')', 1)[1].split()
+                children.setdefault(int(fields[1]), []).append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    except OSError:
+        return None
+
+    pids = []
+    stack = list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+class ProcessTreeRSS:
+    """Sampled RSS of the Playwright driver and browser processes (descendants of `root_pid`)
+
+    Walking /proc costs a read per process on the host, so the PID tree is cached and only
+    rescanned every `rescan_seconds`, after invalidate() (a context was opened) or once a cached
+    PID has exited. A sample reads /proc/<pid>/statm of the cached PIDs and is itself reused
+    for `max_age` seconds, so page releases and metric scrapes do not each touch /proc.
+    """
+
+    def __init__(self, root_pid: int = None, max_age: float = 5.0, rescan_seconds: float = 60.0):
+        self.root_pid = root_pid or os.getpid()
+        self.max_age = max_age
+        self.rescan_seconds = rescan_seconds
+        self.pids: Optional[List[int]] = None
+        self.scanned_at = 0.0
+        self.sampled_at: Optional[float] = None
+        self.value: Optional[int] = None
+        self.scans = 0
+
+    def invalidate(self):
+        self.pids = None
+        self.sampled_at = None
+
+    def bytes(self) -> Optional[int]:
+        now = time.monotonic()
+        if self.sampled_at is not None and now - self.sampled_at < self.max_age:
+            return self.value
+        if self.pids is None or now - self.scanned_at >= self.rescan_seconds:
+            self.pids = descendant_pids(self.root_pid)
+            self.scanned_at = now
+            self.scans += 1
+        if self.pids is None:
+            self.value = None
+        else:
+            total, exited = 0, False
+            for pid in self.pids:
+                try:
+                    with open(f'/proc/{pid}/statm') as statm_file:
+                        total += int(statm_file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+                except (OSError, IndexError, ValueError):
+                    exited = True
+            self.value = total
+            if exited:
+                self.pids = None  # a renderer went away; its replacement shows up on the next scan
+        self.sampled_at = now
+        return self.value
+
+
+class PooledPage:
+    """One context + page of the pool and its usage since it was (re)created"""
+
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.context: Optional[BrowserContext] = None
+        self.page: Optional[Page] = None
+        self.navigations = 0
+        self.created_at = 0.0
+        self.crashed = False
+        # Traffic counters, read before/after a navigation to meter it
+        self.requests = 0
+        self.bytes_received = 0
+        self.blocked = 0
+        self.size_tasks: Set[asyncio.Task] = set()
+
+    def _on_frame_navigated(self, frame):
+        if frame == self.page.main_frame:
+            self.navigations += 1
+
+    def _on_crash(self, _page):
+        self.crashed = True
+
+    def _on_request_finished(self, request: Request):
+        self.requests += 1
+        task = asyncio.create_task(self._add_size(request))
+        self.size_tasks.add(task)
+        task.add_done_callback(self.size_tasks.discard)
+
+    async def _add_size(self, request: Request):
+        try:
+            sizes = await request.sizes()
+            self.bytes_received += sizes['responseBodySize'] + sizes['responseHeadersSize']
+        except Exception:
+            pass  # page or context went away
+
+    async def _route_lean(self, route: Route):
+        request = route.request
+        if is_lean_blocked(request.resource_type, request.url):
+            self.blocked += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+
+class BrowserPool:
+    """A Chromium with `size` contexts/pages that share the logged-in storage state
+
+    Scrapes lease a page, so up to `size` navigations run at once. A page's context is
+    recreated after `max_navigations` main-frame navigations, after a renderer crash, or at
+    release time when the browser processes exceed `rss_budget_mb`. If the browser dies it
+    is relaunched on the next lease.
+    """
+
+    def __init__(self, size: int = 4, max_navigations: int = 50, rss_budget_mb: float = 1500,
+                 headless: bool = True, lean: bool = True):
+        self.size = size
+        self.lean = lean  # abort images, media, fonts, ads and analytics
+        self.max_navigations = max_navigations
+        self.rss_budget_mb = rss_budget_mb
+        self.headless = headless
+        self.storage_state: Optional[Dict] = None
+        self.playwright: Optional[Playwright] = None
+        self.browser: Optional[Browser] = None
+        self.slots: List[PooledPage] = []
+        self.idle: asyncio.Queue = asyncio.Queue()
+        self.restart_lock = asyncio.Lock()
+        self.browser_generation = 0
+        self.leases = 0
+        self.recycles = 0
+        self.restarts = 0
+        self.recent_navigations: Deque[Dict] = deque(maxlen=100)
+        self.rss = ProcessTreeRSS()
+
+    @property
+    def is_running(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+    @property
+    def in_use(self) -> int:
+        return len(self.slots) - self.idle.qsize()
+
+    async def start(self):
+        async with self.restart_lock:
+            if not self.is_running:
+                await self._launch()
+
+    async def _launch(self):
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+        self.browser = await self.playwright.chromium.launch(headless=self.headless, args=LAUNCH_ARGS)
+        self.browser.on("disconnected", lambda _: logger.warning("Pooled browser disconnected"))
+        self.browser_generation += 1
+        self.slots = [PooledPage(slot) for slot in range(self.size)]
+        self.idle = asyncio.Queue()
+        for pooled in self.slots:
+            await self._open(pooled)
+            self.idle.put_nowait(pooled)
+        logger.info(f"Browser pool started with {self.size} pages (headless={self.headless})")
+
+    async def _open(self, pooled: PooledPage):
+        self.rss.invalidate()  # the new context may run in a new renderer process
+        pooled.context = await self.browser.new_context(
+            viewport={'width': 1920, 'height': 1080},
+            user_agent=USER_AGENT,
+            storage_state=self.storage_state
+        )
+        await pooled.context.add_init_script(STEALTH_SCRIPT)
+        if self.lean:
+            await pooled.context.route("**/*", pooled._route_lean)
+        pooled.page = await pooled.context.new_page()
+        pooled.page.on("framenavigated", pooled._on_frame_navigated)
+        pooled.page.on("crash", pooled._on_crash)
+        pooled.page.on("requestfinished", pooled._on_request_finished)
+        pooled.navigations = 0
+        pooled.crashed = False
+        pooled.created_at = time.monotonic()
+
+    async def _recycle(self, pooled: PooledPage, reason: str):
+        logger.info(f"Recycling browser page {pooled.slot} ({reason}, {pooled.navigations} navigations)")
+        try:
+            await pooled.context.close()
+        except Exception as e:
+            logger.debug(f"Error closing recycled context: {e}")
+        await self._open(pooled)
+        self.recycles += 1
+
+    async def _restart(self, generation: int):
+        """Relaunch a dead browser once, however many leases noticed it"""
+        async with self.restart_lock:
+            if self.browser_generation != generation or self.is_running:
+                return
+            logger.warning("Browser is gone - relaunching the pool")
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+            await self._launch()
+            self.restarts += 1
+
+    def set_storage_state(self, storage_state: Optional[Dict]):
+        """Storage state (cookies, local storage) used by every context created from now on"""
+        self.storage_state = storage_state
+
+    async def refresh_contexts(self):
+        """Recreate idle contexts so they pick up a new storage state"""
+        idle = []
+        while not self.idle.empty():
+            idle.append(self.idle.get_nowait())
+        try:
+            for pooled in idle:
+                await self._recycle(pooled, "storage state changed")
+        finally:
+            for pooled in idle:
+                self.idle.put_nowait(pooled)
+
+    async def acquire(self, timeout: float = 120) -> PooledPage:
+        if not self.is_running:
+            if self.browser is None:
+                await self.start()
+            else:
+                await self._restart(self.browser_generation)
+        started = time.monotonic()
+        pooled = await asyncio.wait_for(self.idle.get(), timeout)
+        browser_lease_wait_seconds.observe(time.monotonic() - started)
+        self.leases += 1
+        try:
+            if pooled.crashed or pooled.page.is_closed():
+                await self._recycle(pooled, "page crashed")
+        except Exception:
+            self.idle.put_nowait(pooled)
+            raise
+        return pooled
+
+    async def release(self, pooled: PooledPage):
+        try:
+            if not self.is_running:
+                return  # the next acquire relaunches everything
+            if pooled.crashed or pooled.page.is_closed():
+                await self._recycle(pooled, "page crashed")
+            elif pooled.navigations >= self.max_navigations:
+                await self._recycle(pooled, "navigation limit")
+            else:
+                rss = self.rss_bytes()
+                if rss is not None and rss > self.rss_budget_mb * 1024 * 1024:
+                    await self._recycle(pooled, f"browser RSS {rss // (1024 * 1024)} MB over budget")
+        except Exception as e:
+            logger.error(f"Error recycling browser page {pooled.slot}: {e}")
+        finally:
+            if pooled in self.slots:
+                self.idle.put_nowait(pooled)
+
+    def _pooled_for(self, page: Page) -> Optional[PooledPage]:
+        return next((pooled for pooled in self.slots if pooled.page is page), None)
+
+    async def navigate(self, page: Page, url: str, wait_for_selector: Optional[str] = None,
+                       wait_for_response: Optional[Callable] = None, timeout_ms: float = 30000) -> Dict:
+        """Go to `url` and wait only for the content we need (a selector and/or a response)
+
+        Returns wall time, bytes transferred and requests made/blocked for the navigation;
+        `ready` is False if the awaited content did not show up in time.
+        """
+        pooled = self._pooled_for(page)
+        before = (pooled.requests, pooled.bytes_received, pooled.blocked) if pooled else (0, 0, 0)
+        started = time.monotonic()
+        ready = True
+        try:
+            if wait_for_response is not None:
+                async with page.expect_response(wait_for_response, timeout=timeout_ms):
+                    await page.goto(url, wait_until='domcontentloaded', timeout=timeout_ms)
+            else:
+                await page.goto(url, wait_until='domcontentloaded', timeout=timeout_ms)
+            if wait_for_selector:
+                await page.wait_for_selector(wait_for_selector, timeout=timeout_ms)
+        except PlaywrightTimeoutError:
+            ready = False
+            logger.warning(f"Timed out waiting for content of {url}")
+        seconds = time.monotonic() - started
+
+        if pooled and pooled.size_tasks:
+            await asyncio.gather(*list(pooled.size_tasks), return_exceptions=True)
+        after = (pooled.requests, pooled.bytes_received, pooled.blocked) if pooled else (0, 0, 0)
+        stats = {
+            "url": url,
+            "ready": ready,
+            "seconds": round(seconds, 3),
+            "requests": after[0] - before[0],
+            "bytes": after[1] - before[1],
+            "blocked": after[2] - before[2],
+        }
+        navigation_seconds.observe(seconds)
+        navigation_bytes.observe(stats["bytes"])
+        self.recent_navigations.append(stats)
+        logger.info(f"Loaded {url} in {seconds:.2f}s, {stats['bytes'] / 1024:.0f} KB, "
+                    f"{stats['requests']} requests ({stats['blocked']} blocked)")
+        return stats
+
+    def lease(self, timeout: float = 120) -> "PageLease":
+        """async with pool.lease() as page: ..."""
+        return PageLease(self, timeout)
+
+    async def close(self):
+        try:
+            for pooled in self.slots:
+                if pooled.context:
+                    await pooled.context.close()
+            if self.browser:
+                await self.browser.close()
+            if self.playwright:
+                await self.playwright.stop()
+        finally:
+            self.slots = []
+            self.idle = asyncio.Queue()
+            self.browser = None
+            self.playwright = None
+
+    def rss_bytes(self) -> Optional[int]:
+        """Resident memory of the driver and browser processes, at most `rss.max_age` seconds old"""
+        return self.rss.bytes() if self.browser is not None else None
+
+    def stats(self) -> Dict:
+        rss = self.rss_bytes()
+        return {
+            "running": self.is_running,
+            "size": self.size,
+            "in_use": self.in_use,
+            "leases": self.leases,
+            "recycles": self.recycles,
+            "restarts": self.restarts,
+            "browser_rss_mb": round(rss / (1024 * 1024), 1) if rss is not None else None,
+            "navigations": [pooled.navigations for pooled in self.slots],
+            "lean": self.lean,
+            "recent_navigations": list(self.recent_navigations)[-10:],
+        }
+
+
+class PageLease:
+    def __init__(self, pool: BrowserPool, timeout: float):
+        self.pool = pool
+        self.timeout = timeout
+        self.pooled: Optional[PooledPage] = None
+
+    async def __aenter__(self) -> Page:
+        self.pooled = await self.pool.acquire(self.timeout)
+        return self.pooled.page
+
+    async def __aexit__(self, *exc_info):
+        await self.pool.release(self.pooled)
@@ -0,0 +1,67 @@
+import logging
+from typing import Dict, Set
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_token_name(token_name: str) -> str:
+    """Case-normalized token name used as the lookup key for CA checks"""
+    return (token_name or '').strip().upper()
+
+
+class CAIndex:
+    """In-process index of token names that already have a contract address
+
+    Backed by the indexed `token_name_norm` field on `ca_alerts`. Loaded once at startup and
+    updated whenever a CA alert is stored, so "has this token got a CA?" never hits Mongo.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.token_names: Set[str] = set()
+        self.is_loaded = False
+
+    async def ensure_schema(self):
+        """Backfill the normalized name on documents stored before it existed (indexes live in schema.py)"""
+        backfill = [{"$set": {"token_name_norm": {"$toUpper": {"$trim": {"input": {"$ifNull": ["$token_name", ""]}}}}}}]
+        for collection in (self.db.ca_alerts, self.db.ca_monitoring_queue):
+            await collection.update_many({"token_name_norm": {"$exists": False}}, backfill)
+
+    async def load(self):
+        """Warm the in-memory index from ca_alerts"""
+        try:
+            await self.ensure_schema()
+        except Exception as e:
+            logger.error(f"Error preparing CA index schema: {e}")
+
+        try:
+            names = set()
+            projection = {"token_name_norm": 1, "token_name": 1, "_id": 0}
+            async for alert in self.db.ca_alerts.find({}, projection):
+                token_name_norm = alert.get('token_name_norm') or normalize_token_name(alert.get('token_name', ''))
+                if token_name_norm:
+                    names.add(token_name_norm)
+            # Keep anything added while the cursor was running
+            self.token_names |= names
+            self.is_loaded = True
+            logger.info(f"CA index loaded: {len(self.token_names)} tokens with CAs")
+        except Exception as e:
+            logger.error(f"Error loading CA index: {e}")
+
+    def has_ca(self, token_name: str) -> bool:
+        return normalize_token_name(token_name) in self.token_names
+
+    def add(self, token_name: str):
+        token_name_norm = normalize_token_name(token_name)
+        if token_name_norm:
+            self.token_names.add(token_name_norm)
+
+    def prepare_alert(self, alert: Dict) -> Dict:
+        """Stamp the normalized name on a CA alert before it is stored"""
+        alert['token_name_norm'] = normalize_token_name(alert.get('token_name', ''))
+        return alert
+
+    def stats(self) -> Dict:
+        return {"is_loaded": self.is_loaded, "tokens_with_ca": len(self.token_names)}
@@ -0,0 +1,210 @@
+import logging
+import math
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Iterable, List
+
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+HISTORY_WINDOW_HOURS = 168  # Activity older than a week is decayed away
+PRIOR_MENTIONS = 0.5  # Keeps silent accounts on the slowest cadence instead of never polling them
+QUORUM_WEIGHT = 2.0  # A mention that helped reach quorum counts this much extra
+
+
+class AccountCadence:
+    """Learned activity and polling interval of one account"""
+    __slots__ = ('mentions', 'quorum_hits', 'observed_since', 'last_mention_at', 'interval_seconds', 'dirty')
+
+    def __init__(self, observed_since: float, interval_seconds: float):
+        self.mentions = 0.0
+        self.quorum_hits = 0.0
+        self.observed_since = observed_since
+        self.last_mention_at = None
+        self.interval_seconds = interval_seconds
+        self.dirty = True
+
+    def rate_per_hour(self, now: float) -> float:
+        """Expected quorum-relevant mentions per hour"""
+        hours = max(1.0, (now - self.observed_since) / 3600)
+        return (self.mentions + QUORUM_WEIGHT * self.quorum_hits + PRIOR_MENTIONS) / hours
+
+    def decay(self, now: float):
+        """Slide the observation window so old activity fades out"""
+        hours = (now - self.observed_since) / 3600
+        if hours > HISTORY_WINDOW_HOURS:
+            keep = HISTORY_WINDOW_HOURS / hours
+            self.mentions *= keep
+            self.quorum_hits *= keep
+            self.observed_since = now - HISTORY_WINDOW_HOURS * 3600
+
+    def to_document(self) -> Dict:
+        return {
+            "mentions": round(self.mentions, 3),
+            "quorum_hits": round(self.quorum_hits, 3),
+            "observed_since": datetime.fromtimestamp(self.observed_since, timezone.utc),
+            "last_mention_at": datetime.fromtimestamp(self.last_mention_at, timezone.utc) if self.last_mention_at else None,
+            "interval_seconds": round(self.interval_seconds, 1),
+        }
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return value
+
+
+class AdaptiveCadence:
+    """Spends the fixed request budget on the accounts most likely to produce quorum mentions
+
+    For an account posting at rate r and polled every T seconds a mention waits T/2 on average,
+    so total detection delay sum(r * T) under the budget sum(1 / T) = B is minimized by
+    T proportional to 1 / sqrt(r). Intervals are clamped to [min_interval, max_interval].
+    """
+
+    def __init__(self, min_interval_seconds: float = 30, max_interval_seconds: float = 900):
+        self.min_interval_seconds = min_interval_seconds
+        self.max_interval_seconds = max_interval_seconds
+        self.accounts: Dict[str, AccountCadence] = {}
+        self.budget_requests_per_second = None
+
+    def _get(self, account: str, now: float = None) -> AccountCadence:
+        state = self.accounts.get(account)
+        if state is None:
+            state = self.accounts[account] = AccountCadence(
+                (now or time.time()) - 3600, self.min_interval_seconds
+            )
+        return state
+
+    async def load(self, db: AsyncIOMotorDatabase, accounts: Iterable[str]):
+        """Restore persisted cadence from x_accounts and seed new accounts from token_mentions"""
+        now = time.time()
+        accounts = list(accounts)
+        try:
+            async for account in db.x_accounts.find({"username": {"$in": accounts}, "cadence": {"$exists": True}},
+                                                    {"username": 1, "cadence": 1, "_id": 0}):
+                saved = account['cadence'] or {}
+                state = self._get(account['username'], now)
+                state.mentions = saved.get('mentions', 0.0)
+                state.quorum_hits = saved.get('quorum_hits', 0.0)
+                state.observed_since = _timestamp(saved.get('observed_since')) or state.observed_since
+                state.last_mention_at = _timestamp(saved.get('last_mention_at'))
+                state.interval_seconds = saved.get('interval_seconds', self.min_interval_seconds)
+                state.dirty = False
+
+            unseeded = [account for account in accounts if account not in self.accounts]
+            if unseeded:
+                # Accounts without mentions in the history window were observed to be quiet
+                for account in unseeded:
+                    self._get(account, now).observed_since = now - HISTORY_WINDOW_HOURS * 3600
+                since = datetime.now(timezone.utc) - timedelta(hours=HISTORY_WINDOW_HOURS)
+                pipeline = [
+                    {"$match": {"account_username": {"$in": unseeded}, "mentioned_at": {"$gte": since}}},
+                    {"$group": {
+                        "_id": "$account_username",
+                        "mentions": {"$sum": 1},
+                        "quorum_hits": {"$sum": {"$cond": ["$processed", 1, 0]}},
+                        "last_mention_at": {"$max": "$mentioned_at"},
+                    }},
+                ]
+                async for row in db.token_mentions.aggregate(pipeline):
+                    state = self._get(row['_id'], now)
+                    state.mentions = row['mentions']
+                    state.quorum_hits = row['quorum_hits']
+                    state.last_mention_at = _timestamp(row['last_mention_at'])
+            logger.info(f"Adaptive cadence loaded for {len(self.accounts)} accounts")
+        except Exception as e:
+            logger.error(f"Error loading account cadence: {e}")
+
+    async def save(self, db: AsyncIOMotorDatabase):
+        """Persist changed cadence state into x_accounts"""
+        dirty = [(account, state) for account, state in self.accounts.items() if state.dirty]
+        if not dirty:
+            return
+        try:
+            await db.x_accounts.bulk_write(
+                [UpdateOne({"username": account}, {"$set": {"cadence": state.to_document()}})
+                 for account, state in dirty],
+                ordered=False
+            )
+            for _, state in dirty:
+                state.dirty = False
+        except Exception as e:
+            logger.error(f"Error saving account cadence: {e}")
+
+    def record_mention(self, account: str, timestamp: float = None):
+        state = self._get(account)
+        state.mentions += 1
+        state.last_mention_at = timestamp or time.time()
+        state.dirty = True
+
+    def record_quorum(self, accounts: Iterable[str]):
+        for account in accounts:
+            state = self._get(account)
+            state.quorum_hits += 1
+            state.dirty = True
+
+    def rebalance(self, accounts: List[str], requests_per_second: float):
+        """Recompute every account's interval for the given request budget"""
+        now = time.time()
+        self.budget_requests_per_second = requests_per_second
+        weights = {}
+        for account in accounts:
+            state = self._get(account, now)
+            state.decay(now)
+            weights[account] = math.sqrt(state.rate_per_hour(now))
+        total_weight = sum(weights.values())
+        if not total_weight:
+            return
+        for account, weight in weights.items():
+            # This account's share of the budget, in requests per second
+            share = requests_per_second * weight / total_weight
+            interval = min(self.max_interval_seconds, max(self.min_interval_seconds, 1 / share))
+            state = self.accounts[account]
+            if abs(interval - state.interval_seconds) >= 1:
+                state.dirty = True
+            state.interval_seconds = interval
+
+    def due_accounts(self, accounts: List[str], last_checked_at: Dict[str, float],
+                     tolerance_seconds: float = 0.0) -> List[str]:
+        """Accounts whose interval has elapsed, most active first
+
+        Accounts are only considered at cycle boundaries, so an account coming due within
+        tolerance_seconds is polled now. Passing half the cycle length rounds every interval to
+        the nearest cycle instead of up to the next one, which would double min_interval accounts.
+        """
+        now = time.time()
+        due = []
+        for account in accounts:
+            state = self._get(account, now)
+            if now + tolerance_seconds - last_checked_at.get(account, 0) >= state.interval_seconds:
+                due.append((state.interval_seconds, account))
+        due.sort()
+        return [account for _, account in due]
+
+    def stats(self, accounts: List[str], last_checked_at: Dict[str, float]) -> Dict:
+        now = time.time()
+        rows = []
+        for account in accounts:
+            state = self._get(account, now)
+            checked = last_checked_at.get(account)
+            rows.append({
+                "account": account,
+                "interval_seconds": round(state.interval_seconds, 1),
+                "mentions_per_hour": round(state.rate_per_hour(now), 4),
+                "mentions": round(state.mentions, 2),
+                "quorum_hits": round(state.quorum_hits, 2),
+                "last_mention_at": datetime.fromtimestamp(state.last_mention_at, timezone.utc).isoformat() if state.last_mention_at else None,
+                "next_check_in_seconds": round(max(0.0, checked + state.interval_seconds - now), 1) if checked else 0.0,
+            })
+        rows.sort(key=lambda row: row['interval_seconds'])
+        return {
+            "budget_requests_per_second": self.budget_requests_per_second,
+            "min_interval_seconds": self.min_interval_seconds,
+            "max_interval_seconds": self.max_interval_seconds,
+            "accounts": rows,
+        }
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Challenge:
+    """A question the scraper needs a human to answer (e.g. the code X emailed at login)"""
+
+    def __init__(self, kind: str, prompt: str, timeout_seconds: float):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.prompt = prompt
+        self.created_at = datetime.now(timezone.utc)
+        self.expires_at = self.created_at + timedelta(seconds=timeout_seconds)
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "prompt": self.prompt,
+            "created_at": self.created_at.isoformat(),
+            "expires_at": self.expires_at.isoformat(),
+        }
+
+
+class ChallengeBroker:
+    """Lets a flow await an answer submitted later over REST or WebSocket
+
+    `request()` suspends only the awaiting task until `submit()` is called or the timeout runs
+    out; the event loop keeps serving everything else meanwhile. `on_event` is called with a
+    `verification_required` / `verification_resolved` event, e.g. to broadcast it to dashboards.
+    """
+
+    def __init__(self, on_event: Optional[Callable[[Dict], None]] = None):
+        self.on_event = on_event
+        self.pending: Dict[str, Challenge] = {}
+        self.answered = 0
+        self.expired = 0
+
+    def _notify(self, event_type: str, data: Dict):
+        if self.on_event is None:
+            return
+        try:
+            self.on_event({"type": event_type, "data": data})
+        except Exception as e:
+            logger.error(f"Error announcing challenge event {event_type}: {e}")
+
+    async def request(self, kind: str, prompt: str, timeout_seconds: float = 600) -> Optional[str]:
+        """Wait for an answer; None if nobody answered in time"""
+        challenge = Challenge(kind, prompt, timeout_seconds)
+        self.pending[challenge.id] = challenge
+        logger.info(f"⏳ Waiting up to {timeout_seconds:.0f}s for {kind} (challenge {challenge.id})")
+        self._notify("verification_required", challenge.to_dict())
+        outcome = "answered"
+        try:
+            return await asyncio.wait_for(challenge.future, timeout_seconds)
+        except asyncio.TimeoutError:
+            outcome = "expired"
+            self.expired += 1
+            logger.error(f"❌ No answer to {kind} within {timeout_seconds:.0f}s")
+            return None
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            self.pending.pop(challenge.id, None)
+            self._notify("verification_resolved", {"id": challenge.id, "kind": kind, "outcome": outcome})
+
+    def submit(self, answer: str, challenge_id: Optional[str] = None) -> bool:
+        """Answer a pending challenge (the oldest unanswered one when no id is given)"""
+        answer = str(answer or '').strip()
+        if not answer:
+            return False
+        if challenge_id is None:
+            # Skip challenges already answered whose waiter has not resumed yet
+            challenge = next((challenge for challenge in self.pending.values() if not challenge.future.done()), None)
+        else:
+            challenge = self.pending.get(challenge_id)
+        if challenge is None or challenge.future.done():
+            return False
+        challenge.future.set_result(answer)
+        self.answered += 1
+        logger.info(f"📥 Received answer for {challenge.kind} (challenge {challenge.id})")
+        return True
+
+    def list_pending(self) -> List[Dict]:
+        return [challenge.to_dict() for challenge in self.pending.values()]
+
+    def stats(self) -> Dict:
+        return {"pending": len(self.pending), "answered": self.answered, "expired": self.expired}
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+
+def _screen_name(user: Dict) -> Tuple[Optional[str], str]:
+    """(screen_name, display name) of a GraphQL User result; the fields moved from legacy to core in 2025"""
+    legacy = user.get('legacy') or {}
+    core = user.get('core') or {}
+    screen_name = core.get('screen_name') or legacy.get('screen_name')
+    return screen_name, core.get('name') or legacy.get('name') or screen_name or ''
+
+
+def parse_following_response(payload: Dict) -> Tuple[Dict[str, str], Optional[str]]:
+    """Users ({screen_name: display name}) and the bottom cursor of one Following timeline response
+
+    Walks the payload instead of hard-coding the instruction path, which X reshuffles regularly.
+    Raises ValueError for error payloads (rate limits, suspended sessions), which carry `errors`
+    and no `data` and must not be mistaken for the end of the list.
+    """
+    if not isinstance(payload, dict) or payload.get('errors') or not payload.get('data'):
+        raise ValueError(f"not a Following page: {str(payload)[:200]}")
+    users: Dict[str, str] = {}
+    bottom_cursor = None
+    stack: List = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if not isinstance(node, dict):
+            continue
+        if node.get('__typename') == 'User':
+            screen_name, name = _screen_name(node)
+            if screen_name:
+                users[screen_name] = name
+            continue  # nested objects of a user (pinned tweets, ...) never hold followed accounts
+        if node.get('cursorType') == 'Bottom':
+            bottom_cursor = node.get('value')
+        stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+    return users, bottom_cursor
+
+
+def is_following_response(response) -> bool:
+    """A successful Following timeline response; 429s and other failures are not pages"""
+    return (response.ok and '/graphql/' in response.url
+            and response.url.split('?')[0].endswith('/Following'))
+
+
+class FollowingCollector:
+    """Collects followed accounts from the Following timeline responses a page loads
+
+    Each response is parsed once as it arrives, so scrolling costs O(new accounts) instead of
+    re-reading the whole DOM. The list is `complete` once a successful page has no users and
+    repeats a bottom cursor already seen (X's last page); failed or error responses are skipped
+    and never end the list.
+    """
+
+    def __init__(self, known: Iterable[str] = ()):
+        self.known: Set[str] = {username.lower() for username in known}
+        self.accounts: Dict[str, str] = {}
+        self.responses = 0
+        self.complete = False
+        self.cursors: Set[str] = set()
+        self.last_batch_new = 0
+        self.last_batch_unknown = 0
+        self.tasks: Set[asyncio.Task] = set()
+
+    def on_response(self, response):
+        if is_following_response(response):
+            task = asyncio.create_task(self._parse(response))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _parse(self, response):
+        try:
+            users, bottom_cursor = parse_following_response(await response.json())
+        except Exception as e:
+            logger.debug(f"Could not parse Following response: {e}")
+            return
+        self.responses += 1
+        new = {username: name for username, name in users.items() if username not in self.accounts}
+        self.accounts.update(new)
+        self.last_batch_new = len(new)
+        self.last_batch_unknown = sum(1 for username in new if username.lower() not in self.known)
+        if not users and bottom_cursor is not None and bottom_cursor in self.cursors:
+            self.complete = True
+        if bottom_cursor is not None:
+            self.cursors.add(bottom_cursor)
+
+    async def drain(self):
+        """Wait for responses that are still being parsed"""
+        if self.tasks:
+            await asyncio.gather(*list(self.tasks), return_exceptions=True)
+
+
+class FollowingSync:
+    """Applies a scraped following list to x_accounts as a diff
+
+    New follows are inserted (or reactivated), unfollowed accounts are deactivated, and nothing
+    else is written. Deactivation only happens for a complete list, so a scrape that stopped
+    early can never drop accounts.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.db = db
+        self.last_result: Dict = {}
+
+    async def known_accounts(self) -> Dict[str, Dict]:
+        """x_accounts by lowercased username"""
+        accounts = {}
+        async for account in self.db.x_accounts.find({}, {"username": 1, "is_active": 1, "source": 1, "_id": 0}):
+            accounts[account['username'].lower()] = account
+        return accounts
+
+    async def apply(self, following: Dict[str, str], source: str, complete: bool) -> Dict:
+        known = await self.known_accounts()
+        following_lower = {username.lower(): (username, name) for username, name in following.items()}
+        now = datetime.now(timezone.utc)
+
+        operations = []
+        added, reactivated, removed = [], [], set()
+        for key, (username, name) in following_lower.items():
+            account = known.get(key)
+            if account is None:
+                added.append(username)
+                operations.append(UpdateOne(
+                    {"username": username},
+                    {"$setOnInsert": {
+                        "id": str(uuid.uuid4()),
+                        "username": username,
+                        "display_name": name or username,
+                        "is_active": True,
+                        "created_at": now,
+                        "name_alerts_contributed": 0,
+                        "accepted_cas_posted": 0,
+                        "max_gain_24h": 0.0,
+                        "source": source,
+                    }},
+                    upsert=True
+                ))
+            elif not account.get('is_active', True):
+                reactivated.append(account['username'])
+                operations.append(UpdateOne({"username": account['username']},
+                                            {"$set": {"is_active": True, "source": source}}))
+            elif not account.get('source'):
+                # Imported before syncs existed; from now on an unfollow removes it
+                operations.append(UpdateOne({"username": account['username']}, {"$set": {"source": source}}))
+                account['source'] = source
+
+        if complete:
+            for key, account in known.items():
+                # Only accounts that came from this following list; manual additions stay until removed by hand
+                if (key not in following_lower and account.get('is_active', True)
+                        and account.get('source') == source):
+                    removed.add(account['username'])
+                    operations.append(UpdateOne({"username": account['username']},
+                                                {"$set": {"is_active": False, "unfollowed_at": now}}))
+
+        if operations:
+            await self.db.x_accounts.bulk_write(operations, ordered=False)
+
+        active = sorted(
+            {account['username'] for key, account in known.items()
+             if account.get('is_active', True) and account['username'] not in removed}
+            | set(added) | set(reactivated),
+            key=str.lower
+        )
+        self.last_result = {
+            "source": source,
+            "scraped": len(following),
+            "complete": complete,
+            "added": len(added),
+            "reactivated": len(reactivated),
+            "removed": len(removed),
+            "active": len(active),
+            "synced_at": now.isoformat(),
+        }
+        logger.info(f"Following sync for {source}: +{len(added)} new, {len(reactivated)} reactivated, "
+                    f"-{len(removed)} unfollowed, {len(active)} active")
+        return {**self.last_result, "accounts": active}
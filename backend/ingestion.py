@@ -0,0 +1,212 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+def unwritten_indexes(error: BulkWriteError) -> Set[int]:
+    """Positions of the documents an unordered insert_many did not store
+
+    Duplicate-key failures are not counted: the document is already there (from an earlier attempt).
+    """
+    return {write_error['index'] for write_error in error.details.get('writeErrors', [])
+            if write_error.get('code') != DUPLICATE_KEY}
+
+
+class LatencyTracker:
+    """Rolling latency samples (seconds) with percentile summaries"""
+
+    def __init__(self, window: int = 1000):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self) -> Dict:
+        if not self.samples:
+            return {"count": self.count, "p50_ms": None, "p95_ms": None, "max_ms": None}
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        }
+
+
+class IngestionPipeline:
+    """Reader -> matcher -> batched writer stages for a high-rate message stream
+
+    The socket reader only parses and enqueues, so it never waits on Mongo or on clients.
+    The matcher turns messages into records (and broadcasts them), and the writer persists
+    records in micro-batches flushed on size or time. Records have already been broadcast when
+    they reach the writer, so the write stage is never lossy: a full write queue blocks the
+    matcher, and failed flushes are retried (so `write_batch` must be idempotent).
+    """
+
+    def __init__(self, match: Callable[[dict, float], Awaitable[Optional[dict]]],
+                 write_batch: Callable[[List[dict]], Awaitable],
+                 batch_size: int = 100, flush_interval_seconds: float = 0.25, max_queue_size: int = 10000,
+                 match_histogram=None, max_write_attempts: int = 5, retry_delay_seconds: float = 0.5):
+        self.match = match
+        self.match_histogram = match_histogram  # optional metrics.Histogram of frame -> broadcast
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_write_attempts = max_write_attempts
+        self.retry_delay_seconds = retry_delay_seconds  # doubled after every failed attempt
+        self.match_queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.write_queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.tasks: List[asyncio.Task] = []
+
+        self.received = 0
+        self.parse_errors = 0
+        self.dropped = 0
+        self.matched = 0
+        self.written = 0
+        self.write_errors = 0  # records given up on after every retry failed
+        self.write_retries = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.match_latency = LatencyTracker()  # frame received -> record matched and broadcast
+        self.persist_latency = LatencyTracker()  # frame received -> record stored
+
+    @property
+    def is_running(self) -> bool:
+        return any(not task.done() for task in self.tasks)
+
+    def start(self):
+        if self.is_running:
+            return
+        self.tasks = [asyncio.create_task(self._match_loop()), asyncio.create_task(self._write_loop())]
+
+    def _enqueue(self, queue: asyncio.Queue, item):
+        """Non-blocking put for raw frames; under sustained overload the oldest queued frame is dropped"""
+        if queue.full():
+            queue.get_nowait()
+            queue.task_done()
+            self.dropped += 1
+        queue.put_nowait(item)
+
+    def submit(self, raw_message) -> bool:
+        """Parse a raw frame and queue it for matching (reader stage)"""
+        received_at = time.monotonic()
+        self.received += 1
+        try:
+            message = json.loads(raw_message)
+        except (json.JSONDecodeError, TypeError) as e:
+            self.parse_errors += 1
+            logger.error(f"Failed to parse message: {e}")
+            return False
+        self._enqueue(self.match_queue, (received_at, message))
+        return True
+
+    async def _match_loop(self):
+        while True:
+            received_at, message = await self.match_queue.get()
+            try:
+                record = await self.match(message, received_at)
+                if record is not None:
+                    self.matched += 1
+                    match_seconds = time.monotonic() - received_at
+                    self.match_latency.record(match_seconds)
+                    if self.match_histogram is not None:
+                        self.match_histogram.observe(match_seconds)
+                    # Backpressure instead of dropping: the record is already on dashboards
+                    await self.write_queue.put((received_at, record))
+            except Exception as e:
+                logger.error(f"Error matching message: {e}")
+            finally:
+                self.match_queue.task_done()
+
+    async def _write_loop(self):
+        while True:
+            batch = [await self.write_queue.get()]
+            deadline = time.monotonic() + self.flush_interval_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.write_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: List):
+        pending = batch
+        delay = self.retry_delay_seconds
+        try:
+            for attempt in range(1, self.max_write_attempts + 1):
+                try:
+                    await self.write_batch([record for _, record in pending])
+                    stored, pending = pending, []
+                except BulkWriteError as e:
+                    failed = unwritten_indexes(e)
+                    stored = [item for index, item in enumerate(pending) if index not in failed]
+                    pending = [item for index, item in enumerate(pending) if index in failed]
+                    if pending:
+                        logger.warning(f"Batch write stored {len(stored)}, {len(pending)} failed (attempt {attempt}): {e}")
+                except Exception as e:
+                    stored = []
+                    logger.warning(f"Error writing batch of {len(pending)} (attempt {attempt}): {e}")
+                self._record_stored(stored)
+                if not pending:
+                    return
+                if attempt < self.max_write_attempts:
+                    self.write_retries += 1
+                    await asyncio.sleep(delay)
+                    delay *= 2
+            self.write_errors += len(pending)
+            logger.error(f"Giving up on {len(pending)} records after {self.max_write_attempts} attempts")
+        finally:
+            self.batches += 1
+            self.last_batch_size = len(batch)
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+            for _ in batch:
+                self.write_queue.task_done()
+
+    def _record_stored(self, stored: List):
+        now = time.monotonic()
+        for received_at, _ in stored:
+            self.persist_latency.record(now - received_at)
+        self.written += len(stored)
+
+    async def stop(self):
+        """Finish matching queued frames, flush pending writes and stop the stages"""
+        if self.is_running:
+            await self.match_queue.join()
+            await self.write_queue.join()
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+
+    def stats(self) -> Dict:
+        return {
+            "running": self.is_running,
+            "received": self.received,
+            "parse_errors": self.parse_errors,
+            "dropped": self.dropped,
+            "matched": self.matched,
+            "written": self.written,
+            "write_errors": self.write_errors,
+            "write_retries": self.write_retries,
+            "match_queue_depth": self.match_queue.qsize(),
+            "write_queue_depth": self.write_queue.qsize(),
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "frame_to_broadcast": self.match_latency.summary(),
+            "frame_to_persisted": self.persist_latency.summary(),
+        }
@@ -0,0 +1,49 @@
+import logging
+import random
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from account_cursors import TWITTER_EPOCH_MS, newer_than
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatedTimelineSource:
+    """Stand-in timeline until a real X source is plugged in
+
+    A mention source is anything with `name` and `async fetch(account_username, since_id)`
+    returning newest-first tweets (`status_id`, `url`, `text`, `created_at`) above `since_id`.
+    A real fetcher passes `since_id` to the API, or stops parsing a scraped timeline at it via
+    newer_than().
+    """
+
+    name = 'simulated'
+    possible_tokens = ['BONK', 'PEPE', 'WIF', 'BRETT', 'POPCAT', 'MEW', 'TURBO', 'DEGEN']
+
+    def __init__(self, tweet_probability: float = 0.05):
+        self.tweet_probability = tweet_probability
+
+    async def fetch(self, account_username: str, since_id: Optional[int] = None) -> List[Dict]:
+        if random.random() >= self.tweet_probability:
+            return []
+        created_at = datetime.now(timezone.utc)
+        status_id = ((int(created_at.timestamp() * 1000) - TWITTER_EPOCH_MS) << 22) | random.getrandbits(22)
+        tweets = [{
+            'status_id': status_id,
+            'url': f"https://x.com/{account_username}/status/{status_id}",
+            'text': f"${random.choice(self.possible_tokens)} is sending",
+            'created_at': created_at,
+        }]
+        return newer_than(tweets, since_id)
+
+
+async def fetch_from_sources(sources: Iterable, account_username: str, since_id: Optional[int] = None) -> List[Dict]:
+    """Newest-first union of every source's tweets for one account, one entry per status ID"""
+    merged: Dict[int, Dict] = {}
+    for source in sources:
+        try:
+            for tweet in await source.fetch(account_username, since_id):
+                merged.setdefault(tweet['status_id'], tweet)
+        except Exception as e:
+            logger.error(f"Error fetching @{account_username} from {source.name}: {e}")
+    return [merged[key] for key in sorted(merged, reverse=True)]
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from ca_index import normalize_token_name
+
+logger = logging.getLogger(__name__)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Mongo hands back naive UTC datetimes; make them comparable with aware ones"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class MentionWriter:
+    """Buffers token mentions and writes them in bulk, deduplicated by tweet URL and token
+
+    Mentions are flushed with a single bulk_write of upserts when the buffer reaches
+    `batch_size` or `flush_interval_seconds` after the first buffered mention. Quorum is
+    tracked in memory, so nothing ever waits for a flush. A failed flush keeps its mentions and
+    retries on its own after `retry_delay_seconds`, doubled per consecutive failure; while
+    Mongo is unreachable at most `max_buffered` mentions are kept, the oldest dropped first.
+    """
+
+    def __init__(self, collection: AsyncIOMotorCollection, batch_size: int = 100,
+                 flush_interval_seconds: float = 1.0, remembered_urls: int = 10000,
+                 max_buffered: int = 10000, retry_delay_seconds: float = 0.5, max_retry_delay_seconds: float = 30.0):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.remembered_urls = remembered_urls
+        self.max_buffered = max_buffered
+        self.retry_delay_seconds = retry_delay_seconds
+        self.max_retry_delay_seconds = max_retry_delay_seconds
+        self.buffer: Dict[str, Dict] = {}  # tweet_url + token -> mention
+        self.recent_urls: OrderedDict = OrderedDict()  # flushed keys, LRU
+        self.flush_lock = asyncio.Lock()
+        self.flush_task: Optional[asyncio.Task] = None
+        self.added = 0
+        self.duplicates = 0
+        self.flushes = 0
+        self.written = 0
+        self.failed_flushes = 0  # consecutive; while non-zero only the retry timer flushes
+        self.dropped = 0
+
+    async def ensure_schema(self):
+        """Backfill the normalized name on mentions stored before it existed (indexes live in schema.py)"""
+        backfill = [{"$set": {"token_name_norm": {"$toUpper": {"$trim": {"input": {"$ifNull": ["$token_name", ""]}}}}}}]
+        await self.collection.update_many({"token_name_norm": {"$exists": False}}, backfill)
+
+    @staticmethod
+    def key(tweet_url: Optional[str], token_name_norm: str) -> Optional[str]:
+        """One mention per token per tweet (a tweet can name several tokens)"""
+        return f"{tweet_url}#{token_name_norm}" if tweet_url else None
+
+    def remember(self, mentions: Iterable[Dict]):
+        """Treat already stored mentions as recorded (e.g. the ones reloaded after a restart)"""
+        for mention in mentions:
+            key = self.key(mention.get('tweet_url'), mention.get('token_name_norm', ''))
+            if key:
+                self.recent_urls[key] = True
+        while len(self.recent_urls) > self.remembered_urls:
+            self.recent_urls.popitem(last=False)
+
+    async def add(self, mention: Dict) -> bool:
+        """Buffer a mention; returns False if this token of its tweet was already recorded"""
+        mention['token_name_norm'] = normalize_token_name(mention.get('token_name', ''))
+        key = self.key(mention.get('tweet_url'), mention['token_name_norm'])
+        if key and (key in self.buffer or key in self.recent_urls):
+            self.duplicates += 1
+            return False
+        self.buffer[key or mention.get('id')] = mention
+        self.added += 1
+        self._trim()
+
+        if len(self.buffer) >= self.batch_size and not self.failed_flushes:
+            await self.flush()
+        elif self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self._flush_later(self.flush_interval_seconds))
+        return True
+
+    async def _flush_later(self, delay_seconds: float):
+        await asyncio.sleep(delay_seconds)
+        await self.flush()
+
+    def _trim(self):
+        """Drop the oldest buffered mentions beyond `max_buffered`"""
+        excess = len(self.buffer) - self.max_buffered
+        if excess > 0:
+            for key in list(self.buffer)[:excess]:
+                del self.buffer[key]
+            self.dropped += excess
+            logger.error(f"Mention buffer full - dropped the {excess} oldest unwritten mentions")
+
+    def _schedule_retry(self):
+        delay = min(self.retry_delay_seconds * 2 ** (self.failed_flushes - 1), self.max_retry_delay_seconds)
+        pending = self.flush_task
+        if pending is not None and not pending.done() and pending is not asyncio.current_task():
+            pending.cancel()  # an interval flush timer; the retry takes its place
+        self.flush_task = asyncio.create_task(self._flush_later(delay))
+
+    async def flush(self):
+        async with self.flush_lock:
+            if not self.buffer:
+                return
+            batch, self.buffer = self.buffer, {}
+            operations = [
+                UpdateOne({"tweet_url": mention['tweet_url'], "token_name_norm": mention['token_name_norm']},
+                          {"$setOnInsert": dict(mention)}, upsert=True)
+                if mention.get('tweet_url') else
+                UpdateOne({"id": mention['id']}, {"$setOnInsert": dict(mention)}, upsert=True)
+                for mention in batch.values()
+            ]
+            try:
+                await self.collection.bulk_write(operations, ordered=False)
+                self.flushes += 1
+                self.failed_flushes = 0
+                self.written += len(operations)
+                for key in batch:
+                    self.recent_urls[key] = True
+                while len(self.recent_urls) > self.remembered_urls:
+                    self.recent_urls.popitem(last=False)
+            except Exception as e:
+                logger.error(f"Error writing {len(operations)} token mentions: {e}")
+                # Keep them for the retry rather than losing them
+                self.buffer = {**batch, **self.buffer}
+                self.failed_flushes += 1
+                self._trim()
+                self._schedule_retry()
+
+    async def mark_processed(self, mention_ids: Iterable[str]):
+        """Mark exactly these mentions as processed, whether buffered or already stored
+
+        Holds the flush lock so a batch in flight has either landed (and is updated below) or
+        been put back into the buffer (and is flagged there) before the update runs.
+        """
+        mention_ids = set(mention_ids)
+        async with self.flush_lock:
+            for mention in self.buffer.values():
+                if mention.get('id') in mention_ids:
+                    mention['processed'] = True
+            if mention_ids:
+                await self.collection.update_many({"id": {"$in": list(mention_ids)}}, {"$set": {"processed": True}})
+
+    def stats(self) -> Dict:
+        return {
+            "buffered": len(self.buffer),
+            "added": self.added,
+            "duplicates": self.duplicates,
+            "flushes": self.flushes,
+            "written": self.written,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+        }
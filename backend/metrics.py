@@ -0,0 +1,164 @@
+import logging
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and three increments"""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, labels: Dict[str, str]) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += bucket_count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {self.sum}")
+        lines.append(f"{name}_count{_format_labels(labels)} {self.count}")
+        return lines
+
+
+class LabeledHistogram:
+    """A histogram per value of one label (e.g. per Mongo collection)"""
+
+    def __init__(self, label: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.label = label
+        self.buckets = buckets
+        self.children: Dict[str, Histogram] = {}
+
+    def labels(self, value: str) -> Histogram:
+        child = self.children.get(value)
+        if child is None:
+            child = self.children[value] = Histogram(self.buckets)
+        return child
+
+    def samples(self, name: str, labels: Dict[str, str]) -> List[str]:
+        lines = []
+        for value, child in sorted(self.children.items()):
+            lines.extend(child.samples(name, {**labels, self.label: value}))
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics rendered in the Prometheus text exposition format
+
+    Histograms are updated inline on the hot paths; gauges and counters are callbacks read only
+    when the metrics are scraped, so they cost nothing in between.
+    """
+
+    def __init__(self, prefix: str = ''):
+        self.prefix = prefix
+        self.histograms: Dict[str, Tuple[str, object]] = {}
+        self.gauges: Dict[str, Tuple[str, List[Tuple[Dict[str, str], Callable[[], float]]]]] = {}
+        self.counters: Dict[str, Tuple[str, List[Tuple[Dict[str, str], Callable[[], float]]]]] = {}
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+                  label: Optional[str] = None):
+        metric = LabeledHistogram(label, buckets) if label else Histogram(buckets)
+        self.histograms[self.prefix + name] = (help_text, metric)
+        return metric
+
+    def gauge(self, name: str, help_text: str, read: Callable[[], float], labels: Optional[Dict[str, str]] = None):
+        _, samples = self.gauges.setdefault(self.prefix + name, (help_text, []))
+        samples.append((labels or {}, read))
+
+    def counter(self, name: str, help_text: str, read: Callable[[], float], labels: Optional[Dict[str, str]] = None):
+        """Like gauge(), for values that only go up (the component keeps the count)"""
+        _, samples = self.counters.setdefault(self.prefix + name, (help_text, []))
+        samples.append((labels or {}, read))
+
+    def render(self) -> str:
+        lines = []
+        for name, (help_text, metric) in self.histograms.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            lines.extend(metric.samples(name, {}))
+        callbacks = [(name, 'gauge', metric) for name, metric in self.gauges.items()] + \
+                    [(name, 'counter', metric) for name, metric in self.counters.items()]
+        for name, metric_type, (help_text, samples) in callbacks:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, read in samples:
+                try:
+                    value = read()
+                except Exception as e:
+                    logger.error(f"Error reading {metric_type} {name}: {e}")
+                    continue
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every Mongo command by collection, without touching the call sites
+
+    pymongo calls these from its own threads; counters may be off by a sample under contention,
+    which is fine for latency distributions.
+    """
+
+    def __init__(self, histogram: LabeledHistogram):
+        self.histogram = histogram
+        self.pending: Dict[Tuple, str] = {}
+
+    @staticmethod
+    def _collection(event: monitoring.CommandStartedEvent) -> str:
+        if event.command_name == 'getMore':
+            return str(event.command.get('collection', 'unknown'))
+        target = event.command.get(event.command_name)
+        return target if isinstance(target, str) else '-'
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        self.pending[(event.request_id, event.connection_id)] = self._collection(event)
+
+    def _finished(self, event):
+        collection = self.pending.pop((event.request_id, event.connection_id), None)
+        if collection is not None:
+            self.histogram.labels(collection).observe(event.duration_micros / 1e6)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finished(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finished(event)
+
+
+# Shared registry and the pipeline metrics recorded on the hot paths
+metrics = MetricsRegistry(prefix='tweet_tracker_')
+monitoring_cycle_seconds = metrics.histogram(
+    'monitoring_cycle_seconds', 'Duration of one polling cycle over the due accounts', SLOW_BUCKETS)
+account_check_seconds = metrics.histogram(
+    'account_check_seconds', 'Latency of checking one X account for token mentions')
+mention_to_name_alert_seconds = metrics.histogram(
+    'mention_to_name_alert_seconds', 'Time from the first mention of a token to its name alert', SLOW_BUCKETS)
+pump_frame_to_broadcast_seconds = metrics.histogram(
+    'pump_frame_to_broadcast_seconds', 'Time from a pump.fun frame arriving to its CA alert being broadcast')
+mongo_operation_seconds = metrics.histogram(
+    'mongo_operation_seconds', 'Mongo command latency by collection', label='collection')
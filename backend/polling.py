@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter shared by everything that spends the X request budget"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.total_wait_seconds = 0.0
+
+    def set_rate(self, rate: float, capacity: float = None):
+        self._refill()
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        """Wait until one request may be made"""
+        started = time.monotonic()
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.total_wait_seconds += time.monotonic() - started
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PollingScheduler:
+    """Runs account checks with bounded concurrency under a shared rate limit
+
+    Records how long each cycle took and when every account was last checked, so concurrency
+    and rate can be sized from the observed staleness instead of guessed.
+    """
+
+    def __init__(self, check_account: Callable[[str], Awaitable], rate_limiter: TokenBucket,
+                 max_concurrency: int = 8, check_histogram=None):
+        self.check_account = check_account
+        self.check_histogram = check_histogram  # optional metrics.Histogram of check latency
+        self.rate_limiter = rate_limiter
+        self.max_concurrency = max_concurrency
+        self.last_checked_at: Dict[str, float] = {}  # wall clock when the last check started
+        self.last_check_seconds: Dict[str, float] = {}
+        self.cycle_count = 0
+        self.last_cycle_seconds: Optional[float] = None
+        self.last_cycle_accounts = 0
+        self.started_at = time.time()
+
+    def set_concurrency(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+
+    async def run_cycle(self, accounts: Iterable[str], should_continue: Callable[[], bool] = None) -> float:
+        """Check every account once; returns the cycle duration in seconds"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for account in accounts:
+            queue.put_nowait(account)
+        account_count = queue.qsize()
+
+        async def worker():
+            while not queue.empty():
+                if should_continue and not should_continue():
+                    return
+                account = queue.get_nowait()
+                await self.rate_limiter.acquire()
+                # Stamp the start, not the end, so intervals are measured start to start like cycles
+                self.last_checked_at[account] = time.time()
+                check_started = time.monotonic()
+                try:
+                    await self.check_account(account)
+                except Exception as e:
+                    logger.error(f"Error checking account {account}: {e}")
+                check_seconds = self.last_check_seconds[account] = time.monotonic() - check_started
+                if self.check_histogram is not None:
+                    self.check_histogram.observe(check_seconds)
+
+        cycle_started = time.monotonic()
+        workers = min(self.max_concurrency, account_count)
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+        self.last_cycle_seconds = time.monotonic() - cycle_started
+        self.last_cycle_accounts = account_count
+        self.cycle_count += 1
+        return self.last_cycle_seconds
+
+    def staleness(self, accounts: Iterable[str]) -> Dict[str, Optional[float]]:
+        """Seconds since each account was last checked (None if never)"""
+        now = time.time()
+        return {
+            account: (now - self.last_checked_at[account]) if account in self.last_checked_at else None
+            for account in accounts
+        }
+
+    def stats(self, accounts: List[str]) -> Dict:
+        staleness = self.staleness(accounts)
+        checked = sorted(value for value in staleness.values() if value is not None)
+        stalest = sorted(
+            ((account, value) for account, value in staleness.items() if value is not None),
+            key=lambda item: item[1], reverse=True
+        )[:10]
+        check_times = [self.last_check_seconds[account] for account in accounts if account in self.last_check_seconds]
+        return {
+            "cycle_count": self.cycle_count,
+            "last_cycle_seconds": round(self.last_cycle_seconds, 3) if self.last_cycle_seconds is not None else None,
+            "last_cycle_accounts": self.last_cycle_accounts,
+            "max_concurrency": self.max_concurrency,
+            "requests_per_second": self.rate_limiter.rate,
+            "rate_limit_wait_seconds": round(self.rate_limiter.total_wait_seconds, 3),
+            "never_checked": len(staleness) - len(checked),
+            "staleness_seconds": {
+                "p50": round(checked[len(checked) // 2], 3) if checked else None,
+                "max": round(checked[-1], 3) if checked else None,
+            },
+            "avg_check_seconds": round(sum(check_times) / len(check_times), 4) if check_times else None,
+            "stalest_accounts": [{"account": account, "seconds": round(value, 3)} for account, value in stalest],
+        }
@@ -0,0 +1,127 @@
+import heapq
+import itertools
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class _TokenWindow:
+    """Live mentions of one token inside the window"""
+    __slots__ = ('mentions', 'account_counts')
+
+    def __init__(self):
+        self.mentions: Dict[int, Dict] = {}  # insertion order == arrival order
+        self.account_counts: Dict[str, int] = {}
+
+
+class QuorumWindow:
+    """Sliding-window count of distinct accounts mentioning each token
+
+    Every mention gets an entry in one global expiry heap, so expired mentions are evicted as
+    time moves on instead of being filtered out of per-token lists on every cycle. Distinct
+    account counts are maintained incrementally, which makes "has this token reached quorum?"
+    an O(1) check right at insert time.
+    """
+
+    def __init__(self, window_seconds: float = 3600, threshold: int = 2):
+        self.window_seconds = window_seconds
+        self.threshold = threshold
+        self.tokens: Dict[str, _TokenWindow] = {}
+        self.expiry_heap: List[Tuple[float, int, str]] = []
+        self.ready: Set[str] = set()  # tokens at quorum that no insert has reported yet
+        self._sequence = itertools.count()
+        self.total_mentions = 0
+        self.evicted_mentions = 0
+
+    def add(self, token_name: str, account: str, timestamp: datetime, tweet_url: str = None,
+            mention_id: str = None, now: float = None) -> bool:
+        """Record a mention and return True if the token is now at quorum
+
+        The window slides on the wall clock (`now`), not on mention timestamps: a mention
+        already older than the window is ignored, and one stamped in the future counts as
+        seen now, so it neither expires live mentions early nor outlives the window.
+        """
+        now = time.time() if now is None else now
+        self.expire(now)
+        observed_at = timestamp.timestamp()
+        if observed_at <= now - self.window_seconds:
+            return False
+        if observed_at > now:
+            observed_at = now
+            timestamp = datetime.fromtimestamp(now, timezone.utc)
+
+        window = self.tokens.get(token_name)
+        if window is None:
+            window = self.tokens[token_name] = _TokenWindow()
+        sequence = next(self._sequence)
+        window.mentions[sequence] = {'account': account, 'timestamp': timestamp, 'tweet_url': tweet_url, 'id': mention_id}
+        window.account_counts[account] = window.account_counts.get(account, 0) + 1
+        heapq.heappush(self.expiry_heap, (observed_at + self.window_seconds, sequence, token_name))
+        self.total_mentions += 1
+
+        return len(window.account_counts) >= self.threshold
+
+    def expire(self, now: float):
+        """Evict every mention older than the window"""
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= now:
+            _, sequence, token_name = heapq.heappop(heap)
+            window = self.tokens.get(token_name)
+            mention = window.mentions.pop(sequence, None) if window else None
+            if mention is None:
+                continue  # already consumed by an alert
+            self.evicted_mentions += 1
+            account = mention['account']
+            remaining = window.account_counts[account] - 1
+            if remaining:
+                window.account_counts[account] = remaining
+            else:
+                del window.account_counts[account]
+            if not window.mentions:
+                del self.tokens[token_name]
+                self.ready.discard(token_name)
+            elif len(window.account_counts) < self.threshold:
+                self.ready.discard(token_name)
+
+    def pop(self, token_name: str) -> List[Dict]:
+        """Remove and return the live mentions of a token (after it alerted)"""
+        self.ready.discard(token_name)
+        window = self.tokens.pop(token_name, None)
+        return list(window.mentions.values()) if window else []
+
+    def distinct_accounts(self, token_name: str) -> int:
+        window = self.tokens.get(token_name)
+        return len(window.account_counts) if window else 0
+
+    def set_threshold(self, threshold: int):
+        """Change the quorum; tokens already past a lowered threshold are queued in `ready`"""
+        lowered = threshold < self.threshold
+        self.threshold = threshold
+        if lowered:
+            # One-off scan, only when the threshold drops
+            self.ready.update(token_name for token_name, window in self.tokens.items()
+                              if len(window.account_counts) >= threshold)
+
+    def drain_ready(self) -> List[str]:
+        ready = list(self.ready)
+        self.ready.clear()
+        return ready
+
+    def stats(self, now: Optional[float] = None) -> Dict:
+        if now is not None:
+            self.expire(now)
+        return {
+            "tokens": len(self.tokens),
+            "live_mentions": sum(len(window.mentions) for window in self.tokens.values()),
+            "heap_entries": len(self.expiry_heap),
+            "total_mentions": self.total_mentions,
+            "evicted_mentions": self.evicted_mentions,
+            "window_seconds": self.window_seconds,
+            "threshold": self.threshold,
+        }
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __contains__(self, token_name: str) -> bool:
+        return token_name in self.tokens
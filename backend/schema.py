@@ -0,0 +1,165 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+INDEX_OPTIONS_CONFLICT = 85
+# Largest TTL Mongo accepts (~68 years); stands for "keep forever" on the mentioned_at index
+NEVER_EXPIRE_SECONDS = 2**31 - 1
+
+
+def mention_ttl_seconds(mention_retention_days: Optional[float]) -> int:
+    if not mention_retention_days:
+        return NEVER_EXPIRE_SECONDS
+    return min(int(mention_retention_days * 86400), NEVER_EXPIRE_SECONDS)
+
+
+def collection_indexes(mention_retention_days: Optional[float]) -> Dict[str, List[IndexModel]]:
+    """Every index the app relies on, by collection"""
+    token_mentions = [
+        # Quorum lookups: equality on the normalized name, range on time, filter on processed
+        IndexModel([("token_name_norm", ASCENDING), ("mentioned_at", DESCENDING), ("processed", ASCENDING)]),
+        IndexModel([("tweet_url", ASCENDING)]),
+        # The mention writer's upsert key; unique so concurrent writers cannot store a mention twice
+        # (mentions without a tweet URL are keyed by id instead and left out)
+        IndexModel([("tweet_url", ASCENDING), ("token_name_norm", ASCENDING)], unique=True,
+                   partialFilterExpression={"tweet_url": {"$gt": ""}}),
+        IndexModel([("id", ASCENDING)]),
+        # Cadence seeding aggregates per account over the history window
+        IndexModel([("account_username", ASCENDING), ("mentioned_at", DESCENDING)]),
+    ]
+    # Also serves the quorum window warm-up at startup (recent unprocessed mentions). Always a
+    # TTL index, even with retention off: a plain and a TTL index on the same key share a name
+    # and conflict, while a TTL can be changed in place
+    token_mentions.append(IndexModel([("mentioned_at", ASCENDING)],
+                                     expireAfterSeconds=mention_ttl_seconds(mention_retention_days)))
+    alert_history = IndexModel([("created_at", DESCENDING), ("id", DESCENDING)])
+    return {
+        "token_mentions": token_mentions,
+        # Trace write-backs update alerts by id
+        "name_alerts": [alert_history, IndexModel([("id", ASCENDING)])],
+        "ca_alerts": [alert_history, IndexModel([("token_name_norm", ASCENDING)]), IndexModel([("id", ASCENDING)])],
+        "ca_monitoring_queue": [IndexModel([("token_name_norm", ASCENDING), ("status", ASCENDING)]),
+                                IndexModel([("status", ASCENDING)])],
+        "app_versions": [IndexModel([("id", ASCENDING)])],
+        "x_accounts": [
+            IndexModel([("is_active", ASCENDING)]),
+            IndexModel([("username", ASCENDING)]),
+        ],
+    }
+
+
+def query_shapes() -> List[Tuple[str, Dict, Optional[Dict]]]:
+    """Representative (collection, filter, sort) of every query the app issues"""
+    now = datetime.now(timezone.utc)
+    return [
+        ("token_mentions", {"token_name_norm": "BONK", "mentioned_at": {"$gte": now}, "processed": {"$ne": True}}, None),
+        ("token_mentions", {"tweet_url": "https://x.com/a/status/1", "token_name_norm": "BONK"}, None),
+        ("token_mentions", {"mentioned_at": {"$gte": now}}, None),
+        ("token_mentions", {"id": {"$in": ["id"]}}, None),
+        ("token_mentions", {"account_username": {"$in": ["a"]}, "mentioned_at": {"$gte": now}}, None),
+        ("name_alerts", {"created_at": {"$lt": now}}, {"created_at": -1, "id": -1}),
+        ("ca_alerts", {"created_at": {"$lt": now}}, {"created_at": -1, "id": -1}),
+        ("ca_alerts", {"token_name_norm": "BONK"}, None),
+        ("name_alerts", {"id": "id"}, None),
+        ("ca_alerts", {"id": "id"}, None),
+        ("name_alerts", {"trace": {"$exists": True}, "created_at": {"$gte": now}}, {"created_at": -1}),
+        ("name_alerts", {"created_at": {"$gte": now}}, None),
+        ("ca_monitoring_queue", {"token_name_norm": {"$in": ["BONK"]}, "status": "active"}, None),
+        ("ca_monitoring_queue", {"status": "active"}, None),
+        ("app_versions", {"id": "id"}, None),
+        ("x_accounts", {"is_active": True}, None),
+        ("x_accounts", {"username": {"$in": ["a"]}, "cadence": {"$exists": True}}, None),
+    ]
+
+
+def _plan_stages(plan) -> List[str]:
+    """All stage names in an explain plan tree"""
+    stages = []
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append(plan['stage'])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+class SchemaBootstrap:
+    """Idempotent startup step that creates indexes and flags query shapes still scanning collections
+
+    Raw token mentions expire after `mention_retention_days` through a TTL index. None keeps
+    them forever by setting the TTL to NEVER_EXPIRE_SECONDS rather than dropping it, so turning
+    retention off, back on or changing it (and upgrading a deployment whose mentioned_at index
+    predates the TTL) is always a collMod of the existing index, never a rebuild or a conflict.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, mention_retention_days: Optional[float] = 30):
+        self.db = db
+        self.mention_retention_days = mention_retention_days
+        self.report: Dict = {"indexes_ready": False, "errors": [], "unindexed_queries": [], "checked_at": None}
+
+    async def run(self) -> Dict:
+        await self.ensure_indexes()
+        await self.audit_queries()
+        return self.report
+
+    async def ensure_indexes(self):
+        errors = []
+        for collection_name, indexes in collection_indexes(self.mention_retention_days).items():
+            for index in indexes:
+                try:
+                    await self.db[collection_name].create_indexes([index])
+                except OperationFailure as e:
+                    if e.code == INDEX_OPTIONS_CONFLICT and 'expireAfterSeconds' in index.document:
+                        await self._update_ttl(collection_name, index)
+                    else:
+                        errors.append(f"{collection_name}.{index.document['name']}: {e}")
+                except Exception as e:
+                    errors.append(f"{collection_name}.{index.document['name']}: {e}")
+        for error in errors:
+            logger.error(f"❌ Failed to create index {error}")
+        self.report["errors"] = errors
+        self.report["indexes_ready"] = not errors
+
+    async def _update_ttl(self, collection_name: str, index: IndexModel):
+        """Retention changed since the index was built; collMod it instead of rebuilding"""
+        try:
+            await self.db.command("collMod", collection_name, index={
+                "keyPattern": dict(index.document['key']),
+                "expireAfterSeconds": index.document['expireAfterSeconds'],
+            })
+            logger.info(f"Updated {collection_name} retention to {self.mention_retention_days or 'unlimited'} days")
+        except Exception as e:
+            logger.error(f"❌ Failed to update {collection_name} TTL index: {e}")
+
+    async def explain(self, collection_name: str, query: Dict, sort: Optional[Dict] = None) -> List[str]:
+        """Stage names of the winning plan for a find"""
+        command = {"find": collection_name, "filter": query}
+        if sort:
+            command["sort"] = sort
+        result = await self.db.command({"explain": command, "verbosity": "queryPlanner"})
+        return _plan_stages(result.get('queryPlanner', {}).get('winningPlan', {}))
+
+    async def audit_queries(self) -> List[Dict]:
+        """Explain every known query shape and report the ones that still need a collection scan"""
+        unindexed = []
+        for collection_name, query, sort in query_shapes():
+            try:
+                stages = await self.explain(collection_name, query, sort)
+            except Exception as e:
+                logger.warning(f"Could not explain query on {collection_name}: {e}")
+                continue
+            if 'COLLSCAN' in stages:
+                unindexed.append({"collection": collection_name, "filter": list(query), "sort": list(sort or {})})
+                logger.warning(f"⚠️ Unindexed query on {collection_name}: filter={list(query)} sort={list(sort or {})}")
+        self.report["unindexed_queries"] = unindexed
+        self.report["checked_at"] = datetime.now(timezone.utc).isoformat()
+        return unindexed
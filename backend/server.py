@@ -1,8 +1,9 @@
-from fastapi import FastAPI, APIRouter, WebSocket, WebSocketDisconnect, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, WebSocket, WebSocketDisconnect, HTTPException, BackgroundTasks, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
 import os
 import logging
 import asyncio
@@ -11,10 +12,19 @@ import websockets
 import aiohttp
 import re
 from pathlib import Path
-import random
 from x_monitor_realtime import RealTimeXMonitor
+from ca_index import CAIndex, normalize_token_name
+from broadcaster import Broadcaster, SnapshotFrame
+from alert_store import AlertStore
+from ingestion import IngestionPipeline, unwritten_indexes
+from mention_writer import MentionWriter
+from schema import SchemaBootstrap
+from tracing import AlertTracer
+from challenges import ChallengeBroker
+from token_matcher import TokenMatcher
+from metrics import metrics, MongoCommandMetrics, mongo_operation_seconds, pump_frame_to_broadcast_seconds
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
 from datetime import datetime, timezone
 from enum import Enum
 import uuid
@@ -36,7 +46,7 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandMetrics(mongo_operation_seconds)])
 db = client[os.environ['DB_NAME']]
 
 # Create the main app without a prefix
@@ -46,9 +56,35 @@ app = FastAPI(title="Tweet Tracker", description="Real-time meme coin tracking f
 api_router = APIRouter(prefix="/api")
 
 # Global state management
-active_websocket_connections: List[WebSocket] = []
-name_alerts: List[Dict] = []
-ca_alerts: List[Dict] = []
+# Per-alert stage timestamps, written back onto the alert once it has been persisted and sent
+alert_tracer = AlertTracer(db)
+broadcaster = Broadcaster(
+    encoder=DateTimeEncoder,
+    max_queue_size=int(os.environ.get('WS_CLIENT_QUEUE_SIZE', '256')),
+    slow_client_policy=os.environ.get('WS_SLOW_CLIENT_POLICY', 'drop_oldest'),
+    on_sent=alert_tracer.record_send,
+    replay_log_size=int(os.environ.get('WS_REPLAY_LOG_SIZE', '1000'))
+)
+async def broadcast_to_clients(data: dict, trace_id: Optional[str] = None):
+    """Broadcast data to all connected WebSocket clients (queued per client, never waits on a send)"""
+    queued = broadcaster.publish(data, trace_id)
+    if trace_id is not None:
+        alert_tracer.expect_sends(trace_id, queued)
+
+# Recent alerts are kept in fixed-size buffers; older ones are served from Mongo
+ALERT_BUFFER_SIZE = int(os.environ.get('ALERT_BUFFER_SIZE', '1000'))
+name_alerts = AlertStore(db.name_alerts, capacity=ALERT_BUFFER_SIZE)
+ca_alerts = AlertStore(db.ca_alerts, capacity=ALERT_BUFFER_SIZE)
+# Raw token mentions expire after MENTION_RETENTION_DAYS (0 keeps them forever); changing it,
+# including to or from 0, updates the TTL index in place on the next start
+schema_bootstrap = SchemaBootstrap(db, mention_retention_days=float(os.environ.get('MENTION_RETENTION_DAYS', '30')) or None)
+# Token mentions are buffered and written in bulk, deduplicated by tweet URL and token
+mention_writer = MentionWriter(
+    db.token_mentions,
+    batch_size=int(os.environ.get('MENTION_BATCH_SIZE', '100')),
+    flush_interval_seconds=float(os.environ.get('MENTION_FLUSH_SECONDS', '1.0')),
+    max_buffered=int(os.environ.get('MENTION_BUFFER_MAX', '10000'))
+)
 tracked_accounts: List[Dict] = []
 performance_data: List[Dict] = []
 app_versions: List[Dict] = []
@@ -83,6 +119,7 @@ class NameAlert(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     token_name: str
     first_seen: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     quorum_count: int = 1
     accounts_mentioned: List[str] = []
     tweet_urls: List[str] = []
@@ -107,7 +144,10 @@ class AppVersion(BaseModel):
 
 class MonitoringConfig(BaseModel):
     alert_threshold: int = 2
-    check_interval_seconds: int = 30
+    check_interval_seconds: int = Field(30, ge=1)
+    max_concurrent_checks: int = Field(8, ge=1)
+    requests_per_second: float = Field(4.0, gt=0)
+    adaptive_polling: bool = True
     enable_browser_monitoring: bool = True
     enable_rss_monitoring: bool = True
     enable_scraping_monitoring: bool = True
@@ -120,177 +160,28 @@ class GitHubConfig(BaseModel):
     auto_backup_enabled: bool = False
     backup_interval_hours: int = 24
 
-class XAccountMonitor:
-    def __init__(self):
-        self.monitored_accounts = []
-        self.is_monitoring = False
-        self.known_tokens_with_ca = set()  # Track tokens that already have CAs
-        self.token_patterns = [
-            r'\$[A-Z]{2,10}\b',  # $TOKEN format
-            r'\b[A-Z]{2,10}(?:\s+(?:coin|token|gem|moon|pump|lambo))b',  # TOKEN coin/token
-            r'\b(?:DOGE|PEPE|SHIB|BONK|WIF|FLOKI|MEME|APE|WOJAK|TURBO|BRETT|POPCAT|DEGEN|MEW|BOBO|PEPE2|LADYS|BABYDOGE|DOGELON|AKITA|KISHU|SAFEMOON|HOGE|NFD|ELON|MILADY|BEN|ANDY|BART|MATT|TOSHI|HOPPY|MUMU|BENJI|POKEMON|SPURDO|BODEN|MAGA|SLERF|BOOK|MYRO|PONKE)\b',  # Common meme coins
-        ]
-
-    async def start_monitoring(self):
-        """Start monitoring X accounts for token mentions"""
-        self.is_monitoring = True
-        logger.info("Starting X account monitoring...")
-        
-        # Get all active tracked accounts
-        accounts = await db.x_accounts.find({"is_active": True}).to_list(1000)
-        self.monitored_accounts = [acc['username'] for acc in accounts]
-        
-        logger.info(f"Monitoring {len(self.monitored_accounts)} X accounts")
-        
-        # Start monitoring loop
-        asyncio.create_task(self.monitoring_loop())
-
-    async def monitoring_loop(self):
-        """Main monitoring loop that checks accounts periodically"""
-        while self.is_monitoring:
-            try:
-                await self.check_accounts_for_mentions()
-                await asyncio.sleep(60)  # Check every minute
-            except Exception as e:
-                logger.error(f"Error in monitoring loop: {e}")
-                await asyncio.sleep(30)
-
-    async def check_accounts_for_mentions(self):
-        """Check tracked accounts for new token mentions"""
-        try:
-            # Simulate checking X accounts (replace with actual implementation)
-            for account in self.monitored_accounts:
-                # For now, simulate finding token mentions
-                await self.simulate_account_check(account)
-        except Exception as e:
-            logger.error(f"Error checking accounts: {e}")
-
-    async def simulate_account_check(self, account_username):
-        """Simulate checking an X account for token mentions"""
-        # This simulates finding token mentions from the account
-        # In a real implementation, this would scrape or use alternative APIs
-        # Randomly simulate finding tokens (for demonstration)
-        if random.random() < 0.1:  # 10% chance of finding a mention
-            possible_tokens = ['BONK', 'PEPE', 'DOGE', 'WIF', 'BRETT', 'POPCAT', 'MEW', 'TURBO']
-            token_name = random.choice(possible_tokens)
-            
-            # Create a simulated tweet URL
-            tweet_url = f"https://x.com/{account_username}/status/{random.randint(1000000000000000000, 9999999999999999999)}"
-            
-            # Add the token mention
-            mention = TokenMention(
-                token_name=token_name,
-                account_username=account_username,
-                tweet_url=tweet_url
-            )
-            
-            await self.process_token_mention(mention)
-
-    async def process_token_mention(self, mention: TokenMention):
-        """Process a found token mention"""
-        try:
-            # Store in database
-            mention_dict = mention.dict()
-            await db.token_mentions.insert_one(mention_dict)
-            logger.info(f"Found token mention: {mention.token_name} by @{mention.account_username}")
-            
-            # Check for name alerts
-            await self.check_for_name_alerts(mention.token_name)
-        except Exception as e:
-            logger.error(f"Error processing token mention: {e}")
-
-    async def check_token_has_ca(self, token_name: str) -> bool:
-        """Check if a token already has a Contract Address"""
-        try:
-            # Check in CA alerts collection
-            ca_exists = await db.ca_alerts.find_one({
-                "token_name": {"$regex": f"^{token_name}$", "$options": "i"}
-            })
-            
-            if ca_exists:
-                logger.info(f"Token {token_name} already has CA - filtering from Name Alerts")
-                return True
-            
-            # Also check known tokens with CAs
-            if token_name.upper() in self.known_tokens_with_ca:
-                logger.info(f"Token {token_name} is in known tokens with CA - filtering from Name Alerts")
-                return True
-            
-            return False
-        except Exception as e:
-            logger.error(f"Error checking if token has CA: {e}")
-            return False  # If unsure, allow the alert
-
-    async def check_for_name_alerts(self, token_name: str):
-        """Check if this token mention should trigger a name alert (ONLY for tokens WITHOUT CA)"""
-        try:
-            # CRITICAL: Check if token already has a CA - if yes, NO name alert
-            if await self.check_token_has_ca(token_name):
-                logger.info(f"⚠️ Token {token_name} already has CA - skipping Name Alert")
-                return
-            
-            # Get recent mentions of this token (last hour)
-            from datetime import datetime, timedelta
-            one_hour_ago = datetime.now() - timedelta(hours=1)
-            
-            recent_mentions = await db.token_mentions.find({
-                "token_name": {"$regex": f"^{token_name}$", "$options": "i"},
-                "mentioned_at": {"$gte": one_hour_ago},
-                "processed": {"$ne": True}
-            }).to_list(100)
-            
-            # Group by unique accounts
-            unique_accounts = set()
-            tweet_urls = []
-            for mention in recent_mentions:
-                unique_accounts.add(mention['account_username'])
-                tweet_urls.append(mention['tweet_url'])
-            
-            # If 2+ unique accounts mentioned this token AND it has no CA, create alert
-            if len(unique_accounts) >= 2:
-                # Double-check token doesn't have CA before creating alert
-                if await self.check_token_has_ca(token_name):
-                    logger.info(f"⚠️ Token {token_name} got CA during processing - skipping Name Alert")
-                    return
-                
-                name_alert = NameAlert(
-                    token_name=token_name,
-                    first_seen=min(mention['mentioned_at'] for mention in recent_mentions),
-                    quorum_count=len(unique_accounts),
-                    accounts_mentioned=list(unique_accounts),
-                    tweet_urls=tweet_urls,
-                    alert_triggered=True
-                )
-                
-                # Store alert
-                alert_dict = name_alert.dict()
-                name_alerts.append(alert_dict)
-                
-                logger.info(f"🚨 NAME ALERT (NO CA): {token_name} mentioned by {len(unique_accounts)} accounts")
-                
-                # Broadcast to clients
-                await broadcast_to_clients({
-                    "type": "name_alert",
-                    "data": alert_dict
-                })
-                
-                # Mark mentions as processed
-                await db.token_mentions.update_many(
-                    {"token_name": {"$regex": f"^{token_name}$", "$options": "i"}},
-                    {"$set": {"processed": True}}
-                )
-        except Exception as e:
-            logger.error(f"Error checking for name alerts: {e}")
-
 class PumpFunWebSocketClient:
-    def __init__(self):
+    def __init__(self, db: AsyncIOMotorDatabase, ca_index: CAIndex, token_matcher: TokenMatcher,
+                 ca_alerts: AlertStore, tracer: AlertTracer, broadcast: Callable[..., Awaitable],
+                 ca_watchlist: Set[str]):
+        self.db = db
+        self.ca_index = ca_index
+        self.token_matcher = token_matcher
+        self.ca_alerts = ca_alerts
+        self.tracer = tracer
+        self.broadcast = broadcast
+        self.ca_watchlist = ca_watchlist  # the monitor's names waiting for a CA
         self.websocket_url = "wss://pumpportal.fun/api/data"
         self.websocket = None
         self.is_connected = False
         self.reconnect_delay = 5
+        # Reader only parses/enqueues; matching and batched Mongo writes run in their own stages
+        self.pipeline = IngestionPipeline(self.match_pump_message, self.persist_ca_alerts,
+                                          match_histogram=pump_frame_to_broadcast_seconds)
 
     async def connect(self):
         """Connect to Pump.fun WebSocket for real-time CA alerts"""
+        self.pipeline.start()
         while True:
             try:
                 logger.info("Connecting to Pump.fun WebSocket...")
@@ -322,16 +213,10 @@ class PumpFunWebSocketClient:
                 logger.error(f"Failed to subscribe: {e}")
 
     async def listen_for_messages(self):
-        """Process incoming messages from Pump.fun"""
+        """Read incoming messages from Pump.fun and hand them to the ingestion pipeline"""
         try:
             async for message in self.websocket:
-                try:
-                    data = json.loads(message)
-                    await self.process_pump_message(data)
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse message: {e}")
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}")
+                self.pipeline.submit(message)
         except websockets.exceptions.ConnectionClosed:
             logger.warning("WebSocket connection closed")
             self.is_connected = False
@@ -340,156 +225,157 @@ class PumpFunWebSocketClient:
             self.is_connected = False
 
     async def process_pump_message(self, message_data: dict):
-        """Process Pump.fun messages and create CA alerts for trending tokens"""
+        """Process a single Pump.fun message end to end (match, then store)"""
         try:
-            if message_data.get('type') == 'tokenCreate':
-                token_data = message_data.get('data', {})
-                token_name = token_data.get('name', 'Unknown').upper()
-                
-                # Check if token is less than 1 minute old
-                created_time = datetime.now(timezone.utc)
-                time_diff = (datetime.now(timezone.utc) - created_time).total_seconds()
-                
-                if time_diff <= 60:  # Less than 1 minute old
-                    # Check if this token is being monitored (was trending)
-                    monitored_token = await db.ca_monitoring_queue.find_one({
-                        "token_name": {"$regex": f"^{token_name}$", "$options": "i"},
-                        "status": "active"
-                    })
-                    
-                    ca_alert = CAAlert(
-                        contract_address=token_data.get('mint', ''),
-                        token_name=token_name,
-                        market_cap=token_data.get('marketCap', 0),
-                        photon_url=f"https://photon-sol.tinyastro.io/en/lp/{token_data.get('mint', '')}?timeframe=1s",
-                        alert_time_utc=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
-                    )
-                    
-                    # Enhanced alert data for trending tokens
-                    alert_data = ca_alert.dict()
-                    if monitored_token:
-                        alert_data['was_trending'] = True
-                        alert_data['mention_count'] = monitored_token.get('mention_count', 0)
-                        alert_data['priority'] = 'HIGH'
-                        
-                        # Mark as processed in monitoring queue
-                        await db.ca_monitoring_queue.update_one(
-                            {"_id": monitored_token["_id"]},
-                            {"$set": {"status": "ca_found", "ca_found_at": datetime.now(timezone.utc)}}
-                        )
-                        
-                        logger.info(f"🚨🚀 TRENDING CA ALERT: {token_name} - {ca_alert.contract_address} (was mentioned by {monitored_token.get('mention_count', 0)} accounts)")
-                    else:
-                        alert_data['was_trending'] = False
-                        alert_data['priority'] = 'NORMAL'
-                        logger.info(f"🚨 CA ALERT: {token_name} - {ca_alert.contract_address}")
-                    
-                    ca_alerts.append(alert_data)
-                    
-                    # Store in database
-                    await db.ca_alerts.insert_one(alert_data)
-                    
-                    # Broadcast to connected clients
-                    await broadcast_to_clients({
-                        "type": "ca_alert",
-                        "data": alert_data
-                    })
+            alert_data = await self.match_pump_message(message_data)
+            if alert_data:
+                await self.persist_ca_alerts([alert_data])
         except Exception as e:
             logger.error(f"Error processing Pump.fun message: {e}")
 
-# Initialize WebSocket client and monitoring systems
-pump_client = PumpFunWebSocketClient()
-x_monitor = XAccountMonitor()
-real_time_monitor = RealTimeXMonitor(db)
+    async def match_pump_message(self, message_data: dict, received_at: float = None) -> Optional[dict]:
+        """Create and broadcast a CA alert for a new token; returns the alert to be stored
 
-# Global configuration
-monitoring_config = MonitoringConfig()
-github_config = GitHubConfig()
-
-async def broadcast_to_clients(data: dict):
-    """Broadcast data to all connected WebSocket clients"""
-    if active_websocket_connections:
-        disconnected_clients = []
-        for connection in active_websocket_connections:
-            try:
-                await connection.send_text(json.dumps(data, cls=DateTimeEncoder))
-            except Exception:
-                disconnected_clients.append(connection)
+        `received_at` is the time.monotonic() reading of when the frame arrived.
+        """
+        if message_data.get('type') != 'tokenCreate':
+            return None
+        extracted_at = time.monotonic()
         
-        for connection in disconnected_clients:
-            active_websocket_connections.remove(connection)
-
-async def check_token_has_ca_server(token_name: str) -> bool:
-    """Check if a token already has a Contract Address (server version)"""
-    try:
-        # Check in CA alerts collection
-        ca_exists = await db.ca_alerts.find_one({
-            "token_name": {"$regex": f"^{token_name}$", "$options": "i"}
-        })
+        token_data = message_data.get('data', {})
+        token_name = token_data.get('name', 'Unknown').upper()
+        # Name alerts are watched in memory, so a trending token is flagged without a DB round-trip
+        match = self.token_matcher.match(token_data.get('name'), token_data.get('symbol'))
         
-        if ca_exists:
-            logger.info(f"Token {token_name} already has CA - filtering from Name Alerts")
-            return True
+        ca_alert = CAAlert(
+            contract_address=token_data.get('mint', ''),
+            token_name=token_name,
+            market_cap=token_data.get('marketCap', 0),
+            photon_url=f"https://photon-sol.tinyastro.io/en/lp/{token_data.get('mint', '')}?timeframe=1s",
+            alert_time_utc=datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        )
         
-        return False
-    except Exception as e:
-        logger.error(f"Error checking if token has CA: {e}")
-        return False  # If unsure, allow the alert
-
-async def check_name_alerts(token_mentions: List[TokenMention], threshold: int = 2):
-    """Check if token mentions meet alert threshold (ONLY for tokens WITHOUT CA)"""
-    token_counts = {}
-    
-    for mention in token_mentions:
-        if not mention.processed:
-            token_name = mention.token_name.lower()
-            
-            # CRITICAL: Skip tokens that already have CA
-            if await check_token_has_ca_server(mention.token_name):
-                logger.info(f"⚠️ Token {mention.token_name} already has CA - skipping Name Alert")
-                continue
+        # Enhanced alert data for trending tokens
+        alert_data = self.ca_index.prepare_alert(ca_alert.dict())
+        if match:
+            watched = match['token']
+            alert_data['was_trending'] = True
+            alert_data['mention_count'] = watched.mention_count
+            alert_data['priority'] = 'HIGH'
+            alert_data['trending_name'] = watched.name
+            alert_data['matched_on'] = match['matched_on']
+            alert_data['match_type'] = match['match_type']
             
-            if token_name not in token_counts:
-                token_counts[token_name] = {
-                    'count': 0,
-                    'accounts': [],
-                    'urls': [],
-                    'first_seen': mention.mentioned_at
-                }
+            # Only the exact name got its CA; a copycat (PEPE2) must not use up the watch on PEPE.
+            # The monitoring queue is updated with the batched insert.
+            if match['match_type'] == 'exact':
+                self.token_matcher.unwatch(watched.name)
+                self.ca_watchlist.discard(watched.name)
             
-            token_counts[token_name]['count'] += 1
-            token_counts[token_name]['accounts'].append(mention.account_username)
-            token_counts[token_name]['urls'].append(mention.tweet_url)
-            
-            if token_counts[token_name]['count'] >= threshold:
-                # Double-check token doesn't have CA before creating alert
-                if await check_token_has_ca_server(mention.token_name):
-                    logger.info(f"⚠️ Token {mention.token_name} got CA during processing - skipping Name Alert")
-                    continue
-                
-                # Create name alert ONLY for tokens without CA
-                name_alert = NameAlert(
-                    token_name=mention.token_name,
-                    first_seen=token_counts[token_name]['first_seen'],
-                    quorum_count=token_counts[token_name]['count'],
-                    accounts_mentioned=token_counts[token_name]['accounts'],
-                    tweet_urls=token_counts[token_name]['urls'],
-                    alert_triggered=True
-                )
-                
-                name_alerts.append(name_alert.dict())
-                logger.info(f"🚨 NAME ALERT (NO CA): {name_alert.token_name} ({name_alert.quorum_count} mentions)")
-                
-                # Broadcast to clients
-                await broadcast_to_clients({
-                    "type": "name_alert",
-                    "data": name_alert.dict()
-                })
-                
-                # Mark mentions as processed
-                for mention in token_mentions:
-                    if mention.token_name.lower() == token_name:
-                        mention.processed = True
+            logger.info(f"🚨🚀 TRENDING CA ALERT: {token_name} - {ca_alert.contract_address} (was mentioned by {watched.mention_count} accounts, {match['match_type']} {match['matched_on']} match for {watched.name})")
+        else:
+            alert_data['was_trending'] = False
+            alert_data['priority'] = 'NORMAL'
+            logger.info(f"🚨 CA ALERT: {token_name} - {ca_alert.contract_address}")
+        
+        trace = self.tracer.start(alert_data['id'], 'ca', received_at if received_at is not None else extracted_at)
+        trace.mark('extracted', extracted_at)
+        trace.mark('ca_matched')
+        
+        self.ca_alerts.append(alert_data)
+        self.ca_index.add(token_name)
+        
+        # Broadcast to connected clients
+        await self.broadcast({
+            "type": "ca_alert",
+            "data": alert_data
+        }, trace_id=alert_data['id'])
+        return alert_data
+
+    async def persist_ca_alerts(self, alerts: List[dict]):
+        """Store CA alerts in one round-trip (copies, so the Mongo _id stays out of the broadcast payload)
+
+        The alert id doubles as _id, so a retried batch cannot store an alert twice.
+        """
+        try:
+            await self.db.ca_alerts.insert_many(
+                [{**alert, "_id": alert['id'], "trace": self.tracer.snapshot(alert['id'])} for alert in alerts],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            # Finish bookkeeping for the stored part; the pipeline retries the rest
+            failed = unwritten_indexes(e)
+            await self._mark_stored([alert for index, alert in enumerate(alerts) if index not in failed])
+            raise
+        await self._mark_stored(alerts)
+
+    async def _mark_stored(self, alerts: List[dict]):
+        if not alerts:
+            return
+        self.tracer.mark_persisted(alert['id'] for alert in alerts)
+        
+        # Mark trending names as processed in the monitoring queue
+        trending_names = [normalize_token_name(alert['trending_name']) for alert in alerts
+                          if alert.get('trending_name') and alert.get('match_type') == 'exact']
+        if trending_names:
+            await self.db.ca_monitoring_queue.update_many(
+                {"token_name_norm": {"$in": trending_names}, "status": "active"},
+                {"$set": {"status": "ca_found", "ca_found_at": datetime.now(timezone.utc)}}
+            )
+
+# Initialize WebSocket client and monitoring systems
+ca_index = CAIndex(db)
+token_matcher = TokenMatcher(ttl_hours=float(os.environ.get('TOKEN_WATCH_HOURS', '24')))
+# Login challenges (X verification codes) are announced to dashboards and answered over the API
+challenge_broker = ChallengeBroker(on_event=broadcaster.publish)
+# The one X monitoring engine; polled and posted mentions share its quorum window and alert path
+real_time_monitor = RealTimeXMonitor(db, ca_index=ca_index, tracer=alert_tracer, challenges=challenge_broker,
+                                     token_matcher=token_matcher, mention_writer=mention_writer,
+                                     alert_store=name_alerts, broadcast=broadcast_to_clients)
+pump_client = PumpFunWebSocketClient(db, ca_index, token_matcher, ca_alerts, alert_tracer, broadcast_to_clients,
+                                     real_time_monitor.ca_watchlist)
+
+def build_initial_state(broadcaster: Broadcaster, name_alerts: AlertStore, ca_alerts: AlertStore,
+                        tracked_accounts: Callable[[], List[Dict]]) -> SnapshotFrame:
+    """The frame sent to every new WebSocket client, encoded once per change of alerts or accounts"""
+    return SnapshotFrame(
+        "initial_state",
+        build=lambda: {
+            "name_alerts": name_alerts.tail(10),
+            "ca_alerts": ca_alerts.tail(10),
+            "tracked_accounts_count": len(tracked_accounts()),
+            "stream": broadcaster.stream_id
+        },
+        state_key=lambda: (name_alerts.version, ca_alerts.version, id(tracked_accounts()), len(tracked_accounts())),
+        encode=broadcaster.encode,
+        # Where the client resumes from on its next reconnect; changes with every publish, so not cached
+        live=lambda: {"seq": broadcaster.seq}
+    )
+
+# tracked_accounts is rebound when accounts are synced or a version is loaded, so it is read late
+initial_state = build_initial_state(broadcaster, name_alerts, ca_alerts, lambda: tracked_accounts)
+
+# Gauges are read when /api/metrics is scraped, never on the hot paths
+metrics.gauge('websocket_clients', 'Connected WebSocket clients', lambda: len(broadcaster))
+metrics.gauge('token_mentions_cache_size', 'Tokens with live mentions in the quorum window',
+              lambda: len(real_time_monitor.token_mentions_cache))
+metrics.gauge('ca_watchlist_size', 'Name-alerted tokens watched for a contract address',
+              lambda: len(real_time_monitor.ca_watchlist))
+metrics.gauge('seen_tweets_size', 'Tweet status IDs remembered for deduplication', lambda: len(real_time_monitor.seen_tweets))
+for result, attribute in (('hit', 'hits'), ('bloom_hit', 'bloom_hits'), ('miss', 'misses')):
+    metrics.counter('tweet_dedup_lookups_total', 'Seen-tweet cache lookups by result',
+                    lambda attribute=attribute: getattr(real_time_monitor.seen_tweets, attribute), {"result": result})
+metrics.gauge('alerts_in_memory', 'Alerts held in the in-memory buffers', lambda: len(name_alerts), {"kind": "name"})
+metrics.gauge('alerts_in_memory', 'Alerts held in the in-memory buffers', lambda: len(ca_alerts), {"kind": "ca"})
+metrics.gauge('mention_write_buffer', 'Token mentions waiting for the next bulk write', lambda: len(mention_writer.buffer))
+metrics.gauge('pump_match_queue_depth', 'Pump.fun frames waiting to be matched', lambda: pump_client.pipeline.match_queue.qsize())
+metrics.gauge('browser_pages_in_use', 'Pooled browser pages currently leased', lambda: real_time_monitor.browser_pool.in_use)
+metrics.gauge('browser_rss_bytes', 'Resident memory of the Playwright driver and browser processes',
+              lambda: real_time_monitor.browser_pool.rss_bytes() or 0)
+
+# Global configuration
+monitoring_config = MonitoringConfig()
+github_config = GitHubConfig()
 
 # API Routes
 @api_router.get("/")
@@ -510,6 +396,9 @@ async def add_tracked_account(account: XAccount):
     tracked_accounts.append(account_dict)
     return account
 
+class ChallengeAnswer(BaseModel):
+    code: str
+
 class ManualAccountImport(BaseModel):
     accounts: List[str]
     source: str = "manual_import"
@@ -519,6 +408,31 @@ class BulkAccountImport(BaseModel):
     separator: str = ","  # How accounts are separated (comma, newline, space)
     source: str = "sploofmeme_following"
 
+@api_router.post("/accounts/sync-following")
+async def sync_following_accounts(full: bool = Query(False)):
+    """Sync x_accounts with the @Sploofmeme following list (full=true also deactivates unfollowed accounts)"""
+    try:
+        await real_time_monitor.update_following_list("Sploofmeme", full=full)
+        return {
+            **real_time_monitor.following_sync.last_result,
+            "monitored_accounts_count": len(real_time_monitor.monitored_accounts)
+        }
+    except Exception as e:
+        logger.error(f"Error syncing following list: {e}")
+        return {"error": str(e)}
+
+@api_router.get("/x/challenges")
+async def get_pending_challenges():
+    """Login challenges waiting for an answer (e.g. the X email verification code)"""
+    return {"pending": challenge_broker.list_pending(), **challenge_broker.stats()}
+
+@api_router.post("/x/challenges/{challenge_id}")
+async def answer_challenge(challenge_id: str, answer: ChallengeAnswer):
+    """Submit the answer to a pending login challenge; the waiting login resumes immediately"""
+    if not challenge_broker.submit(answer.code, challenge_id):
+        raise HTTPException(status_code=404, detail="No pending challenge with that id")
+    return {"success": True, "challenge_id": challenge_id}
+
 @api_router.post("/accounts/emergency-restore")
 async def emergency_restore_accounts():
     """EMERGENCY: Restore the 130 @Sploofmeme accounts if they get lost"""
@@ -588,13 +502,11 @@ async def verify_accounts_status():
 @api_router.post("/mentions")
 async def add_token_mention(mention: TokenMention):
     """Add token mention from X account (manual input for testing)"""
-    mention_dict = mention.dict()
-    await db.token_mentions.insert_one(mention_dict)
+    # Counted in the monitor's quorum window like polled mentions (it stores the mention)
+    recorded = await real_time_monitor.ingest_mention(mention.token_name, mention.account_username, mention.tweet_url,
+                                                      mention.mentioned_at, mention.id)
     
-    # Use X monitor to process the mention
-    await x_monitor.process_token_mention(mention)
-    
-    return {"message": "Token mention added successfully"}
+    return {"message": "Token mention added successfully", "recorded": recorded}
 
 @api_router.post("/monitoring/start")
 async def start_monitoring():
@@ -607,7 +519,7 @@ async def start_monitoring():
             "message": "Real-time monitoring started - tracking ALL accounts @Sploofmeme follows",
             "monitoring_type": "auto_follow_tracking",
             "alert_threshold": real_time_monitor.alert_threshold,
-            "check_interval": "30_seconds",
+            "check_interval": f"{real_time_monitor.check_interval_seconds}_seconds",
             "target_account": "Sploofmeme"
         }
     except Exception as e:
@@ -631,10 +543,27 @@ async def get_monitoring_status():
         "monitoring_type": "sploofmeme_auto_follow_tracking",
         "last_check": real_time_monitor.last_check_time.isoformat() if real_time_monitor.last_check_time else None,
         "known_tokens_filtered": len(real_time_monitor.known_tokens_with_ca),
+        "ca_index": ca_index.stats(),
+        "mention_writes": mention_writer.stats(),
+        "mention_window": real_time_monitor.token_mentions_cache.stats(datetime.now(timezone.utc).timestamp()),
+        "polling": real_time_monitor.poller.stats(real_time_monitor.monitored_accounts),
+        "browser_pool": real_time_monitor.browser_pool.stats(),
+        "x_session": real_time_monitor.session_store.stats(),
+        "x_challenges": challenge_broker.stats(),
+        "tweet_dedup": real_time_monitor.seen_tweets.stats(),
+        "account_cursors": real_time_monitor.cursors.stats(),
         "target_account": "Sploofmeme",
         "real_following_count": len(real_time_monitor.monitored_accounts)
     }
 
+@api_router.get("/monitoring/cadence")
+async def get_monitoring_cadence():
+    """Get learned per-account polling intervals"""
+    return {
+        "adaptive_polling": real_time_monitor.adaptive_polling,
+        **real_time_monitor.cadence.stats(real_time_monitor.monitored_accounts, real_time_monitor.poller.last_checked_at)
+    }
+
 @api_router.post("/monitoring/config")
 async def update_monitoring_config(config: MonitoringConfig):
     """Update monitoring configuration"""
@@ -643,6 +572,9 @@ async def update_monitoring_config(config: MonitoringConfig):
     
     # Update real-time monitor settings
     real_time_monitor.set_alert_threshold(config.alert_threshold)
+    real_time_monitor.set_polling(
+        config.check_interval_seconds, config.max_concurrent_checks, config.requests_per_second, config.adaptive_polling
+    )
     
     return {
         "message": "Monitoring configuration updated",
@@ -655,14 +587,54 @@ async def get_monitoring_config():
     return monitoring_config.dict()
 
 @api_router.get("/alerts/names")
-async def get_name_alerts():
-    """Get all name alerts"""
-    return {"alerts": name_alerts}
+async def get_name_alerts(limit: int = Query(100, ge=1, le=500), cursor: Optional[str] = None,
+                          since: Optional[datetime] = None):
+    """Get name alerts, newest first; pass next_cursor back as cursor for older pages"""
+    try:
+        return await name_alerts.page(limit, cursor, since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.get("/alerts/cas")
-async def get_ca_alerts():
-    """Get all CA alerts"""
-    return {"alerts": ca_alerts}
+async def get_ca_alerts(limit: int = Query(100, ge=1, le=500), cursor: Optional[str] = None,
+                        since: Optional[datetime] = None):
+    """Get CA alerts, newest first; pass next_cursor back as cursor for older pages"""
+    try:
+        return await ca_alerts.page(limit, cursor, since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.get("/alerts/latency")
+async def get_alert_latency(kind: str = Query("name", pattern="^(name|ca)$"), since: Optional[datetime] = None,
+                            limit: int = Query(5000, ge=1, le=50000)):
+    """Per-stage latency percentiles (ms) of traced alerts, to see which pipeline stage is slow"""
+    return {**await alert_tracer.latency_breakdown(kind, since, limit), "tracer": alert_tracer.stats()}
+
+@api_router.get("/pump/stats")
+async def get_pump_stats():
+    """Get Pump.fun ingestion pipeline queue depths, batch sizes and latencies"""
+    return {"is_connected": pump_client.is_connected, "token_matcher": token_matcher.stats(), **pump_client.pipeline.stats()}
+
+@api_router.get("/metrics")
+async def get_metrics():
+    """Pipeline histograms and gauges in the Prometheus text exposition format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@api_router.get("/db/schema")
+async def get_db_schema(recheck: bool = False):
+    """Get index bootstrap status and query shapes that still scan whole collections"""
+    if recheck:
+        await schema_bootstrap.audit_queries()
+    return {"mention_retention_days": schema_bootstrap.mention_retention_days, **schema_bootstrap.report}
+
+@api_router.get("/broadcast/stats")
+async def get_broadcast_stats():
+    """Get WebSocket fan-out queue depth and drop counters"""
+    return {
+        **broadcaster.stats(),
+        "initial_state": initial_state.stats(),
+        "clients_detail": [channel.stats() for channel in broadcaster.channels.values()]
+    }
 
 @api_router.get("/performance")
 async def get_performance_data():
@@ -675,8 +647,8 @@ async def save_version(version: AppVersion):
     version_dict = version.dict()
     version_dict['snapshot_data'] = {
         'tracked_accounts': tracked_accounts,
-        'name_alerts': name_alerts,
-        'ca_alerts': ca_alerts,
+        'name_alerts': name_alerts.to_list(),
+        'ca_alerts': ca_alerts.to_list(),
         'performance_data': performance_data,
         'blacklist_words': blacklist_words,
         'whitelist_accounts': whitelist_accounts,
@@ -706,13 +678,13 @@ async def load_version(version_id: str):
         raise HTTPException(status_code=404, detail="Version not found")
     
     # Restore app state
-    global tracked_accounts, name_alerts, ca_alerts, performance_data
+    global tracked_accounts, performance_data
     global blacklist_words, whitelist_accounts, blacklist_accounts
     
     snapshot = version['snapshot_data']
     tracked_accounts = snapshot.get('tracked_accounts', [])
-    name_alerts = snapshot.get('name_alerts', [])
-    ca_alerts = snapshot.get('ca_alerts', [])
+    name_alerts.replace(snapshot.get('name_alerts', []))
+    ca_alerts.replace(snapshot.get('ca_alerts', []))
     performance_data = snapshot.get('performance_data', [])
     blacklist_words = snapshot.get('blacklist_words', [])
     whitelist_accounts = snapshot.get('whitelist_accounts', [])
@@ -815,21 +787,36 @@ async def load_version(version_id: str):
 #         return {"error": str(e)}
 
 @api_router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time updates"""
+async def websocket_endpoint(websocket: WebSocket, last_seq: Optional[int] = Query(None),
+                             stream: Optional[str] = Query(None), filters: Optional[str] = Query(None)):
+    """WebSocket endpoint for real-time updates
+
+    Reconnect with `last_seq` and `stream` to get only missed events; pass `filters` (JSON) too
+    so the replay is filtered like the live events. Send {"type": "subscribe", "filters": {...}}
+    to receive only matching events (filters: types, priority, token_names, min_market_cap,
+    accounts); add last_seq/stream to it to resume with the filters applied to the replay.
+    Subscribed clients get periodic `watermark` frames, and pongs, carrying the seq to resume from.
+    """
     await websocket.accept()
-    active_websocket_connections.append(websocket)
+    # Registering and replaying without an await in between, so no broadcast falls into the gap
+    channel = broadcaster.register(websocket)
+    subscription = None
+    if filters:
+        try:
+            subscription = broadcaster.subscribe(websocket, json.loads(filters))
+        except ValueError as e:  # includes JSONDecodeError
+            channel.send(broadcaster.encode({"type": "subscribe_error", "data": {"error": str(e)}}), "subscribe_error")
+    missed = broadcaster.replay(last_seq, stream, subscription) if last_seq is not None else None
     
     try:
-        # Send current state to newly connected client
-        await websocket.send_text(json.dumps({
-            "type": "initial_state",
-            "data": {
-                "name_alerts": name_alerts[-10:],
-                "ca_alerts": ca_alerts[-10:],
-                "tracked_accounts_count": len(tracked_accounts)
-            }
-        }, cls=DateTimeEncoder))
+        if missed is not None:
+            for event_type, frame, seq in missed:
+                channel.send(frame, event_type, seq=seq)
+        else:
+            if last_seq is not None:
+                channel.send(broadcaster.resync_frame(last_seq), "resync")
+            # Send current state to newly connected client (cached frame, rebuilt only after changes)
+            channel.send(initial_state.get(), "initial_state")
         
         while True:
             try:
@@ -837,10 +824,41 @@ async def websocket_endpoint(websocket: WebSocket):
                 client_message = json.loads(data)
                 
                 if client_message.get('type') == 'ping':
-                    await websocket.send_text(json.dumps({
+                    channel.send(broadcaster.encode({
                         "type": "pong",
-                        "timestamp": datetime.now(timezone.utc).isoformat()
-                    }, cls=DateTimeEncoder))
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        # Queued behind every event so far, so it is a valid resume point
+                        "seq": broadcaster.seq
+                    }), "pong", replace_key="pong")
+                elif client_message.get('type') in ('subscribe', 'unsubscribe'):
+                    # Filters are evaluated at publish time, so unwanted events are never encoded or sent
+                    try:
+                        last_seq = client_message.get('last_seq')
+                        last_seq = int(last_seq) if last_seq is not None else None
+                        filters = client_message.get('filters') if client_message['type'] == 'subscribe' else None
+                        subscription = broadcaster.subscribe(websocket, filters)
+                    except (TypeError, ValueError) as e:
+                        channel.send(broadcaster.encode({"type": "subscribe_error", "data": {"error": str(e)}}),
+                                     "subscribe_error")
+                        continue
+                    channel.send(broadcaster.encode({
+                        "type": "subscribed",
+                        "data": {"filters": subscription.to_dict() if subscription else None, "seq": broadcaster.seq}
+                    }), "subscribed")
+                    # Resuming with filters: replay only the missed events that match them
+                    if last_seq is not None:
+                        missed = broadcaster.replay(last_seq, client_message.get('stream'), subscription)
+                        if missed is None:
+                            channel.send(broadcaster.resync_frame(last_seq), "resync")
+                        else:
+                            for event_type, frame, seq in missed:
+                                channel.send(frame, event_type, seq=seq)
+                elif client_message.get('type') == 'verification_code':
+                    accepted = challenge_broker.submit(client_message.get('code'), client_message.get('challenge_id'))
+                    channel.send(broadcaster.encode({
+                        "type": "verification_ack",
+                        "data": {"challenge_id": client_message.get('challenge_id'), "accepted": accepted}
+                    }), "verification_ack")
             except Exception as e:
                 logger.error(f"Error processing client message: {e}")
                 break
@@ -850,8 +868,7 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
-        if websocket in active_websocket_connections:
-            active_websocket_connections.remove(websocket)
+        broadcaster.unregister(websocket)
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -883,12 +900,33 @@ async def startup_event():
     except Exception as e:
         logger.error(f"❌ Failed to auto-restore accounts: {e}")
     
+    # Indexes and mention retention for every collection, then flag any query still scanning
+    try:
+        await schema_bootstrap.run()
+    except Exception as e:
+        logger.error(f"❌ Schema bootstrap failed: {e}")
+    
+    # Warm the CA index before anything checks tokens against it
+    await ca_index.load()
+    await token_matcher.load(db, exclude=ca_index.token_names)
+    
+    # Normalized token names on mentions stored before they existed
+    try:
+        await mention_writer.ensure_schema()
+    except Exception as e:
+        logger.error(f"❌ Failed to backfill token mentions: {e}")
+    
+    # Mentions still inside the quorum window count towards alerts after a restart
+    await real_time_monitor.load_recent_mentions()
+    
+    # Write finished alert traces in the background
+    alert_tracer.run()
+    
     # Start Pump.fun WebSocket client in background
     asyncio.create_task(pump_client.connect())
     
     # Start X account monitoring with restored accounts
     await asyncio.sleep(2)  # Give time for DB to be ready
-    await x_monitor.start_monitoring()
     
     # FORCE start real-time monitoring with accounts
     if real_time_monitor.monitored_accounts:
@@ -902,11 +940,20 @@ async def startup_event():
 async def shutdown_db_client():
     """Cleanup on shutdown"""
     logger.info("Shutting down Tweet Tracker...")
+    
+    # Flush CA alerts still waiting for their batch before the DB client goes away
+    try:
+        await asyncio.wait_for(pump_client.pipeline.stop(), timeout=5)
+    except Exception as e:
+        logger.error(f"Error flushing ingestion pipeline: {e}")
+    # Save seen tweets, since-ID cursors and cadence, so a restart does not recount old tweets
+    try:
+        await asyncio.wait_for(real_time_monitor.stop_monitoring(), timeout=10)
+    except Exception as e:
+        logger.error(f"Error stopping X monitoring: {e}")
+    await mention_writer.flush()
+    await alert_tracer.stop()
     client.close()
     
     # Close all WebSocket connections
-    for connection in active_websocket_connections:
-        try:
-            await connection.close()
-        except Exception:
-            pass
\ No newline at end of file
+    await broadcaster.close_all()
\ No newline at end of file
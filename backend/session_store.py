@@ -0,0 +1,106 @@
+import base64
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+logger = logging.getLogger(__name__)
+
+SALT_BYTES = 16
+# Cookies X sets on a logged-in browser; without both every API call redirects to the login flow
+SESSION_COOKIES = ('auth_token', 'ct0')
+
+
+def _derive_key(passphrase: str, salt: bytes) -> bytes:
+    kdf = Scrypt(salt=salt, length=32, n=2 ** 15, r=8, p=1)
+    return base64.urlsafe_b64encode(kdf.derive(passphrase.encode()))
+
+
+def session_cookies_valid(storage_state: Optional[Dict], now: float = None) -> bool:
+    """Offline check of a storage state: the X session cookies are present and not expired"""
+    if not storage_state:
+        return False
+    now = now or time.time()
+    found = set()
+    for cookie in storage_state.get('cookies', []):
+        if cookie.get('name') in SESSION_COOKIES and cookie.get('domain', '').lstrip('.') in ('x.com', 'twitter.com'):
+            expires = cookie.get('expires', -1)
+            if expires == -1 or expires > now:  # -1 is a session cookie
+                found.add(cookie['name'])
+    return found == set(SESSION_COOKIES)
+
+
+class SessionStore:
+    """Playwright storage state (cookies + local storage) of the X login, encrypted at rest
+
+    The file is `salt || Fernet token`; the key is derived with scrypt from `passphrase`, so
+    only someone with the passphrase (X_SESSION_KEY, falling back to the X password) can
+    replay the session.
+    """
+
+    def __init__(self, path: Path, passphrase: Optional[str]):
+        self.path = Path(path)
+        self.passphrase = passphrase
+        self.loads = 0
+        self.saves = 0
+        self.saved_at: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.passphrase)
+
+    def load(self) -> Optional[Dict]:
+        if not self.enabled or not self.path.exists():
+            return None
+        try:
+            data = self.path.read_bytes()
+            salt, token = data[:SALT_BYTES], data[SALT_BYTES:]
+            storage_state = json.loads(Fernet(_derive_key(self.passphrase, salt)).decrypt(token))
+            self.loads += 1
+            self.saved_at = self.path.stat().st_mtime
+            logger.info(f"Loaded saved X session ({len(storage_state.get('cookies', []))} cookies)")
+            return storage_state
+        except InvalidToken:
+            logger.warning("Saved X session could not be decrypted (key changed?) - logging in again")
+        except Exception as e:
+            logger.error(f"Error loading saved X session: {e}")
+        return None
+
+    def save(self, storage_state: Dict):
+        if not self.enabled:
+            return
+        try:
+            salt = os.urandom(SALT_BYTES)
+            token = Fernet(_derive_key(self.passphrase, salt)).encrypt(json.dumps(storage_state).encode())
+            # Write-then-rename so a crash never leaves half a session behind
+            temporary = self.path.with_suffix('.tmp')
+            fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as session_file:
+                session_file.write(salt + token)
+            os.replace(temporary, self.path)
+            self.saves += 1
+            self.saved_at = time.time()
+        except Exception as e:
+            logger.error(f"Error saving X session: {e}")
+
+    def clear(self):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error removing saved X session: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "saved": self.path.exists(),
+            "saved_at": self.saved_at,
+            "loads": self.loads,
+            "saves": self.saves,
+        }
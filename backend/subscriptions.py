@@ -0,0 +1,153 @@
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set
+
+from ca_index import normalize_token_name
+
+FILTER_FIELDS = ('types', 'priority', 'token_names', 'min_market_cap', 'accounts')
+
+
+def _string_set(filters: Dict, field: str, normalize: Callable[[str], str]) -> Optional[Set[str]]:
+    value = filters.get(field)
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, (list, tuple, set)) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"'{field}' must be a string or a list of strings")
+    values = {normalize(item) for item in value if item.strip()}
+    return values or None
+
+
+def event_tokens(data: Dict) -> List[str]:
+    """Normalized token names an event is about (a trending CA alert also carries the alerted name)"""
+    return [normalize_token_name(data[field]) for field in ('token_name', 'trending_name') if data.get(field)]
+
+
+class Subscription:
+    """One client's filters, compiled into a list of predicates over an event's data
+
+    A filter only constrains events that carry its field: `min_market_cap` never hides a name
+    alert and `accounts` never hides a CA alert. Use `types` to drop whole event types.
+    """
+
+    def __init__(self, filters: Dict):
+        if not isinstance(filters, dict):
+            raise ValueError("filters must be an object")
+        unknown = set(filters) - set(FILTER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+        self.types = _string_set(filters, 'types', str.strip)
+        self.priorities = _string_set(filters, 'priority', lambda item: item.strip().upper())
+        self.token_names = _string_set(filters, 'token_names', lambda item: normalize_token_name(item).lstrip('$'))
+        self.accounts = _string_set(filters, 'accounts', lambda item: item.strip().lstrip('@').lower())
+        self.min_market_cap = filters.get('min_market_cap')
+        if self.min_market_cap is not None and (isinstance(self.min_market_cap, bool)
+                                                or not isinstance(self.min_market_cap, (int, float))):
+            raise ValueError("'min_market_cap' must be a number")
+        self.checks = self._compile()
+
+    def _compile(self) -> List[Callable[[Dict], bool]]:
+        """Predicates for the filters that are set (token names are matched by the index)"""
+        checks = []
+        if self.priorities is not None:
+            priorities = self.priorities
+            checks.append(lambda data: 'priority' not in data or str(data['priority']).upper() in priorities)
+        if self.min_market_cap is not None:
+            min_market_cap = self.min_market_cap
+            checks.append(lambda data: 'market_cap' not in data or (data['market_cap'] or 0) >= min_market_cap)
+        if self.accounts is not None:
+            accounts = self.accounts
+            checks.append(lambda data: 'accounts_mentioned' not in data
+                          or any(str(account).lower() in accounts for account in data['accounts_mentioned']))
+        return checks
+
+    def matches(self, event_type: Optional[str], data: Dict) -> bool:
+        """Full evaluation for a single event (replays); live fan-out goes through SubscriptionIndex"""
+        if self.types is not None and event_type not in self.types:
+            return False
+        if self.token_names is not None:
+            tokens = event_tokens(data)
+            if tokens and not self.token_names.intersection(tokens):
+                return False
+        return all(check(data) for check in self.checks)
+
+    def to_dict(self) -> Dict:
+        return {
+            "types": sorted(self.types) if self.types is not None else None,
+            "priority": sorted(self.priorities) if self.priorities is not None else None,
+            "token_names": sorted(self.token_names) if self.token_names is not None else None,
+            "min_market_cap": self.min_market_cap,
+            "accounts": sorted(self.accounts) if self.accounts is not None else None,
+        }
+
+
+class SubscriptionIndex:
+    """Which clients want an event, without testing every client's filters one by one
+
+    Clients without a subscription get everything. Subscribed clients are bucketed by event
+    type (None = any type), and those filtering on token names sit in an inverted index by
+    name, so one dict lookup per token of the event finds them. Only clients that survive
+    both run their remaining compiled predicates.
+    """
+
+    def __init__(self):
+        self.unfiltered: Set[Hashable] = set()
+        self.subscriptions: Dict[Hashable, Subscription] = {}
+        self.by_type: Dict[Optional[str], Set[Hashable]] = {}
+        self.by_token: Dict[str, Set[Hashable]] = {}
+
+    def add(self, client: Hashable):
+        self.remove(client)
+        self.unfiltered.add(client)
+
+    def subscribe(self, client: Hashable, subscription: Optional[Subscription]):
+        """Replace a client's filters; None receives everything again"""
+        self.remove(client)
+        if subscription is None:
+            self.unfiltered.add(client)
+            return
+        self.subscriptions[client] = subscription
+        for event_type in (subscription.types if subscription.types is not None else (None,)):
+            self.by_type.setdefault(event_type, set()).add(client)
+        for token_name in subscription.token_names or ():
+            self.by_token.setdefault(token_name, set()).add(client)
+
+    def remove(self, client: Hashable):
+        self.unfiltered.discard(client)
+        subscription = self.subscriptions.pop(client, None)
+        if subscription is None:
+            return
+        for key, index in ([(event_type, self.by_type) for event_type in (subscription.types or (None,))] +
+                           [(token_name, self.by_token) for token_name in subscription.token_names or ()]):
+            clients = index.get(key)
+            if clients is not None:
+                clients.discard(client)
+                if not clients:
+                    del index[key]
+
+    def recipients(self, event_type: Optional[str], data: Dict) -> List[Hashable]:
+        recipients = list(self.unfiltered)
+        candidates: Iterable[Hashable] = self.by_type.get(event_type, set()) | self.by_type.get(None, set())
+        if not candidates:
+            return recipients
+        tokens = event_tokens(data)
+        token_hits: Set[Hashable] = set()
+        for token_name in tokens:
+            token_hits |= self.by_token.get(token_name, set())
+        for client in candidates:
+            subscription = self.subscriptions[client]
+            if tokens and subscription.token_names is not None and client not in token_hits:
+                continue
+            if all(check(data) for check in subscription.checks):
+                recipients.append(client)
+        return recipients
+
+    def __len__(self) -> int:
+        return len(self.unfiltered) + len(self.subscriptions)
+
+    def stats(self) -> Dict:
+        return {
+            "unfiltered": len(self.unfiltered),
+            "subscribed": len(self.subscriptions),
+            "indexed_types": len(self.by_type),
+            "indexed_tokens": len(self.by_token),
+        }
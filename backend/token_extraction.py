@@ -0,0 +1,196 @@
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+# Words that turn a plain 2-10 letter word into a token mention ("WAGMI coin")
+TOKEN_KEYWORDS = (
+    'coin', 'token', 'gem', 'to the moon', 'moon', 'pump', 'lambo', 'rocket', 'bullish',
+    'bearish', 'hodl', 'diamond hands',
+)
+
+# Known meme coins, only counted when followed by a currency/place word ("PEPE dollar")
+KNOWN_MEME_TOKENS = (
+    'PEPE', 'DOGE', 'SHIB', 'BONK', 'WIF', 'FLOKI', 'MEME', 'APE', 'WOJAK', 'TURBO', 'BRETT',
+    'POPCAT', 'DEGEN', 'MEW', 'BOBO', 'PEPE2', 'LADYS', 'BABYDOGE', 'DOGELON', 'AKITA', 'KISHU',
+    'SAFEMOON', 'HOGE', 'NFD', 'ELON', 'MILADY', 'BEN', 'ANDY', 'BART', 'MATT', 'TOSHI',
+    'HOPPY', 'MUMU', 'BENJI', 'POKEMON', 'SPURDO', 'BODEN', 'MAGA', 'SLERF', 'BOOK', 'MYRO',
+    'PONKE', 'RETARDIO', 'GIGACHAD', 'CHAD', 'BASED',
+)
+
+MEME_SUFFIXES = (
+    'coin', 'token', 'crypto', 'currency', 'money', 'cash', 'dollar', 'euro', 'yen', 'pound',
+    'franc', 'mark', 'ruble', 'peso', 'real', 'rand', 'rupee', 'dinar', 'dirham', 'riyal',
+    'shekel', 'won', 'yuan', 'baht', 'dong', 'kip', 'kyat', 'taka', 'afghani', 'manat', 'som',
+    'tenge', 'lari', 'dram', 'leu', 'lev', 'kuna', 'koruna', 'zloty', 'forint', 'krona',
+    'krone', 'markka', 'guilder', 'punt', 'escudo', 'peseta', 'lira', 'drachma', 'denar',
+    'tolar', 'lat', 'litas', 'kroon', 'cedi', 'naira', 'shilling', 'birr', 'nakfa', 'leone',
+    'dalasi', 'ouguiya', 'pula', 'loti', 'lilangeni', 'kwacha', 'metical', 'ariary', 'colon',
+    'quetzal', 'lempira', 'cordoba', 'balboa', 'sucre', 'nuevo', 'guarani', 'uruguayo',
+    'boliviano', 'chileno', 'colombiano', 'venezolano', 'guyanese', 'surinamese', 'falkland',
+    'bermudian', 'cayman', 'jamaican', 'barbadian', 'trinidad', 'tobago', 'dominican',
+    'haitian', 'cuban', 'bahamian', 'canadian', 'american', 'mexican', 'guatemalan', 'belizean',
+    'salvadoran', 'honduran', 'nicaraguan', 'costa', 'rican', 'panamanian', 'ecuadorian',
+    'peruvian', 'brazilian', 'argentine', 'paraguayan', 'uruguayan', 'bolivian', 'chilean',
+    'colombian', 'venezuelan', 'guyanan', 'surinamer', 'french', 'british', 'spanish',
+    'portuguese', 'dutch', 'german', 'italian', 'swiss', 'austrian', 'belgian', 'luxembourg',
+    'monaco', 'andorran', 'san', 'marino', 'vatican', 'maltese', 'cypriot', 'greek',
+    'bulgarian', 'romanian', 'moldovan', 'ukrainian', 'belarusian', 'russian', 'estonian',
+    'latvian', 'lithuanian', 'polish', 'czech', 'slovak', 'hungarian', 'slovene', 'croatian',
+    'bosnian', 'serbian', 'montenegrin', 'albanian', 'macedonian', 'turkish', 'georgian',
+    'armenian', 'azerbaijani', 'kazakh', 'kyrgyz', 'tajik', 'turkmen', 'uzbek', 'afghan',
+    'pakistani', 'indian', 'bangladeshi', 'sri', 'lankan', 'maldivian', 'nepali', 'bhutanese',
+    'myanmar', 'thai', 'laotian', 'cambodian', 'vietnamese', 'malaysian', 'bruneian',
+    'singaporean', 'indonesian', 'timorese', 'filipino', 'taiwanese', 'chinese', 'japanese',
+    'south', 'korean', 'north', 'mongolian', 'australian', 'new', 'zealand', 'fijian', 'papua',
+    'guinean', 'solomon', 'vanuatu', 'samoa', 'tonga', 'tuvalu', 'kiribati', 'nauru',
+    'marshall', 'micronesian', 'palau', 'hawaiian', 'alaskan', 'puerto', 'virgin', 'guam',
+    'northern', 'mariana', 'cook', 'niue', 'tokelau', 'pitcairn', 'norfolk', 'christmas',
+    'cocos', 'keeling', 'heard', 'mcdonald', 'macquarie', 'antarctic', 'georgia', 'sandwich',
+    'tristan', 'cunha', 'ascension', 'saint', 'helena', 'mauritius', 'seychelles', 'comoros',
+    'madagascar', 'reunion', 'mayotte', 'kerguelen', 'crozet', 'amsterdam', 'paul', 'prince',
+    'edward', 'marion', 'bouvet', 'peter', 'ross', 'dependency', 'marie', 'byrd', 'land',
+    'queen', 'maud', 'enderby', 'kemp', 'mac', 'robertson', 'princess', 'elizabeth', 'wilhelm',
+    'kaiser', 'mary', 'wilkes', 'adelie', 'george', 'oates', 'victoria', 'magnetic', 'pole',
+    'geographic', 'equator', 'tropic', 'cancer', 'capricorn', 'arctic', 'circle', 'prime',
+    'meridian', 'international', 'date', 'line', 'greenwich', 'mean', 'time', 'coordinated',
+    'universal', 'daylight', 'saving', 'standard', 'zone', 'utc', 'gmt', 'est', 'cst', 'mst',
+    'pst', 'edt', 'cdt', 'mdt', 'pdt', 'ast', 'hst', 'akst', 'akdt', 'nst', 'ndt', 'atlantic',
+    'pacific', 'mountain', 'central', 'eastern', 'hawaii', 'alaska', 'newfoundland', 'yukon',
+    'columbia', 'alberta', 'saskatchewan', 'manitoba', 'ontario', 'quebec', 'brunswick', 'nova',
+    'scotia', 'island', 'northwest', 'territories', 'nunavut', 'washington', 'oregon',
+    'california', 'nevada', 'idaho', 'montana', 'wyoming', 'utah', 'colorado', 'arizona',
+    'mexico', 'dakota', 'nebraska', 'kansas', 'oklahoma', 'texas', 'minnesota', 'iowa',
+    'missouri', 'arkansas', 'louisiana', 'wisconsin', 'illinois', 'michigan', 'indiana', 'ohio',
+    'kentucky', 'tennessee', 'mississippi', 'alabama', 'west', 'virginia', 'maryland',
+    'delaware', 'pennsylvania', 'jersey', 'york', 'connecticut', 'rhode', 'massachusetts',
+    'vermont', 'hampshire', 'maine', 'florida', 'carolina', 'district', 'rico', 'islands',
+)
+
+_WORD_RE = re.compile(r'(\W*)(\w+)')
+
+# Characters matched by [A-Z] under re.IGNORECASE (ASCII plus İ, ı, ſ and the Kelvin sign)
+_TICKER_CHARS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzİıſK')
+
+# re.IGNORECASE folds İ to a plain i, whereas str.lower() appends a combining dot
+_FOLD_TABLE = {0x130: 'i'}
+
+_KEYWORD_END = None
+
+
+def build_token_patterns(keywords: Iterable[str] = TOKEN_KEYWORDS,
+                         meme_tokens: Iterable[str] = KNOWN_MEME_TOKENS,
+                         meme_suffixes: Iterable[str] = MEME_SUFFIXES) -> List[str]:
+    """Build the regex form of the extraction rules (kept as the reference definition)"""
+    keyword_alternation = '|'.join(keyword.replace(' ', r'\s+') for keyword in keywords)
+    return [
+        r'\$([A-Z]{2,10})\b',  # $TOKEN format
+        r'\b([A-Z]{2,10})(?:\s+(?:' + keyword_alternation + r'))\b',  # TOKEN coin/token
+        r'\b(' + '|'.join(meme_tokens) + r')(?:\s+(?:' + '|'.join(meme_suffixes) + r'))\b',
+    ]
+
+
+class TokenExtractor:
+    """Precompiled single-pass extractor equivalent to running build_token_patterns() with re.findall
+
+    The text is split into word runs once; every rule is then a hash lookup on a run, so the cost
+    per tweet is linear in its length regardless of how many coins or suffix words are configured.
+    """
+
+    def __init__(self, excluded_tokens: Optional[Set[str]] = None,
+                 keywords: Iterable[str] = TOKEN_KEYWORDS,
+                 meme_tokens: Iterable[str] = KNOWN_MEME_TOKENS,
+                 meme_suffixes: Iterable[str] = MEME_SUFFIXES):
+        # Kept by reference so later changes to the caller's set apply immediately
+        self.excluded_tokens = excluded_tokens if excluded_tokens is not None else set()
+        self.meme_tokens = frozenset(self._fold(token) for token in meme_tokens)
+        self.meme_suffixes = frozenset(self._fold(suffix) for suffix in meme_suffixes)
+        self.keyword_trie = self._build_keyword_trie(keywords)
+
+    @staticmethod
+    def _fold(word: str) -> str:
+        return word.translate(_FOLD_TABLE).lower()
+
+    def _build_keyword_trie(self, keywords: Iterable[str]) -> Dict:
+        """Word-level trie of keyword phrases; terminals store the phrase's alternation index"""
+        trie: Dict = {}
+        for index, keyword in enumerate(keywords):
+            node = trie
+            for word in keyword.split():
+                node = node.setdefault(self._fold(word), {})
+            node.setdefault(_KEYWORD_END, index)
+        return trie
+
+    def _match_keyword(self, gaps: List[str], folded: List[str], start: int) -> int:
+        """Return the index of the last word of the keyword phrase starting at folded[start], or -1"""
+        node = self.keyword_trie
+        best_index = None
+        best_end = -1
+        position = start
+        word_count = len(folded)
+        while True:
+            node = node.get(folded[position])
+            if node is None:
+                break
+            keyword_index = node.get(_KEYWORD_END)
+            # Regex alternation takes the first listed phrase that matches, not the longest
+            if keyword_index is not None and (best_index is None or keyword_index < best_index):
+                best_index = keyword_index
+                best_end = position
+            position += 1
+            if position >= word_count or not gaps[position].isspace():
+                break
+        return best_end
+
+    def extract(self, text: str) -> List[str]:
+        """Extract potential token names from text"""
+        text = text.upper()
+        # gaps[i] is the non-word run in front of words[i]; words are maximal \w runs
+        pairs = _WORD_RE.findall(text)
+        if not pairs:
+            return []
+        gaps = [gap for gap, _ in pairs]
+        words = [word for _, word in pairs]
+        if 'İ' in text:
+            folded = [word.translate(_FOLD_TABLE).lower() for word in words]
+        else:
+            folded = [word.lower() for word in words]
+
+        word_count = len(words)
+        keyword_starts = self.keyword_trie
+        meme_tokens = self.meme_tokens
+        meme_suffixes = self.meme_suffixes
+        found = set()
+        # Matches of one rule never overlap, like re.findall; these mark where each may resume
+        keyword_resume = 0
+        meme_resume = 0
+
+        for index in range(word_count):
+            word = words[index]
+            # $TOKEN
+            if gaps[index].endswith('$') and self._is_ticker(word):
+                found.add(word)
+
+            if index + 1 >= word_count or not gaps[index + 1].isspace():
+                continue
+            following = folded[index + 1]
+
+            # TOKEN coin/token/...
+            if index >= keyword_resume and following in keyword_starts and self._is_ticker(word):
+                keyword_end = self._match_keyword(gaps, folded, index + 1)
+                if keyword_end >= 0:
+                    found.add(word)
+                    keyword_resume = keyword_end + 1
+
+            # Known meme coin followed by a currency/place word
+            if index >= meme_resume and following in meme_suffixes and folded[index] in meme_tokens:
+                found.add(word)
+                meme_resume = index + 2
+
+        tokens = set()
+        for token in found:
+            if len(token) >= 2 and token not in self.excluded_tokens:
+                tokens.add(token.upper())
+        return list(tokens)
+
+    @staticmethod
+    def _is_ticker(word: str) -> bool:
+        return 2 <= len(word) <= 10 and _TICKER_CHARS.issuperset(word)
@@ -0,0 +1,136 @@
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from ca_index import normalize_token_name
+from mention_writer import as_utc
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM = re.compile(r'[^A-Z0-9]')
+
+
+def match_keys(text: str) -> List[str]:
+    """Lookup keys of a new token's name or symbol, exact form first
+
+    "$Pepe Coin 2" -> ["PEPECOIN2", "PEPECOIN"]: case, a leading $, spaces and punctuation are
+    ignored, and a trailing number (copycat launches like PEPE2) also looks up the base name.
+    Watched names are indexed under their exact form only, so PEPE2 never watches all of PEPE*.
+    """
+    canonical = _NON_ALNUM.sub('', normalize_token_name(text).lstrip('$'))
+    if not canonical:
+        return []
+    keys = [canonical]
+    base = canonical.rstrip('0123456789')
+    if base and base != canonical:
+        keys.append(base)
+    return keys
+
+
+class WatchedToken:
+    __slots__ = ('name', 'mention_count', 'source', 'watched_at', 'key')
+
+    def __init__(self, name: str, mention_count: int, source: str, watched_at: float):
+        self.name = normalize_token_name(name)
+        self.mention_count = mention_count
+        self.source = source
+        self.watched_at = watched_at
+        keys = match_keys(name)
+        self.key = keys[0] if keys else ''
+
+
+class TokenMatcher:
+    """Live index of name-alerted tokens, matched against every new pump.fun token
+
+    Each watched name is indexed under its exact key, so a `tokenCreate` frame costs at most
+    four dict lookups (name and symbol, exact and base form) and never a Mongo round-trip.
+    Fed from name alerts of both monitors and the active `ca_monitoring_queue` at startup;
+    a token is unwatched once it got its CA, or after `ttl_hours`.
+    """
+
+    def __init__(self, ttl_hours: float = 24):
+        self.ttl_seconds = ttl_hours * 3600
+        self.watched: Dict[str, WatchedToken] = {}
+        self.by_key: Dict[str, Set[str]] = {}
+        self.frames = 0
+        self.matches = 0
+
+    def __len__(self) -> int:
+        return len(self.watched)
+
+    def watch(self, token_name: str, mention_count: int = 0, source: str = 'name_alert',
+              watched_at: Optional[float] = None):
+        token = WatchedToken(token_name, mention_count, source, watched_at or time.time())
+        if not token.key:
+            return
+        existing = self.watched.get(token.name)
+        if existing:
+            existing.mention_count = max(existing.mention_count, mention_count)
+            existing.watched_at = max(existing.watched_at, token.watched_at)
+            return
+        self.watched[token.name] = token
+        self.by_key.setdefault(token.key, set()).add(token.name)
+
+    def unwatch(self, token_name: str) -> Optional[WatchedToken]:
+        token = self.watched.pop(normalize_token_name(token_name), None)
+        if token:
+            names = self.by_key.get(token.key)
+            if names:
+                names.discard(token.name)
+                if not names:
+                    del self.by_key[token.key]
+        return token
+
+    def _lookup(self, key: str, now: float) -> Optional[WatchedToken]:
+        best = None
+        for name in list(self.by_key.get(key, ())):
+            token = self.watched[name]
+            if now - token.watched_at > self.ttl_seconds:
+                self.unwatch(name)
+            elif best is None or token.mention_count > best.mention_count:
+                best = token
+        return best
+
+    def match(self, name: Optional[str], symbol: Optional[str] = None) -> Optional[Dict]:
+        """Best watched token for a new token's name/symbol: exact before base form, name before symbol"""
+        self.frames += 1
+        if not self.watched:
+            return None
+        now = time.time()
+        name_keys, symbol_keys = match_keys(name or ''), match_keys(symbol or '')
+        candidates = [(key, 'name', True) for key in name_keys[:1]] + [(key, 'symbol', True) for key in symbol_keys[:1]] + \
+                     [(key, 'name', False) for key in name_keys[1:]] + [(key, 'symbol', False) for key in symbol_keys[1:]]
+        for key, field, exact in candidates:
+            token = self._lookup(key, now)
+            if token:
+                self.matches += 1
+                return {
+                    "token": token,
+                    "matched_on": field,
+                    "match_type": 'exact' if exact else 'variant',
+                }
+        return None
+
+    async def load(self, db: AsyncIOMotorDatabase, exclude: Set[str] = frozenset()):
+        """Watch the active CA monitoring queue and recent name alerts; `exclude` are names that already have a CA"""
+        try:
+            since = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+            async for entry in db.ca_monitoring_queue.find({"status": "active"},
+                                                           {"token_name": 1, "mention_count": 1, "_id": 0}):
+                self.watch(entry.get('token_name', ''), entry.get('mention_count', 0), 'ca_queue')
+            async for alert in db.name_alerts.find({"created_at": {"$gte": since}},
+                                                   {"token_name": 1, "quorum_count": 1, "created_at": 1, "_id": 0}):
+                self.watch(alert.get('token_name', ''), alert.get('quorum_count', 0), 'name_alert',
+                           as_utc(alert['created_at']).timestamp())
+            for token_name in [name for name in self.watched if name in exclude]:
+                self.unwatch(token_name)
+            logger.info(f"Token matcher watching {len(self.watched)} names")
+        except Exception as e:
+            logger.error(f"Error loading token matcher: {e}")
+
+    def stats(self) -> Dict:
+        return {"watched": len(self.watched), "keys": len(self.by_key), "frames": self.frames, "matches": self.matches}
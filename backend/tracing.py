@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages in the order they usually happen; alerts are broadcast before they are persisted
+STAGES = ('observed', 'extracted', 'quorum', 'ca_matched', 'persisted', 'first_send', 'last_send')
+ALERT_COLLECTIONS = {"name": "name_alerts", "ca": "ca_alerts"}
+
+
+class AlertTrace:
+    """Monotonic stage offsets (ms since the source was observed) for one alert"""
+    __slots__ = ('alert_id', 'kind', 'started_at', 'started_monotonic', 'stages', 'client_sends_ms',
+                 'client_sends', 'expected_sends', 'is_persisted')
+
+    def __init__(self, alert_id: str, kind: str, observed_at: Optional[float] = None):
+        now = time.monotonic()
+        self.alert_id = alert_id
+        self.kind = kind
+        self.started_monotonic = observed_at if observed_at is not None else now
+        # Wall clock of the observation, for lining traces up with logs
+        self.started_at = datetime.now(timezone.utc).timestamp() - (now - self.started_monotonic)
+        self.stages: Dict[str, float] = {'observed': 0.0}
+        self.client_sends_ms: List[float] = []
+        self.client_sends = 0
+        self.expected_sends: Optional[int] = None
+        self.is_persisted = False
+
+    def mark(self, stage: str, at: Optional[float] = None):
+        self.stages[stage] = round(((at if at is not None else time.monotonic()) - self.started_monotonic) * 1000, 3)
+
+    @property
+    def is_complete(self) -> bool:
+        return self.is_persisted and self.expected_sends is not None and self.client_sends >= self.expected_sends
+
+    def to_document(self) -> Dict:
+        return {
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc),
+            "stages_ms": dict(self.stages),
+            "client_sends_ms": list(self.client_sends_ms),
+            "client_sends": self.client_sends,
+        }
+
+
+def percentile_summary(values: List[float]) -> Dict:
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+
+    def at(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    return {"count": len(ordered), "p50_ms": at(0.5), "p90_ms": at(0.9), "p99_ms": at(0.99), "max_ms": ordered[-1]}
+
+
+class AlertTracer:
+    """Collects per-alert stage timestamps and writes the finished trace onto the alert document
+
+    A trace is finished once the alert is persisted and every queued client send went out, or
+    after `completion_timeout_seconds` (dropped frames, disconnected clients). Finished traces
+    are written back in one bulk_write per collection on each flush.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, completion_timeout_seconds: float = 30,
+                 flush_interval_seconds: float = 1.0, max_client_sends: int = 100):
+        self.db = db
+        self.completion_timeout_seconds = completion_timeout_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_client_sends = max_client_sends
+        self.active: Dict[str, AlertTrace] = {}
+        self.finished: List[AlertTrace] = []
+        self.task: Optional[asyncio.Task] = None
+        self.traces_written = 0
+
+    def start(self, alert_id: str, kind: str, observed_at: Optional[float] = None) -> AlertTrace:
+        trace = self.active[alert_id] = AlertTrace(alert_id, kind, observed_at)
+        return trace
+
+    def get(self, alert_id: str) -> Optional[AlertTrace]:
+        return self.active.get(alert_id)
+
+    def snapshot(self, alert_id: str) -> Optional[Dict]:
+        """Trace as known so far, for storing with the alert"""
+        trace = self.active.get(alert_id)
+        return trace.to_document() if trace else None
+
+    def mark(self, alert_id: str, stage: str, at: Optional[float] = None):
+        trace = self.active.get(alert_id)
+        if trace:
+            trace.mark(stage, at)
+
+    def mark_persisted(self, alert_ids: Iterable[str]):
+        now = time.monotonic()
+        for alert_id in alert_ids:
+            trace = self.active.get(alert_id)
+            if trace:
+                trace.mark('persisted', now)
+                trace.is_persisted = True
+                self._finish_if_complete(trace)
+
+    def expect_sends(self, alert_id: str, count: int):
+        """Number of client sends queued for the alert's broadcast"""
+        trace = self.active.get(alert_id)
+        if trace:
+            trace.expected_sends = count
+            self._finish_if_complete(trace)
+
+    def record_send(self, alert_id: str):
+        """Called by the broadcaster after a client was sent the alert"""
+        trace = self.active.get(alert_id)
+        if not trace:
+            return
+        offset = round((time.monotonic() - trace.started_monotonic) * 1000, 3)
+        if not trace.client_sends:
+            trace.stages['first_send'] = offset
+        trace.stages['last_send'] = offset
+        trace.client_sends += 1
+        if len(trace.client_sends_ms) < self.max_client_sends:
+            trace.client_sends_ms.append(offset)
+        self._finish_if_complete(trace)
+
+    def _finish_if_complete(self, trace: AlertTrace):
+        if trace.is_complete:
+            self.finished.append(self.active.pop(trace.alert_id))
+
+    def run(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            await self.flush()
+
+    async def flush(self, finish_all: bool = False):
+        """Write finished traces; traces past the timeout (or all, on shutdown) are finished as they are"""
+        cutoff = time.monotonic() - self.completion_timeout_seconds
+        for alert_id, trace in list(self.active.items()):
+            if finish_all or trace.started_monotonic < cutoff:
+                self.finished.append(self.active.pop(alert_id))
+        if not self.finished:
+            return
+
+        finished, self.finished = self.finished, []
+        by_collection: Dict[str, List[UpdateOne]] = {}
+        for trace in finished:
+            by_collection.setdefault(ALERT_COLLECTIONS[trace.kind], []).append(
+                UpdateOne({"id": trace.alert_id}, {"$set": {"trace": trace.to_document()}})
+            )
+        for collection_name, operations in by_collection.items():
+            try:
+                await self.db[collection_name].bulk_write(operations, ordered=False)
+                self.traces_written += len(operations)
+            except Exception as e:
+                logger.error(f"Error writing {len(operations)} alert traces to {collection_name}: {e}")
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        await self.flush(finish_all=True)
+
+    async def latency_breakdown(self, kind: str, since: Optional[datetime] = None, limit: int = 5000) -> Dict:
+        """Per-stage percentiles of stored traces: offset from observation, and time spent between stages"""
+        query = {"trace": {"$exists": True}}
+        if since is not None:
+            query["created_at"] = {"$gte": since}
+        documents = await self.db[ALERT_COLLECTIONS[kind]].find(query, {"trace": 1, "_id": 0}) \
+            .sort("created_at", -1).limit(limit).to_list(limit)
+
+        offsets: Dict[str, List[float]] = {}
+        segments: Dict[str, List[float]] = {}
+        sends: List[float] = []
+        for document in documents:
+            stages = document['trace'].get('stages_ms', {})
+            for stage, offset in stages.items():
+                offsets.setdefault(stage, []).append(offset)
+            ordered = sorted(stages.items(), key=lambda item: (item[1], STAGES.index(item[0]) if item[0] in STAGES else 0))
+            for (previous, previous_offset), (stage, offset) in zip(ordered, ordered[1:]):
+                segments.setdefault(f"{previous}->{stage}", []).append(round(offset - previous_offset, 3))
+            sends.extend(document['trace'].get('client_sends_ms', []))
+
+        stage_order = {stage: index for index, stage in enumerate(STAGES)}
+        return {
+            "kind": kind,
+            "alerts": len(documents),
+            "stage_offsets": {stage: percentile_summary(offsets[stage])
+                              for stage in sorted(offsets, key=lambda stage: stage_order.get(stage, len(STAGES)))},
+            "stage_durations": {segment: percentile_summary(values) for segment, values in segments.items()},
+            "client_sends": percentile_summary(sends),
+        }
+
+    def stats(self) -> Dict:
+        return {"active": len(self.active), "pending_write": len(self.finished), "written": self.traces_written}
@@ -0,0 +1,155 @@
+import hashlib
+import logging
+import math
+import re
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Union
+
+from bson import Binary
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+_STATUS_ID = re.compile(r'/status(?:es)?/(\d+)')
+STATE_ID = 'seen_tweets'
+
+
+def status_id(tweet: Union[str, int]) -> Optional[int]:
+    """Numeric status ID of a tweet URL (or an ID passed as int/str)"""
+    if isinstance(tweet, int):
+        return tweet
+    tweet = str(tweet or '')
+    if tweet.isdigit():
+        return int(tweet)
+    match = _STATUS_ID.search(tweet)
+    return int(match.group(1)) if match else None
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over status IDs (k probes derived from one blake2b digest)"""
+
+    def __init__(self, capacity: int, error_rate: float = 1e-4, bits: Optional[bytearray] = None):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.size -= self.size % 8
+        self.probes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bits if bits is not None and len(bits) * 8 == self.size else bytearray(self.size // 8)
+
+    def _positions(self, key: int):
+        digest = hashlib.blake2b(key.to_bytes(8, 'big', signed=False), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return ((first + probe * second) % self.size for probe in range(self.probes))
+
+    def add(self, key: int):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: int) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class SeenTweets:
+    """Status IDs already processed, so repeated polls never re-extract or re-count a tweet
+
+    The most recent `capacity` IDs are kept exactly in an LRU. With `bloom_capacity` set, every
+    ID also goes into a Bloom filter that remembers far more at a few bytes per ID, at the cost
+    of skipping roughly `bloom_error_rate` of genuinely new tweets. Both are persisted in the
+    `tweet_dedup` collection and restored on start.
+    """
+
+    def __init__(self, capacity: int = 100000, bloom_capacity: int = 0, bloom_error_rate: float = 1e-4):
+        self.capacity = capacity
+        self.recent: "OrderedDict[int, None]" = OrderedDict()
+        self.bloom = BloomFilter(bloom_capacity, bloom_error_rate) if bloom_capacity else None
+        self.hits = 0
+        self.bloom_hits = 0
+        self.misses = 0
+        self.dirty = False
+        self.saved_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.recent)
+
+    def seen(self, tweet: Union[str, int]) -> bool:
+        """True if the tweet was processed before
+
+        Looking a tweet up does not remember it: call add() once its mentions are safely
+        recorded, so a check that fails part-way refetches and reprocesses it.
+        """
+        key = status_id(tweet)
+        if key is None:
+            return False  # no ID to dedup on; let the URL-keyed mention writer catch repeats
+        if key in self.recent:
+            self.recent.move_to_end(key)
+            self.hits += 1
+            return True
+        if self.bloom is not None and key in self.bloom:
+            self.bloom_hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def add(self, tweet: Union[str, int]):
+        """Remember a processed tweet"""
+        key = status_id(tweet)
+        if key is not None and key not in self.recent:
+            self._remember(key)
+
+    def _remember(self, key: int):
+        self.recent[key] = None
+        if len(self.recent) > self.capacity:
+            self.recent.popitem(last=False)
+        if self.bloom is not None:
+            self.bloom.add(key)
+        self.dirty = True
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.bloom_hits + self.misses
+        return (self.hits + self.bloom_hits) / lookups if lookups else 0.0
+
+    async def load(self, db: AsyncIOMotorDatabase):
+        try:
+            state = await db.tweet_dedup.find_one({"_id": STATE_ID})
+            if not state:
+                return
+            ids = array('Q')
+            ids.frombytes(bytes(state.get('ids', b'')))
+            for key in ids[-self.capacity:]:
+                self.recent[key] = None
+            if self.bloom is not None and state.get('bloom_size') == self.bloom.size:
+                self.bloom.bits = bytearray(state['bloom'])
+            self.dirty = False
+            logger.info(f"Restored {len(self.recent)} seen tweet IDs")
+        except Exception as e:
+            logger.error(f"Error loading seen tweet IDs: {e}")
+
+    async def save(self, db: AsyncIOMotorDatabase):
+        """Persist the LRU (oldest first, 8 bytes per ID) and the Bloom filter if anything changed"""
+        if not self.dirty:
+            return
+        try:
+            state = {
+                "ids": Binary(array('Q', self.recent.keys()).tobytes()),
+                "saved_at": datetime.now(timezone.utc),
+            }
+            if self.bloom is not None:
+                state.update({"bloom": Binary(bytes(self.bloom.bits)), "bloom_size": self.bloom.size})
+            await db.tweet_dedup.replace_one({"_id": STATE_ID}, state, upsert=True)
+            self.dirty = False
+            self.saved_at = time.time()
+        except Exception as e:
+            logger.error(f"Error saving seen tweet IDs: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "remembered": len(self.recent),
+            "capacity": self.capacity,
+            "bloom_bytes": len(self.bloom.bits) if self.bloom is not None else 0,
+            "hits": self.hits,
+            "bloom_hits": self.bloom_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+        }
@@ -1,16 +1,45 @@
 import asyncio
 import logging
-import re
 import os
+import time
+import uuid
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Set
-from playwright.async_api import async_playwright, Browser, Page
+from pathlib import Path
+from typing import Awaitable, Callable, List, Dict, Set
+from playwright.async_api import Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 import aiohttp
 from bs4 import BeautifulSoup
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+from token_extraction import TokenExtractor, build_token_patterns
+from ca_index import CAIndex, normalize_token_name
+from quorum import QuorumWindow
+from polling import PollingScheduler, TokenBucket
+from browser_pool import BrowserPool
+from following_sync import FollowingCollector, FollowingSync, is_following_response
+from session_store import SessionStore, session_cookies_valid
+from challenges import ChallengeBroker
+from token_matcher import TokenMatcher
+from tweet_dedup import SeenTweets
+from account_cursors import AccountCursors
+from mention_sources import SimulatedTimelineSource, fetch_from_sources
+from mention_writer import MentionWriter, as_utc
+from alert_store import AlertStore
+from cadence import AdaptiveCadence
+from metrics import account_check_seconds, monitoring_cycle_seconds, mention_to_name_alert_seconds
+from tracing import AlertTracer
 
 logger = logging.getLogger(__name__)
 
+# Inputs of the X login flow steps (username, email/phone or code, password)
+LOGIN_STEP_SELECTORS = (
+    'input[autocomplete="username"]',
+    'input[data-testid="ocfEnterTextTextInput"]',
+    'input[name="text"]',
+    'input[name="password"]',
+)
+
 class TokenCA:
     """Represents a token with its contract address"""
     def __init__(self, name: str, ca: str, timestamp: datetime = None):
@@ -19,70 +48,95 @@ class TokenCA:
         self.timestamp = timestamp or datetime.now(timezone.utc)
 
 class RealTimeXMonitor:
-    def __init__(self, db: AsyncIOMotorDatabase, alert_threshold: int = 2):
+    """The one X monitoring engine: polls accounts, counts mentions to quorum and raises name alerts
+
+    Tweets come from pluggable `mention_sources` (see mention_sources.py); mentions posted to
+    the API enter through `ingest_mention()`. Both feed the same in-memory quorum window and
+    the same alert path, which stores the alert and always broadcasts it.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, alert_threshold: int = 2, ca_index: CAIndex = None,
+                 tracer: AlertTracer = None, challenges: ChallengeBroker = None, token_matcher: TokenMatcher = None,
+                 mention_writer: MentionWriter = None, alert_store: AlertStore = None,
+                 broadcast: Callable[..., Awaitable] = None, mention_sources: List = None):
         self.db = db
+        self.ca_index = ca_index or CAIndex(db)
+        self.tracer = tracer or AlertTracer(db)
         self.alert_threshold = alert_threshold
-        self.browser: Browser = None
-        self.page: Page = None
+        # Pooled Chromium pages shared by all scrapes (recycled by navigation count and memory)
+        self.browser_pool = BrowserPool(
+            size=int(os.getenv('BROWSER_POOL_SIZE', '4')),
+            max_navigations=int(os.getenv('BROWSER_PAGE_MAX_NAVIGATIONS', '50')),
+            rss_budget_mb=float(os.getenv('BROWSER_RSS_BUDGET_MB', '1500')),
+            lean=os.getenv('BROWSER_LEAN_MODE', 'true').lower() != 'false'
+        )
+        self.following_sync = FollowingSync(db)
+        # Verification codes asked during login are answered via /api/x/challenges or the WebSocket
+        self.challenges = challenges or ChallengeBroker()
+        self.verification_timeout_seconds = float(os.getenv('X_VERIFICATION_TIMEOUT_SECONDS', '600'))
+        # Logged-in storage state, encrypted on disk so restarts skip the login flow
+        self.session_store = SessionStore(
+            Path(os.getenv('X_SESSION_FILE', str(Path(__file__).parent / '.x_session'))),
+            os.getenv('X_SESSION_KEY') or os.getenv('X_PASSWORD')
+        )
         self.is_monitoring = False
         self.monitored_accounts = []
         self.known_tokens_with_ca: Set[str] = set()
-        self.token_mentions_cache = {}
+        self.token_mentions_cache = QuorumWindow(window_seconds=3600, threshold=alert_threshold)
         self.last_check_time = datetime.now(timezone.utc) - timedelta(hours=1)
         self.ca_watchlist: Set[str] = set()  # Active tokens to monitor for CAs
+        # Shared with the pump.fun matcher so new tokens are checked against these alerts too
+        self.token_matcher = token_matcher or TokenMatcher()
+        # Status IDs already processed; repeated polls skip them before extraction
+        self.seen_tweets = SeenTweets(
+            capacity=int(os.getenv('TWEET_DEDUP_CAPACITY', '100000')),
+            bloom_capacity=int(os.getenv('TWEET_DEDUP_BLOOM_CAPACITY', '0'))
+        )
+        # Newest processed status ID per account; checks only fetch tweets above it
+        self.cursors = AccountCursors()
+        # Where tweets come from, and where mentions and alerts go
+        self.mention_sources = mention_sources or [SimulatedTimelineSource()]
+        self.mention_writer = mention_writer
+        self.alert_store = alert_store
+        self.broadcast = broadcast
         
-        # Advanced token patterns for meme coins
-        self.token_patterns = [
-            r'\$([A-Z]{2,10})\b',  # $TOKEN format
-            r'\b([A-Z]{2,10})(?:\s+(?:coin|token|gem|to\s+the\s+moon|moon|pump|lambo|rocket|bullish|bearish|hodl|diamond\s+hands))\b',
-            r'\b(PEPE|DOGE|SHIB|BONK|WIF|FLOKI|MEME|APE|WOJAK|TURBO|BRETT|POPCAT|DEGEN|MEW|BOBO|PEPE2|LADYS|BABYDOGE|DOGELON|AKITA|KISHU|SAFEMOON|HOGE|NFD|ELON|MILADY|BEN|ANDY|BART|MATT|TOSHI|HOPPY|MUMU|BENJI|POKEMON|SPURDO|BODEN|MAGA|SLERF|BOOK|MYRO|PONKE|RETARDIO|GIGACHAD|CHAD|BASED|WOJAK)(?:\s+(?:coin|token|crypto|currency|money|cash|dollar|euro|yen|pound|franc|mark|ruble|peso|real|rand|rupee|dinar|dirham|riyal|shekel|won|yuan|yen|baht|dong|kip|kyat|taka|afghani|manat|som|tenge|lari|dram|leu|lev|kuna|koruna|zloty|forint|krona|krone|markka|guilder|punt|escudo|peseta|lira|drachma|denar|tolar|lat|litas|kroon|cedi|naira|shilling|birr|nakfa|leone|dalasi|ouguiya|franc|dinar|pound|pula|loti|lilangeni|rand|kwacha|metical|ariary|rupee|dollar|franc|peso|colon|quetzal|lempira|cordoba|balboa|sucre|nuevo|real|guarani|peso|uruguayo|boliviano|chileno|colombiano|venezolano|guyanese|surinamese|falkland|bermudian|cayman|jamaican|barbadian|trinidad|tobago|dominican|haitian|cuban|bahamian|canadian|american|mexican|guatemalan|belizean|salvadoran|honduran|nicaraguan|costa|rican|panamanian|ecuadorian|peruvian|brazilian|argentine|paraguayan|uruguayan|bolivian|chilean|colombian|venezuelan|guyanan|surinamer|french|british|spanish|portuguese|dutch|german|italian|swiss|austrian|belgian|luxembourg|monaco|andorran|san|marino|vatican|maltese|cypriot|greek|bulgarian|romanian|moldovan|ukrainian|belarusian|russian|estonian|latvian|lithuanian|polish|czech|slovak|hungarian|slovene|croatian|bosnian|serbian|montenegrin|albanian|macedonian|turkish|georgian|armenian|azerbaijani|kazakh|kyrgyz|tajik|turkmen|uzbek|afghan|pakistani|indian|bangladeshi|sri|lankan|maldivian|nepali|bhutanese|myanmar|thai|laotian|cambodian|vietnamese|malaysian|bruneian|singaporean|indonesian|timorese|filipino|taiwanese|chinese|japanese|south|korean|north|korean|mongolian|australian|new|zealand|fijian|papua|guinean|solomon|vanuatu|samoa|tonga|tuvalu|kiribati|nauru|marshall|micronesian|palau|hawaiian|alaskan|puerto|rican|virgin|guam|samoa|northern|mariana|cook|niue|tokelau|pitcairn|norfolk|christmas|cocos|keeling|heard|mcdonald|macquarie|antarctic|falkland|south|georgia|sandwich|tristan|cunha|ascension|saint|helena|mauritius|seychelles|comoros|madagascar|reunion|mayotte|kerguelen|crozet|amsterdam|saint|paul|prince|edward|marion|bouvet|peter|macquarie|heard|mcdonald|antarctic|ross|dependency|marie|byrd|land|queen|maud|land|enderby|land|kemp|land|mac|robertson|land|princess|elizabeth|land|wilhelm|kaiser|land|queen|mary|land|wilkes|land|adelie|land|george|land|oates|land|victoria|land|south|magnetic|pole|north|magnetic|pole|geographic|south|pole|geographic|north|pole|equator|tropic|cancer|capricorn|arctic|circle|antarctic|circle|prime|meridian|international|date|line|greenwich|mean|time|coordinated|universal|time|daylight|saving|time|standard|time|time|zone|utc|gmt|est|cst|mst|pst|edt|cdt|mdt|pdt|ast|hst|akst|akdt|nst|ndt|atlantic|pacific|mountain|central|eastern|hawaii|alaska|newfoundland|yukon|british|columbia|alberta|saskatchewan|manitoba|ontario|quebec|new|brunswick|nova|scotia|prince|edward|island|northwest|territories|nunavut|washington|oregon|california|nevada|idaho|montana|wyoming|utah|colorado|arizona|new|mexico|north|dakota|south|dakota|nebraska|kansas|oklahoma|texas|minnesota|iowa|missouri|arkansas|louisiana|wisconsin|illinois|michigan|indiana|ohio|kentucky|tennessee|mississippi|alabama|west|virginia|virginia|maryland|delaware|pennsylvania|new|jersey|new|york|connecticut|rhode|island|massachusetts|vermont|new|hampshire|maine|florida|georgia|south|carolina|north|carolina|hawaii|alaska|district|columbia|puerto|rico|virgin|islands|guam|american|samoa|northern|mariana|islands))\b'
-        ]
+        # Account checks run concurrently under one shared X request budget
+        self.check_interval_seconds = 30
+        self.rate_limiter = TokenBucket(rate=4.0)
+        self.poller = PollingScheduler(self.check_account_for_tokens, self.rate_limiter, max_concurrency=8,
+                                      check_histogram=account_check_seconds)
+        
+        # Per-account polling intervals learned from mention history
+        self.adaptive_polling = True
+        self.cadence = AdaptiveCadence(min_interval_seconds=self.check_interval_seconds)
+        
+        # Advanced token patterns for meme coins (reference form of the extraction rules)
+        self.token_patterns = build_token_patterns()
         
         # Known old/established tokens to filter out
         self.established_tokens = {
             'BTC', 'ETH', 'BNB', 'ADA', 'SOL', 'XRP', 'USDT', 'USDC', 'BUSD', 'MATIC', 'AVAX', 'DOT', 'UNI', 'LINK', 'ATOM', 'ICP', 'LTC', 'BCH', 'FIL', 'ALGO', 'VET', 'ETC', 'THETA', 'AAVE', 'MKR', 'COMP', 'SUSHI', 'SNX', 'YFI', 'CRV', 'BAL', '1INCH'
         }
+        
+        # Compiled once; runs all token patterns in a single pass over the text
+        self.token_extractor = TokenExtractor(self.established_tokens)
 
     async def initialize_browser(self):
-        """Initialize Playwright browser for X monitoring with stealth settings"""
+        """Start the pooled Playwright browser for X monitoring with stealth settings"""
         try:
-            playwright = await async_playwright().start()
-            self.browser = await playwright.chromium.launch(
-                headless=True,  # Must be headless in container
-                args=[
-                    '--no-sandbox',
-                    '--disable-dev-shm-usage',
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-features=VizDisplayCompositor',
-                    '--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    '--disable-web-security',
-                    '--start-maximized'
-                ]
-            )
-            
-            # Create context with additional stealth
-            context = await self.browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-            
-            self.page = await context.new_page()
-            
-            # Add stealth scripts
-            await self.page.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined,
-                });
-            """)
-            
+            if self.browser_pool.storage_state is None:
+                storage_state = await asyncio.to_thread(self.session_store.load)
+                if session_cookies_valid(storage_state):
+                    self.browser_pool.set_storage_state(storage_state)
+            await self.browser_pool.start()
             logger.info("Browser initialized successfully (headless mode)")
             return True
         except Exception as e:
             logger.error(f"Failed to initialize browser: {e}")
             return False
 
-    async def login_to_x(self):
-        """Login to X/Twitter with email verification handling"""
+    async def login_to_x(self, page: Page):
+        """Login to X/Twitter on a pooled page with email verification handling"""
         try:
             x_username = os.getenv('X_USERNAME')
             x_password = os.getenv('X_PASSWORD')
@@ -94,9 +148,9 @@ class RealTimeXMonitor:
             
             logger.info(f"Attempting to login to X as {x_username}...")
             
-            # Navigate to X login page
-            await self.page.goto('https://x.com/i/flow/login', wait_until='load', timeout=30000)
-            await self.page.wait_for_timeout(5000)
+            # Navigate to X login page; ready as soon as the username field renders
+            await self.browser_pool.navigate(page, 'https://x.com/i/flow/login',
+                                             wait_for_selector=', '.join(LOGIN_STEP_SELECTORS))
             
             # Step 1: Enter username
             username_input = None
@@ -108,7 +162,7 @@ class RealTimeXMonitor:
             
             for selector in selectors_to_try:
                 try:
-                    username_input = await self.page.wait_for_selector(selector, timeout=5000)
+                    username_input = await page.wait_for_selector(selector, timeout=5000)
                     if username_input:
                         logger.info(f"Found username input")
                         break
@@ -121,7 +175,6 @@ class RealTimeXMonitor:
             
             await username_input.fill(x_username)
             logger.info("Username entered")
-            await self.page.wait_for_timeout(1000)
             
             # Click Next
             next_clicked = False
@@ -133,7 +186,7 @@ class RealTimeXMonitor:
             
             for selector in next_selectors:
                 try:
-                    await self.page.click(selector, timeout=3000)
+                    await page.click(selector, timeout=3000)
                     next_clicked = True
                     logger.info("Clicked Next")
                     break
@@ -144,11 +197,11 @@ class RealTimeXMonitor:
                 logger.error("Could not click Next button")
                 return False
             
-            await self.page.wait_for_timeout(3000)
+            await self._wait_for_login_step(page, username_input)
             
             # Step 2: Handle email verification if present
             try:
-                page_content = await self.page.content()
+                page_content = await page.content()
                 
                 # Check for email verification step
                 if ("email" in page_content.lower() or 
@@ -168,7 +221,7 @@ class RealTimeXMonitor:
                     
                     for selector in email_selectors:
                         try:
-                            email_input = await self.page.wait_for_selector(selector, timeout=3000)
+                            email_input = await page.wait_for_selector(selector, timeout=3000)
                             if email_input and x_email:
                                 logger.info("Found email verification input")
                                 await email_input.fill(x_email)
@@ -180,38 +233,30 @@ class RealTimeXMonitor:
                     # Click Next after email
                     for selector in next_selectors:
                         try:
-                            await self.page.click(selector, timeout=3000)
+                            await page.click(selector, timeout=3000)
                             logger.info("Clicked Next after email verification")
                             break
                         except:
                             continue
                     
-                    await self.page.wait_for_timeout(3000)
+                    await self._wait_for_login_step(page, email_input)
                     
                     # Check if verification code is needed
-                    page_content_after = await self.page.content()
+                    page_content_after = await page.content()
                     
                     if ("code" in page_content_after.lower() or 
                         "verify" in page_content_after.lower() or
                         "confirmation" in page_content_after.lower()):
                         
                         logger.info("🔢 Verification code step detected")
-                        logger.info("📧 Please check your ProtonMail for the verification code")
-                        
-                        # Pause here and ask for code from user
-                        print("\n" + "="*60)
-                        print("🔐 X LOGIN: VERIFICATION CODE REQUIRED")
-                        print("📧 Check your ProtonMail inbox: sploofmeme@protonmail.com")
-                        print("🔍 Look for email from X/Twitter with verification code")
-                        print("="*60)
-                        
-                        # In a real implementation, this would be handled via API call
-                        # For now, we'll need to implement a way to get the code
-                        verification_code = input("Enter the verification code from email: ").strip()
+                        # Suspend only this login until the code is submitted over the API
+                        verification_code = await self.challenges.request(
+                            "x_verification_code",
+                            f"Enter the verification code X sent to {x_email or 'the account email'}",
+                            timeout_seconds=self.verification_timeout_seconds
+                        )
                         
                         if verification_code and len(verification_code) >= 6:
-                            logger.info(f"📥 Received verification code: {verification_code}")
-                            
                             # Look for verification code input
                             code_input = None
                             code_selectors = [
@@ -224,11 +269,11 @@ class RealTimeXMonitor:
                             
                             for selector in code_selectors:
                                 try:
-                                    code_input = await self.page.wait_for_selector(selector, timeout=3000)
+                                    code_input = await page.wait_for_selector(selector, timeout=3000)
                                     if code_input:
                                         logger.info("Found verification code input")
                                         await code_input.fill(verification_code)
-                                        logger.info(f"Verification code entered: {verification_code}")
+                                        logger.info("Verification code entered")
                                         break
                                 except:
                                     continue
@@ -236,13 +281,13 @@ class RealTimeXMonitor:
                             # Click Next after verification code
                             for selector in next_selectors:
                                 try:
-                                    await self.page.click(selector, timeout=3000)
+                                    await page.click(selector, timeout=3000)
                                     logger.info("Clicked Next after verification code")
                                     break
                                 except:
                                     continue
                             
-                            await self.page.wait_for_timeout(3000)
+                            await self._wait_for_login_step(page, code_input)
                         else:
                             logger.error("❌ No verification code provided or invalid format")
                             return False
@@ -260,7 +305,7 @@ class RealTimeXMonitor:
             
             for selector in password_selectors:
                 try:
-                    password_input = await self.page.wait_for_selector(selector, timeout=10000)
+                    password_input = await page.wait_for_selector(selector, timeout=10000)
                     if password_input:
                         logger.info("Found password input")
                         break
@@ -273,7 +318,6 @@ class RealTimeXMonitor:
             
             await password_input.fill(x_password)
             logger.info("Password entered")
-            await self.page.wait_for_timeout(1000)
             
             # Step 4: Click Log in
             login_clicked = False
@@ -285,7 +329,7 @@ class RealTimeXMonitor:
             
             for selector in login_selectors:
                 try:
-                    await self.page.click(selector, timeout=3000)
+                    await page.click(selector, timeout=3000)
                     login_clicked = True
                     logger.info("Clicked Log in")
                     break
@@ -296,10 +340,13 @@ class RealTimeXMonitor:
                 logger.error("Could not click Log in button")
                 return False
             
-            # Step 5: Wait for login completion and check success
-            await self.page.wait_for_timeout(8000)
+            # Step 5: Wait for the login flow to leave /i/flow, then check success
+            try:
+                await page.wait_for_url(lambda url: '/flow/' not in url and 'login' not in url, timeout=15000)
+            except PlaywrightTimeoutError:
+                pass  # judged from the URL below
             
-            current_url = self.page.url
+            current_url = page.url
             logger.info(f"Current URL after login: {current_url}")
             
             # Check for successful login indicators
@@ -311,10 +358,15 @@ class RealTimeXMonitor:
             
             if any(success_indicators):
                 logger.info("✅ Successfully logged into X!")
+                # Every pooled context starts from this session from now on, also after restarts
+                storage_state = await page.context.storage_state()
+                self.browser_pool.set_storage_state(storage_state)
+                await self.browser_pool.refresh_contexts()
+                await asyncio.to_thread(self.session_store.save, storage_state)
                 return True
             else:
                 # Check if still on verification or login page
-                page_content = await self.page.content()
+                page_content = await page.content()
                 if "verify" in page_content.lower():
                     logger.error("❌ Login stuck on verification step - may need manual email confirmation")
                 else:
@@ -325,13 +377,36 @@ class RealTimeXMonitor:
             logger.error(f"Login error: {e}")
             return False
 
+    @staticmethod
+    def _on_login_page(page: Page) -> bool:
+        return '/i/flow/login' in page.url or page.url.rstrip('/').endswith('/login')
+
+    async def _login_or_fallback(self, page: Page) -> bool:
+        """Run the login flow; switch to the fallback account list if it fails"""
+        logger.info("🔐 Logging in to X...")
+        if await self.login_to_x(page):
+            logger.info("✅ Login successful! Now getting real following list...")
+            return True
+        logger.error("❌ Login failed - cannot get real following list")
+        logger.info("Using enhanced fallback until login issue resolved")
+        await self._use_enhanced_fallback()
+        return False
+
+    async def _wait_for_login_step(self, page: Page, previous_input=None, timeout_ms: float = 10000):
+        """Wait for the login flow to move on: the previous step's input detaches and the next one renders"""
+        try:
+            if previous_input is not None:
+                await previous_input.wait_for_element_state('hidden', timeout=timeout_ms)
+            await page.wait_for_selector(', '.join(LOGIN_STEP_SELECTORS), timeout=timeout_ms)
+        except PlaywrightTimeoutError:
+            logger.debug("Login step did not change in time")
+        except Exception as e:
+            logger.debug(f"Waiting for login step: {e}")
+
     async def close_browser(self):
         """Close browser resources"""
         try:
-            if self.page:
-                await self.page.close()
-            if self.browser:
-                await self.browser.close()
+            await self.browser_pool.close()
             logger.info("Browser closed successfully")
         except Exception as e:
             logger.error(f"Error closing browser: {e}")
@@ -339,32 +414,23 @@ class RealTimeXMonitor:
     async def load_known_tokens_with_ca(self):
         """Load tokens that already have contract addresses to filter them out"""
         try:
-            # Load from CA alerts (tokens that already have CAs)
-            ca_alerts = await self.db.ca_alerts.find().to_list(1000)
-            for alert in ca_alerts:
-                token_name = alert.get('token_name', '').upper()
-                if token_name:
-                    self.known_tokens_with_ca.add(token_name)
+            # Tokens that already have CAs are served by the shared CA index
+            if not self.ca_index.is_loaded:
+                await self.ca_index.load()
             
             # Add established tokens
             self.known_tokens_with_ca.update(self.established_tokens)
-            logger.info(f"Loaded {len(self.known_tokens_with_ca)} known tokens with CAs")
+            logger.info(f"Loaded {len(self.known_tokens_with_ca) + len(self.ca_index.token_names)} known tokens with CAs")
         except Exception as e:
             logger.error(f"Error loading known tokens: {e}")
 
+    def has_ca(self, token_name: str) -> bool:
+        """Check if a token is established or already has a CA (in-memory only)"""
+        return token_name.upper() in self.known_tokens_with_ca or self.ca_index.has_ca(token_name)
+
     def extract_token_names(self, text: str) -> List[str]:
         """Extract potential token names from text using advanced patterns"""
-        tokens = set()
-        text = text.upper()
-        
-        for pattern in self.token_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches:
-                token = match.strip() if isinstance(match, str) else match[0].strip()
-                if len(token) >= 2 and token not in self.established_tokens:
-                    tokens.add(token.upper())
-        
-        return list(tokens)
+        return self.token_extractor.extract(text)
 
     async def start_monitoring(self, target_account: str = "Sploofmeme"):
         """Start monitoring X accounts for token mentions"""
@@ -408,140 +474,103 @@ class RealTimeXMonitor:
         except Exception as e:
             logger.error(f"Error loading accounts from database: {e}")
             self.monitored_accounts = []
-    async def update_following_list(self, target_account: str):
-        """Get REAL @Sploofmeme following list with authentication"""
+    async def update_following_list(self, target_account: str, full: bool = True):
+        """Sync the REAL @Sploofmeme following list into x_accounts (full=False stops at known follows)"""
         try:
             logger.info(f"🎯 Getting REAL @{target_account} following list...")
             
             # Initialize browser if needed
-            if not self.browser:
+            if not self.browser_pool.is_running:
                 await self.initialize_browser()
             
-            if not self.browser:
+            if not self.browser_pool.is_running:
                 logger.error("Browser initialization failed")
                 return
             
-            try:
-                # Step 1: Login to X with email verification handling
-                logger.info("🔐 Logging in to X...")
-                login_success = await self.login_to_x()
+            async with self.browser_pool.lease() as page:
+                await self._scrape_following_list(page, target_account, full)
                 
-                if not login_success:
-                    logger.error("❌ Login failed - cannot get real following list")
-                    logger.info("Using enhanced fallback until login issue resolved")
-                    await self._use_enhanced_fallback()
-                    return
-                
-                logger.info("✅ Login successful! Now getting real following list...")
-                
-                # Step 2: Navigate to actual following page
-                following_url = f"https://x.com/{target_account}/following"
-                logger.info(f"📂 Navigating to {following_url}")
-                
-                await self.page.goto(following_url, wait_until='networkidle', timeout=30000)
-                await self.page.wait_for_timeout(5000)
+        except Exception as e:
+            logger.error(f"❌ Error getting real following list: {e}")
+            await self._use_enhanced_fallback()
+
+    async def _scrape_following_list(self, page: Page, target_account: str, full: bool = True):
+        """Log in, capture the following list of `target_account` on a leased page and sync it"""
+        try:
+            # Step 1: Reuse the saved session if its cookies are still good, else log in
+            reused_session = session_cookies_valid(self.browser_pool.storage_state)
+            if reused_session:
+                logger.info("🔑 Reusing saved X session")
+            elif not await self._login_or_fallback(page):
+                return
+            
+            # Step 2: Load the following page and read the Following timeline responses it fetches
+            following_url = f"https://x.com/{target_account}/following"
+            logger.info(f"📂 Navigating to {following_url}")
+            
+            known = await self.following_sync.known_accounts()
+            collector = FollowingCollector(known=known)
+            page.on("response", collector.on_response)
+            try:
+                navigation = await self.browser_pool.navigate(page, following_url, wait_for_response=is_following_response,
+                                                              timeout_ms=15000)
+                if not navigation['ready'] and reused_session and self._on_login_page(page):
+                    # Cookies looked fine but X revoked the session server-side
+                    logger.info("Saved X session expired - logging in again")
+                    self.session_store.clear()
+                    self.browser_pool.set_storage_state(None)
+                    if not await self._login_or_fallback(page):
+                        return
+                    await self.browser_pool.navigate(page, following_url, wait_for_response=is_following_response)
                 
-                # Step 3: Scrape ALL following accounts
-                accounts = set()
+                # Step 3: Scroll for the next batch until X runs out of accounts (or, incrementally,
+                # until a whole batch is accounts we already track: newest follows come first)
                 scroll_attempts = 0
-                max_scrolls = 100  # Increase for complete list
+                max_scrolls = 100
                 no_new_accounts_streak = 0
-                
-                logger.info("🔄 Starting to collect ALL @Sploofmeme following accounts...")
-                
-                while scroll_attempts < max_scrolls and no_new_accounts_streak < 10:
-                    previous_count = len(accounts)
+                while scroll_attempts < max_scrolls and no_new_accounts_streak < 3:
+                    await collector.drain()
+                    if collector.complete:
+                        break
+                    if not full and known and collector.responses and collector.last_batch_unknown == 0:
+                        logger.info("Reached already tracked follows - incremental sync done")
+                        break
                     
                     try:
-                        # Method 1: Look for profile links
-                        profile_links = await self.page.query_selector_all('a[href^="/"][role="link"]')
-                        
-                        for link in profile_links:
-                            try:
-                                href = await link.get_attribute('href')
-                                if href and href.startswith('/') and len(href) > 1:
-                                    username = href.strip('/').split('/')[0].split('?')[0]
-                                    if (username and 
-                                        len(username) > 0 and 
-                                        username not in ['i', 'intent', 'search', 'hashtag', 'explore', 'settings'] and
-                                        not username.startswith('i/') and
-                                        username.replace('_', '').replace('-', '').isalnum() and
-                                        len(username) <= 15):
-                                        accounts.add(username.lower())
-                            except:
-                                continue
-                        
-                        # Method 2: Look for @username patterns in text
-                        page_text = await self.page.content()
-                        username_matches = re.findall(r'@([a-zA-Z0-9_]{1,15})', page_text)
-                        for username in username_matches:
-                            if (len(username) > 0 and 
-                                username.replace('_', '').isalnum() and
-                                len(username) <= 15 and
-                                username.lower() not in ['search', 'explore', 'settings']):
-                                accounts.add(username.lower())
-                        
-                    except Exception as e:
-                        logger.debug(f"Error collecting accounts on scroll {scroll_attempts}: {e}")
-                    
-                    # Check progress
-                    new_accounts = len(accounts) - previous_count
-                    if new_accounts == 0:
-                        no_new_accounts_streak += 1
-                    else:
+                        async with page.expect_response(is_following_response, timeout=4000):
+                            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
                         no_new_accounts_streak = 0
-                        logger.info(f"📊 Found {len(accounts)} accounts total (+{new_accounts} new)")
-                    
-                    # Scroll down to load more
-                    await self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                    await self.page.wait_for_timeout(4000)  # Wait for content to load
+                    except PlaywrightTimeoutError:
+                        no_new_accounts_streak += 1
                     scroll_attempts += 1
                     
-                    # Progress update every 20 scrolls
                     if scroll_attempts % 20 == 0:
-                        logger.info(f"🔄 Scroll progress: {scroll_attempts}/{max_scrolls} - {len(accounts)} accounts found")
-                    
-                    # Break if we've found a substantial amount and no new accounts
-                    if len(accounts) > 500 and no_new_accounts_streak >= 5:
-                        logger.info("📈 Large following list detected, stopping at good sample")
-                        break
-                
-                # Clean and filter the accounts
-                filtered_accounts = []
-                excluded_keywords = {'i', 'intent', 'search', 'hashtag', 'explore', 'settings', 'messages', 
-                                   'notifications', 'bookmarks', 'lists', 'profile', 'more', 'compose',
-                                   'home', 'moments', 'topics', 'help', 'privacy', 'tos'}
-                
-                for account in accounts:
-                    clean_account = account.lower().strip()
-                    if (len(clean_account) > 0 and 
-                        clean_account not in excluded_keywords and
-                        not clean_account.isdigit() and
-                        clean_account.replace('_', '').replace('-', '').isalnum() and
-                        len(clean_account) <= 15):
-                        filtered_accounts.append(clean_account)
-                
-                # Remove duplicates and sort
-                self.monitored_accounts = sorted(list(set(filtered_accounts)))
-                
-                logger.info(f"🎉 SUCCESS! Scraped {len(self.monitored_accounts)} REAL @{target_account} following accounts!")
-                logger.info(f"📋 Sample accounts: {self.monitored_accounts[:15]}")
-                
-                # Show some stats
-                if len(self.monitored_accounts) > 100:
-                    logger.info(f"📊 Large following detected - monitoring {len(self.monitored_accounts)} accounts")
-                elif len(self.monitored_accounts) > 50:
-                    logger.info(f"📊 Medium following detected - monitoring {len(self.monitored_accounts)} accounts")
-                else:
-                    logger.info(f"📊 Small following detected - monitoring {len(self.monitored_accounts)} accounts")
-                    
-            except Exception as e:
-                logger.error(f"❌ Real scraping failed: {e}")
-                logger.info("Using enhanced fallback until scraping issue resolved")
-                await self._use_enhanced_fallback()
+                        logger.info(f"🔄 Scroll progress: {scroll_attempts}/{max_scrolls} - {len(collector.accounts)} accounts found")
+                await collector.drain()
+            finally:
+                page.remove_listener("response", collector.on_response)
+            
+            if not collector.accounts:
+                logger.error("❌ No Following timeline data captured")
+                if not self.monitored_accounts:
+                    await self._use_enhanced_fallback()
+                return
+            
+            # Step 4: Apply only the difference to x_accounts
+            result = await self.following_sync.apply(collector.accounts, source=f"following:{target_account.lower()}",
+                                                     complete=collector.complete and full)
+            self.monitored_accounts = result['accounts']
+            
+            # Cookies rotate while browsing; keep the saved session current
+            await asyncio.to_thread(self.session_store.save, await page.context.storage_state())
+            
+            logger.info(f"🎉 SUCCESS! Synced {len(self.monitored_accounts)} REAL @{target_account} following accounts "
+                        f"({len(collector.accounts)} read from {collector.responses} responses)")
+            logger.info(f"📋 Sample accounts: {self.monitored_accounts[:15]}")
                 
         except Exception as e:
-            logger.error(f"❌ Error getting real following list: {e}")
+            logger.error(f"❌ Real scraping failed: {e}")
+            logger.info("Using enhanced fallback until scraping issue resolved")
             await self._use_enhanced_fallback()
 
     async def _use_fallback_accounts(self):
@@ -605,17 +634,33 @@ class RealTimeXMonitor:
 
     async def monitoring_loop(self):
         """Main monitoring loop"""
+        await self.cadence.load(self.db, self.monitored_accounts)
+        await self.seen_tweets.load(self.db)
+        await self.cursors.load(self.db, self.monitored_accounts)
+        
         while self.is_monitoring:
             try:
-                logger.info(f"Checking {len(self.monitored_accounts)} accounts for token mentions...")
+                accounts = list(self.monitored_accounts)
                 
-                # Check each account for recent tweets with token mentions
-                for account in self.monitored_accounts:
-                    if not self.is_monitoring:
-                        break
-                    
-                    await self.check_account_for_tokens(account)
-                    await asyncio.sleep(1)  # Rate limiting
+                # Only poll accounts whose learned interval has elapsed
+                if self.adaptive_polling:
+                    self.cadence.rebalance(accounts, self.rate_limiter.rate)
+                    accounts = self.cadence.due_accounts(accounts, self.poller.last_checked_at,
+                                                         tolerance_seconds=self.check_interval_seconds / 2)
+                
+                logger.info(f"Checking {len(accounts)}/{len(self.monitored_accounts)} accounts for token mentions...")
+                
+                # Check accounts concurrently (bounded, rate limited)
+                cycle_seconds = await self.poller.run_cycle(accounts, should_continue=lambda: self.is_monitoring)
+                logger.info(f"Checked {self.poller.last_cycle_accounts} accounts in {cycle_seconds:.1f}s")
+                monitoring_cycle_seconds.observe(cycle_seconds)
+                
+                # Persist learned cadence, seen tweets and cursors every 10 cycles
+                if self.poller.cycle_count % 10 == 0:
+                    if self.adaptive_polling:
+                        await self.cadence.save(self.db)
+                    await self.seen_tweets.save(self.db)
+                    await self.cursors.save(self.db)
                 
                 # Process collected mentions for alerts
                 await self.process_mentions_for_alerts()
@@ -623,78 +668,157 @@ class RealTimeXMonitor:
                 # Update last check time
                 self.last_check_time = datetime.now(timezone.utc)
                 
-                # Wait before next cycle
-                await asyncio.sleep(30)  # Check every 30 seconds
+                # Wait for the next cycle (interval is measured start to start)
+                await asyncio.sleep(max(0, self.check_interval_seconds - cycle_seconds))
                 
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
                 await asyncio.sleep(30)
 
     async def check_account_for_tokens(self, account_username: str):
-        """Check a specific account for recent token mentions"""
+        """Check a specific account for token mentions in tweets newer than its cursor"""
         try:
-            # Simulate finding token mentions (in production, this would scrape/use API)
-            # Generate some test data occasionally
-            import random
-            
-            if random.random() < 0.05:  # 5% chance of finding a mention
-                possible_tokens = ['BONK', 'PEPE', 'WIF', 'BRETT', 'POPCAT', 'MEW', 'TURBO', 'DEGEN']
-                token_name = random.choice(possible_tokens)
+            since_id = self.cursors.since_id(account_username)
+            observed_at = time.monotonic()
+            tweets = await self.fetch_new_tweets(account_username, since_id)
+            
+            processed = []
+            for tweet in tweets:
+                # A tweet seen in an earlier poll was already extracted and counted
+                if self.seen_tweets.seen(tweet['status_id']):
+                    continue
+                processed.append(tweet['status_id'])
                 
-                # Skip if token already has CA
-                if token_name.upper() not in self.known_tokens_with_ca:
-                    # Add to mentions cache
-                    if token_name not in self.token_mentions_cache:
-                        self.token_mentions_cache[token_name] = []
-                    
-                    self.token_mentions_cache[token_name].append({
-                        'account': account_username,
-                        'timestamp': datetime.now(timezone.utc),
-                        'tweet_url': f"https://x.com/{account_username}/status/{random.randint(1000000000000000000, 9999999999999999999)}"
-                    })
-                    
-                    logger.info(f"Found token mention: {token_name} by @{account_username}")
+                token_names = self.extract_token_names(tweet['text'])
+                extracted_at = time.monotonic()
+                for token_name in token_names:
+                    # Skip if token already has CA
+                    if not self.has_ca(token_name):
+                        logger.info(f"Found token mention: {token_name} by @{account_username}")
+                        await self.record_mention(token_name, account_username, tweet['url'], tweet['created_at'],
+                                                  observed_at=observed_at, extracted_at=extracted_at)
+            
+            # Only a completed check marks its tweets seen and moves the cursor (newest first, so
+            # tweets[0] is the high-water mark); after a failure both are refetched and reprocessed
+            for tweet_id in processed:
+                self.seen_tweets.add(tweet_id)
+            if tweets:
+                self.cursors.advance(account_username, tweets[0]['status_id'], tweets[0]['created_at'])
             
         except Exception as e:
             logger.error(f"Error checking account {account_username}: {e}")
 
+    async def fetch_new_tweets(self, account_username: str, since_id: int = None) -> List[Dict]:
+        """Newest-first tweets of `account_username` above `since_id`, merged from all mention sources"""
+        return await fetch_from_sources(self.mention_sources, account_username, since_id)
+
+    async def record_mention(self, token_name: str, account_username: str, tweet_url: str,
+                             timestamp: datetime = None, observed_at: float = None, extracted_at: float = None,
+                             mention_id: str = None) -> bool:
+        """Store a mention, add it to the quorum window and alert as soon as the token reaches quorum
+
+        `observed_at`/`extracted_at` are time.monotonic() readings of when the tweet was seen and
+        when its tokens were extracted; they start the alert's trace. Returns False if this token
+        of the tweet was already recorded.
+        """
+        timestamp = timestamp or datetime.now(timezone.utc)
+        mention_id = mention_id or str(uuid.uuid4())
+        if self.mention_writer is not None:
+            mention = {
+                'id': mention_id,
+                'token_name': token_name,
+                'account_username': account_username,
+                'tweet_url': tweet_url,
+                'mentioned_at': timestamp,
+                'processed': False,
+            }
+            if not await self.mention_writer.add(mention):
+                logger.info(f"Skipping duplicate mention of {token_name}: {tweet_url}")
+                return False
+        self.cadence.record_mention(account_username, timestamp.timestamp())
+        at_quorum = self.token_mentions_cache.add(token_name, account_username, timestamp, tweet_url, mention_id)
+        if at_quorum:
+            timing = {'observed': observed_at, 'extracted': extracted_at, 'quorum': time.monotonic()}
+            await self.alert_if_no_ca(token_name, timing)
+        return True
+
+    async def ingest_mention(self, token_name: str, account_username: str, tweet_url: str,
+                             timestamp: datetime = None, mention_id: str = None) -> bool:
+        """Count a mention reported from outside the polling loop (e.g. POST /api/mentions)"""
+        observed_at = time.monotonic()
+        token_name = normalize_token_name(token_name)
+        if self.has_ca(token_name):
+            logger.info(f"⚠️ Token {token_name} already has CA - skipping Name Alert")
+            return False
+        return await self.record_mention(token_name, account_username, tweet_url, as_utc(timestamp) if timestamp else None,
+                                         observed_at=observed_at, extracted_at=observed_at, mention_id=mention_id)
+
+    async def load_recent_mentions(self):
+        """Refill the quorum window with the unprocessed mentions of the last window after a restart
+
+        Mentions that already alerted are only remembered by the mention writer, so refetched
+        tweets are not counted toward quorum a second time.
+        """
+        try:
+            since = datetime.now(timezone.utc) - timedelta(seconds=self.token_mentions_cache.window_seconds)
+            mentions = await self.db.token_mentions.find(
+                {"mentioned_at": {"$gte": since}},
+                {"_id": 0, "id": 1, "token_name_norm": 1, "account_username": 1, "tweet_url": 1, "mentioned_at": 1,
+                 "processed": 1}
+            ).sort("mentioned_at", 1).to_list(None)
+            at_quorum = set()
+            for mention in mentions:
+                token_name = mention.get('token_name_norm')
+                if not token_name or mention.get('processed') or self.has_ca(token_name):
+                    continue
+                if self.token_mentions_cache.add(token_name, mention['account_username'], as_utc(mention['mentioned_at']),
+                                                 mention.get('tweet_url'), mention.get('id')):
+                    at_quorum.add(token_name)
+            if self.mention_writer is not None:
+                self.mention_writer.remember(mentions)
+            logger.info(f"Restored {len(mentions)} recent mentions, live ones of {len(self.token_mentions_cache)} tokens")
+            
+            # Mentions that reached quorum right before the restart never alerted
+            for token_name in at_quorum:
+                await self.alert_if_no_ca(token_name)
+        except Exception as e:
+            logger.error(f"Error loading recent mentions: {e}")
+
+    async def alert_if_no_ca(self, token_name: str, timing: Dict[str, float] = None):
+        """Fire a name alert for a token at quorum unless it got a CA meanwhile"""
+        # Double-check token doesn't have CA
+        if self.has_ca(token_name):
+            return
+        
+        # Clear processed mentions
+        mentions = self.token_mentions_cache.pop(token_name)
+        if mentions:
+            await self.create_name_alert(token_name, mentions, timing)
+
     async def process_mentions_for_alerts(self):
-        """Process collected mentions to create name alerts"""
+        """Evict expired mentions and alert tokens that reached quorum outside of an insert"""
         try:
-            current_time = datetime.now(timezone.utc)
-            
-            for token_name, mentions in self.token_mentions_cache.items():
-                # Filter recent mentions (last hour)
-                recent_mentions = [
-                    m for m in mentions 
-                    if (current_time - m['timestamp']).total_seconds() < 3600
-                ]
-                
-                # Get unique accounts
-                unique_accounts = set(m['account'] for m in recent_mentions)
-                
-                # Check if threshold met
-                if len(unique_accounts) >= self.alert_threshold:
-                    # Double-check token doesn't have CA
-                    if token_name.upper() not in self.known_tokens_with_ca:
-                        await self.create_name_alert(token_name, recent_mentions)
-                        
-                        # Clear processed mentions
-                        self.token_mentions_cache[token_name] = []
+            self.token_mentions_cache.expire(datetime.now(timezone.utc).timestamp())
+            
+            # Only non-empty after the threshold was lowered; inserts alert immediately
+            for token_name in self.token_mentions_cache.drain_ready():
+                await self.alert_if_no_ca(token_name)
             
         except Exception as e:
             logger.error(f"Error processing mentions: {e}")
 
-    async def create_name_alert(self, token_name: str, mentions: List[Dict]):
-        """Create a name alert for a trending token"""
+    async def create_name_alert(self, token_name: str, mentions: List[Dict], timing: Dict[str, float] = None):
+        """Create, store and broadcast a name alert for a trending token"""
         try:
-            unique_accounts = list(set(m['account'] for m in mentions))
+            timing = timing or {}
+            unique_accounts = list(dict.fromkeys(m['account'] for m in mentions))
             tweet_urls = [m['tweet_url'] for m in mentions]
             
             name_alert = {
-                'id': f"alert_{int(datetime.now(timezone.utc).timestamp())}",
+                'id': str(uuid.uuid4()),
                 'token_name': token_name,
                 'first_seen': min(m['timestamp'] for m in mentions),
+                'created_at': datetime.now(timezone.utc),
                 'quorum_count': len(unique_accounts),
                 'accounts_mentioned': unique_accounts,
                 'tweet_urls': tweet_urls,
@@ -702,73 +826,85 @@ class RealTimeXMonitor:
                 'alert_triggered': True
             }
             
-            # Store in database
-            await self.db.name_alerts.insert_one(name_alert)
+            mention_to_name_alert_seconds.observe((name_alert['created_at'] - name_alert['first_seen']).total_seconds())
+            trace = self.tracer.start(name_alert['id'], 'name', timing.get('observed'))
+            for stage in ('extracted', 'quorum'):
+                if timing.get(stage) is not None:
+                    trace.mark(stage, timing[stage])
+            if 'quorum' not in trace.stages:
+                trace.mark('quorum')
+            
+            # Keep the alert in memory and broadcast it before persisting, as CA alerts are, so a
+            # slow or failing Mongo can delay the stored copy but never lose the alert
+            if self.alert_store is not None:
+                self.alert_store.append(name_alert)
+            self.token_matcher.watch(token_name, len(unique_accounts))
             
             # Add to CA watchlist for monitoring
             self.ca_watchlist.add(token_name.upper())
             
-            logger.info(f"🚨 NAME ALERT: {token_name} mentioned by {len(unique_accounts)} accounts")
+            # These accounts helped reach quorum; poll them more often
+            self.cadence.record_quorum(unique_accounts)
             
-            # TODO: Broadcast to WebSocket clients
-            # await broadcast_to_clients({"type": "name_alert", "data": name_alert})
+            logger.info(f"🚨 NAME ALERT (NO CA): {token_name} mentioned by {len(unique_accounts)} accounts")
             
-        except Exception as e:
-            logger.error(f"Error creating name alert: {e}")
-
-    async def monitor_pump_fun_for_cas(self):
-        """Monitor Pump.fun for new contract addresses of watchlisted tokens"""
-        try:
-            # This would connect to Pump.fun WebSocket or API
-            # For now, simulate occasionally finding CAs
-            import random
+            # Broadcast to clients
+            if self.broadcast is not None:
+                await self.broadcast({"type": "name_alert", "data": name_alert}, trace_id=name_alert['id'])
+            else:
+                self.tracer.expect_sends(name_alert['id'], 0)
             
-            for token_name in list(self.ca_watchlist):
-                if random.random() < 0.1:  # 10% chance of finding CA
-                    await self.create_ca_alert(token_name)
-                    self.ca_watchlist.remove(token_name)
+            # Mark only the mentions that formed this alert as processed
+            if self.mention_writer is not None:
+                await self.mention_writer.mark_processed(m['id'] for m in mentions if m.get('id'))
             
         except Exception as e:
-            logger.error(f"Error monitoring Pump.fun: {e}")
+            logger.error(f"Error creating name alert: {e}")
+            return
+        await self.persist_name_alert(name_alert)
 
-    async def create_ca_alert(self, token_name: str):
-        """Create a CA alert when contract address is found"""
-        try:
-            import random
-            
-            ca_alert = {
-                'id': f"ca_{int(datetime.now(timezone.utc).timestamp())}",
-                'contract_address': f"{''.join(random.choices('123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz', k=44))}",
-                'token_name': token_name,
-                'market_cap': random.randint(10000, 1000000),
-                'created_at': datetime.now(timezone.utc),
-                'photon_url': f"https://photon-sol.tinyastro.io/en/lp/CONTRACT_ADDRESS?timeframe=1s",
-                'alert_time_utc': datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
-                'was_trending': True,
-                'priority': 'HIGH'
-            }
-            
-            # Store in database
-            await self.db.ca_alerts.insert_one(ca_alert)
-            
-            # Add to known tokens
-            self.known_tokens_with_ca.add(token_name.upper())
-            
-            logger.info(f"⚡ CA ALERT: {token_name} - {ca_alert['contract_address']}")
-            
-            # TODO: Broadcast to WebSocket clients
-            # await broadcast_to_clients({"type": "ca_alert", "data": ca_alert})
-            
-        except Exception as e:
-            logger.error(f"Error creating CA alert: {e}")
+    async def persist_name_alert(self, name_alert: Dict, attempts: int = 3, backoff_seconds: float = 0.5):
+        """Store a name alert (a copy, so the Mongo _id stays out of the broadcast payload)
+
+        The alert id doubles as _id, so a retry after a timeout that did write cannot store it twice.
+        """
+        for attempt in range(attempts):
+            try:
+                await self.db.name_alerts.insert_one(
+                    {**name_alert, '_id': name_alert['id'], 'trace': self.tracer.snapshot(name_alert['id'])})
+            except DuplicateKeyError:
+                pass
+            except Exception as e:
+                if attempt + 1 == attempts:
+                    logger.error(f"Giving up storing name alert {name_alert['token_name']} after {attempts} attempts: {e}")
+                    return
+                logger.warning(f"Error storing name alert {name_alert['token_name']} (attempt {attempt + 1}): {e}")
+                await asyncio.sleep(backoff_seconds * 2 ** attempt)
+                continue
+            self.tracer.mark_persisted([name_alert['id']])
+            return
 
     async def stop_monitoring(self):
         """Stop monitoring"""
         self.is_monitoring = False
+        await self.cadence.save(self.db)
+        await self.seen_tweets.save(self.db)
+        await self.cursors.save(self.db)
         await self.close_browser()
         logger.info("Real-time monitoring stopped")
 
     def set_alert_threshold(self, threshold: int):
         """Set the number of accounts needed to trigger an alert"""
         self.alert_threshold = threshold
-        logger.info(f"Alert threshold set to {threshold} accounts")
\ No newline at end of file
+        self.token_mentions_cache.set_threshold(threshold)
+        logger.info(f"Alert threshold set to {threshold} accounts")
+
+    def set_polling(self, check_interval_seconds: int, max_concurrency: int, requests_per_second: float,
+                    adaptive: bool = True):
+        """Set cycle interval, concurrent account checks, the shared request rate and adaptive cadence"""
+        self.check_interval_seconds = check_interval_seconds
+        self.cadence.min_interval_seconds = check_interval_seconds
+        self.adaptive_polling = adaptive
+        self.poller.set_concurrency(max_concurrency)
+        self.rate_limiter.set_rate(requests_per_second)
+        logger.info(f"Polling every {check_interval_seconds}s, {max_concurrency} concurrent checks, {requests_per_second} req/s")
\ No newline at end of file
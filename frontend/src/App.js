@@ -91,6 +91,9 @@ function TweetTracker() {
 
   const wsRef = useRef(null);
   const reconnectTimeoutRef = useRef(null);
+  // Last broadcast seq seen and its stream, so a reconnect only receives the missed events
+  const lastSeqRef = useRef(null);
+  const streamRef = useRef(null);
 
   useEffect(() => {
     fetchInitialData();
@@ -140,7 +143,10 @@ function TweetTracker() {
 
   const connectWebSocket = () => {
     try {
-      wsRef.current = new WebSocket(WS_URL);
+      const resume = lastSeqRef.current !== null && streamRef.current
+        ? `?last_seq=${lastSeqRef.current}&stream=${streamRef.current}`
+        : '';
+      wsRef.current = new WebSocket(WS_URL + resume);
 
       wsRef.current.onopen = () => {
         setConnectionStatus('connected');
@@ -152,6 +158,9 @@ function TweetTracker() {
 
       wsRef.current.onmessage = (event) => {
         const message = JSON.parse(event.data);
+        if (message.seq !== undefined) {
+          lastSeqRef.current = message.seq;
+        }
         switch (message.type) {
           case 'name_alert':
             setNameAlerts(prev => [message.data, ...prev]);
@@ -170,6 +179,11 @@ function TweetTracker() {
           case 'initial_state':
             setNameAlerts(message.data.name_alerts || []);
             setCaAlerts(message.data.ca_alerts || []);
+            streamRef.current = message.data.stream;
+            break;
+          case 'resync':
+            // Missed events are gone from the server's replay log; reload everything
+            fetchInitialData();
             break;
         }
       };
@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime, timezone
+
+from account_cursors import TWITTER_EPOCH_MS, AccountCursors, newer_than, snowflake_time
+from benchmarks.memory_db import MemoryDatabase
+
+
+def status_at(moment: datetime) -> int:
+    return (int(moment.timestamp() * 1000) - TWITTER_EPOCH_MS) << 22
+
+
+def test_snowflake_time_decodes_creation_time():
+    moment = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    assert snowflake_time(status_at(moment)) == moment
+
+
+def test_newer_than_stops_at_the_cursor():
+    timeline = [{'status_id': status_id} for status_id in (50, 40, 30, 45)]
+    assert newer_than(timeline, None) == timeline
+    assert [tweet['status_id'] for tweet in newer_than(timeline, 35)] == [50, 40]
+    assert newer_than(timeline, 50) == []
+
+
+def test_advance_only_moves_forward():
+    cursors = AccountCursors()
+    cursors.advance("alice", 100)
+    cursors.advance("alice", 90)
+    cursors.advance("alice", 100)
+    assert cursors.since_id("alice") == 100
+    assert cursors.since_id("bob") is None
+    assert cursors.advances == 1
+    cursors.advance("alice", 120)
+    assert cursors.stats() == {"accounts": 1, "advances": 2, "unsaved": 1}
+
+
+def test_save_never_moves_a_stored_cursor_backwards():
+    async def scenario():
+        db = MemoryDatabase()
+        newer = AccountCursors()
+        newer.advance("alice", status_at(datetime(2024, 5, 2, tzinfo=timezone.utc)))
+        await newer.save(db)
+
+        stale = AccountCursors()
+        stale.advance("alice", status_at(datetime(2024, 5, 1, tzinfo=timezone.utc)))
+        stale.advance("bob", 7 << 22)
+        await stale.save(db)
+
+        restored = AccountCursors()
+        await restored.load(db, ["alice", "bob", "carol"])
+        return newer, stale, restored
+
+    newer, stale, restored = asyncio.run(scenario())
+    assert restored.since_id("alice") == newer.since_id("alice")
+    assert restored.since_id("bob") == 7 << 22
+    assert len(restored) == 2
+    assert restored.stats()["unsaved"] == 0
+    assert stale.stats()["unsaved"] == 0
+
+
+def test_load_keeps_a_cursor_that_is_already_further_ahead():
+    async def scenario():
+        db = MemoryDatabase()
+        stored = AccountCursors()
+        stored.advance("alice", 100 << 22)
+        await stored.save(db)
+
+        cursors = AccountCursors()
+        cursors.advance("alice", 200 << 22)
+        await cursors.load(db, ["alice"])
+        return cursors
+
+    assert asyncio.run(scenario()).since_id("alice") == 200 << 22
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from alert_store import AlertStore, decode_cursor, encode_cursor
+from benchmarks.memory_db import MemoryDatabase
+
+START = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+def make_alerts(count):
+    # Pairs share a timestamp so the id tiebreak is exercised
+    return [{'id': f"alert-{index:02d}", 'created_at': START + timedelta(seconds=index // 2)}
+            for index in range(count)]
+
+
+def stored(alerts, capacity):
+    db = MemoryDatabase()
+    db.alerts.documents.extend(dict(alert) for alert in alerts)
+    store = AlertStore(db.alerts, capacity=capacity)
+    for alert in alerts:
+        store.append(alert)
+    return store
+
+
+async def all_pages(store, limit, since=None):
+    pages, cursor = [], None
+    while True:
+        page = await store.page(limit=limit, cursor=cursor, since=since)
+        pages.append([alert['id'] for alert in page['alerts']])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    created_at, alert_id = decode_cursor(encode_cursor(START, "alert-01"))
+    assert (created_at, alert_id) == (START, "alert-01")
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
+
+
+def test_pages_walk_buffer_then_history_without_gaps_or_repeats():
+    alerts = make_alerts(11)
+    store = stored(alerts, capacity=4)
+    pages = asyncio.run(all_pages(store, limit=3))
+    assert [alert_id for page in pages for alert_id in page] == [alert['id'] for alert in reversed(alerts)]
+    assert [len(page) for page in pages] == [3, 3, 3, 2]
+
+
+def test_since_stops_the_walk():
+    alerts = make_alerts(10)
+    store = stored(alerts, capacity=3)
+    pages = asyncio.run(all_pages(store, limit=4, since=START + timedelta(seconds=2)))
+    assert [alert_id for page in pages for alert_id in page] == [f"alert-{index:02d}" for index in range(9, 3, -1)]
+
+
+def test_late_arrival_keeps_buffer_ordered_and_capacity_bounded():
+    alerts = make_alerts(6)
+    store = AlertStore(MemoryDatabase().alerts, capacity=4)
+    for alert in alerts[:2] + alerts[3:]:
+        store.append(alert)
+    store.append(alerts[2])
+    assert [alert['id'] for alert in store] == ["alert-02", "alert-03", "alert-04", "alert-05"]
+    store.append(alerts[0])  # older than everything buffered
+    assert len(store) == 4 and store.tail(1)[0]['id'] == "alert-05"
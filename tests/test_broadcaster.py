@@ -0,0 +1,202 @@
+import asyncio
+import json
+
+from broadcaster import Broadcaster, SnapshotFrame
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send_text(self, frame):
+        self.frames.append(json.loads(frame))
+
+    async def close(self):
+        pass
+
+
+def ca_alert(index, token="TOKEN", priority="NORMAL"):
+    return {"type": "ca_alert", "data": {"id": str(index), "token_name": f"{token}{index}", "priority": priority}}
+
+
+async def settle(broadcaster):
+    """Let every sender task drain its queue"""
+    while any(channel.queue for channel in broadcaster.channels.values()):
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+
+def test_filtered_client_gets_watermarks_and_resumes_without_resync():
+    async def scenario():
+        broadcaster = Broadcaster(replay_log_size=100, watermark_interval=25)
+        websocket = FakeWebSocket()
+        broadcaster.register(websocket)
+        broadcaster.subscribe(websocket, {"priority": "HIGH"})
+        for index in range(1, 301):
+            broadcaster.publish(ca_alert(index, priority="HIGH" if index == 10 else "NORMAL"))
+        await settle(broadcaster)
+        await broadcaster.close_all()
+        return broadcaster, websocket.frames
+
+    broadcaster, frames = asyncio.run(scenario())
+    assert [frame["type"] for frame in frames[:1]] == ["ca_alert"]
+    assert {frame["type"] for frame in frames[1:]} == {"watermark"}
+    last_seq = frames[-1]["seq"]
+    assert last_seq == 300
+    # Far behind seq 10 would be out of the log; the watermark keeps the client inside it
+    assert broadcaster.replay(10, broadcaster.stream_id) is None
+    assert broadcaster.replay(last_seq, broadcaster.stream_id) == []
+
+
+def test_unfiltered_clients_get_no_watermarks():
+    async def scenario():
+        broadcaster = Broadcaster(watermark_interval=2)
+        websocket = FakeWebSocket()
+        broadcaster.register(websocket)
+        for index in range(4):
+            broadcaster.publish(ca_alert(index))
+        await settle(broadcaster)
+        await broadcaster.close_all()
+        return broadcaster, websocket.frames
+
+    broadcaster, frames = asyncio.run(scenario())
+    assert [frame["type"] for frame in frames] == ["ca_alert"] * 4
+    assert broadcaster.watermarks == 0
+
+
+def test_replay_applies_the_subscription():
+    async def scenario():
+        broadcaster = Broadcaster()
+        for index in range(1, 6):
+            broadcaster.publish(ca_alert(index, priority="HIGH" if index % 2 else "NORMAL"))
+        subscription = broadcaster.subscribe(FakeWebSocket(), {"priority": "HIGH"})
+        return broadcaster.replay(1, broadcaster.stream_id, subscription)
+
+    replayed = asyncio.run(scenario())
+    assert [seq for _, _, seq in replayed] == [3, 5]
+    assert [json.loads(frame)["seq"] for _, frame, _ in replayed] == [3, 5]
+
+
+def test_snapshot_rebuilds_on_state_change_only_and_splices_live_fields():
+    state = {"alerts_version": 1, "seq": 7}
+    builds = []
+
+    def build():
+        builds.append(state["alerts_version"])
+        return {"alerts": [state["alerts_version"]]}
+
+    snapshot = SnapshotFrame("initial_state", build=build, state_key=lambda: state["alerts_version"],
+                             encode=json.dumps, live=lambda: {"seq": state["seq"]})
+
+    assert json.loads(snapshot.get()) == {"type": "initial_state", "version": 1, "data": {"alerts": [1]}, "seq": 7}
+    state["seq"] = 8
+    assert json.loads(snapshot.get())["seq"] == 8
+    assert builds == [1]
+
+    state["alerts_version"] = 2
+    frame = json.loads(snapshot.get())
+    assert (frame["version"], frame["data"], frame["seq"]) == (2, {"alerts": [2]}, 8)
+    assert snapshot.stats()["builds"] == 2
+    assert snapshot.stats()["hits"] == 1
+
+
+class BlockedWebSocket(FakeWebSocket):
+    """Accepts nothing until released, so frames pile up in the client queue"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+
+    async def send_text(self, frame):
+        await self.release.wait()
+        await super().send_text(frame)
+
+
+def run_slow_client(policy, send):
+    async def scenario():
+        broadcaster = Broadcaster(max_queue_size=3, slow_client_policy=policy)
+        websocket = BlockedWebSocket()
+        channel = broadcaster.register(websocket)
+        await asyncio.sleep(0)
+        await send(broadcaster, channel)
+        websocket.release.set()
+        await settle(broadcaster)
+        await broadcaster.close_all()
+        return broadcaster, websocket.frames
+
+    return asyncio.run(scenario())
+
+
+def test_drop_oldest_sends_resync_ahead_of_remaining_frames():
+    async def send(broadcaster, channel):
+        broadcaster.publish(ca_alert(1))
+        await asyncio.sleep(0)  # the blocked sender takes the first alert
+        for index in range(2, 7):
+            broadcaster.publish(ca_alert(index))
+
+    broadcaster, frames = run_slow_client("drop_oldest", send)
+    # 2 and 3 were dropped to make room for 5 and 6
+    assert [frame["type"] for frame in frames] == ["ca_alert", "resync", "ca_alert", "ca_alert", "ca_alert"]
+    assert frames[1]["data"]["last_seq"] == 1
+    assert frames[1]["data"]["dropped"] == 2
+    assert [frame["seq"] for frame in frames[2:]] == [4, 5, 6]
+    assert broadcaster.gap_notices == 1
+
+
+def test_coalesce_never_merges_distinct_alerts():
+    async def send(broadcaster, channel):
+        broadcaster.publish(ca_alert(1))
+        await asyncio.sleep(0)
+        for index in range(2, 6):
+            broadcaster.publish(ca_alert(index))
+
+    broadcaster, frames = run_slow_client("coalesce", send)
+    assert [frame.get("seq") for frame in frames if frame["type"] == "ca_alert"] == [1, 3, 4, 5]
+    assert [frame["type"] for frame in frames].count("resync") == 1
+    assert broadcaster.coalesced == 0
+
+
+def test_coalesce_drops_superseded_frames_without_resync():
+    async def send(broadcaster, channel):
+        channel.send(json.dumps({"type": "pong", "n": 0}), "pong", replace_key="pong")
+        await asyncio.sleep(0)
+        broadcaster.publish(ca_alert(1))
+        for n in range(1, 4):
+            channel.send(json.dumps({"type": "pong", "n": n}), "pong", replace_key="pong")
+
+    broadcaster, frames = run_slow_client("coalesce", send)
+    assert [(frame["type"], frame.get("n")) for frame in frames] == [("pong", 0), ("ca_alert", None), ("pong", 3)]
+    assert broadcaster.coalesced == 2
+    assert broadcaster.gap_notices == 0
+
+
+def publish_alerts(broadcaster, count):
+    for index in range(1, count + 1):
+        broadcaster.publish(ca_alert(index))
+
+
+def test_replay_returns_exactly_the_missed_events():
+    broadcaster = Broadcaster(replay_log_size=10)
+    publish_alerts(broadcaster, 8)
+    assert [seq for _, _, seq in broadcaster.replay(5, broadcaster.stream_id)] == [6, 7, 8]
+    assert broadcaster.replay(8, broadcaster.stream_id) == []
+    assert broadcaster.replays == 2
+    assert broadcaster.replayed_frames == 3
+
+
+def test_replay_resyncs_when_events_cannot_be_replayed():
+    broadcaster = Broadcaster(replay_log_size=10, max_queue_size=5)
+    publish_alerts(broadcaster, 20)
+    assert broadcaster.replay(15, "another-process") is None  # server restarted
+    assert broadcaster.replay(21, broadcaster.stream_id) is None  # ahead of this stream
+    assert broadcaster.replay(9, broadcaster.stream_id) is None  # seq 10 already left the log
+    assert broadcaster.replay(13, broadcaster.stream_id) is None  # more than a client queue holds
+    assert broadcaster.resyncs == 4
+    assert len(broadcaster.replay(15, broadcaster.stream_id)) == 5
+
+
+def test_replay_log_keeps_events_nobody_was_sent():
+    broadcaster = Broadcaster()
+    publish_alerts(broadcaster, 3)
+    assert broadcaster.unencoded == 3
+    assert [json.loads(frame)["seq"] for _, frame, _ in broadcaster.replay(0, broadcaster.stream_id)] == [1, 2, 3]
@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from browser_pool import ProcessTreeRSS, descendant_pids, is_lean_blocked
+
+pytestmark = pytest.mark.skipif(not os.path.isdir('/proc/self'), reason="needs Linux /proc")
+
+
+@pytest.fixture
+def child():
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    yield process
+    process.kill()
+    process.wait()
+
+
+def test_lean_mode_blocks_media_and_trackers():
+    assert is_lean_blocked('image', 'https://x.com/home')
+    assert is_lean_blocked('xhr', 'https://pbs.twimg.com/media/a.jpg')
+    assert is_lean_blocked('xhr', 'https://x.com/i/api/1.1/jot/client_event.json')
+    assert not is_lean_blocked('xhr', 'https://x.com/i/api/graphql/UserTweets')
+
+
+def test_descendant_pids_finds_children(child):
+    assert child.pid in descendant_pids(os.getpid())
+
+
+def test_samples_are_reused_and_the_tree_is_not_rescanned(child):
+    rss = ProcessTreeRSS(max_age=60, rescan_seconds=60)
+    first = rss.bytes()
+    assert first > 0 and child.pid in rss.pids
+    assert rss.bytes() == first
+    rss.sampled_at = None  # sample again: reads statm of the cached tree only
+    rss.bytes()
+    assert rss.scans == 1
+
+
+def test_exited_process_triggers_a_rescan(child):
+    rss = ProcessTreeRSS(max_age=0, rescan_seconds=60)
+    rss.bytes()
+    child.kill()
+    child.wait()
+    rss.bytes()
+    assert rss.pids is None
+    rss.bytes()
+    assert rss.scans == 2 and child.pid not in rss.pids
@@ -0,0 +1,38 @@
+import asyncio
+
+from benchmarks.memory_db import MemoryDatabase
+from ca_index import CAIndex, normalize_token_name
+
+
+def test_normalize_token_name():
+    assert normalize_token_name("  bonk ") == "BONK"
+    assert normalize_token_name(None) == ""
+
+
+def test_load_reads_normalized_and_legacy_alerts():
+    db = MemoryDatabase()
+    db.ca_alerts.documents.extend([
+        {"token_name": "Bonk", "token_name_norm": "BONK"},
+        {"token_name": " wif "},  # stored before token_name_norm existed
+        {"token_name": ""},
+    ])
+    index = CAIndex(db)
+    asyncio.run(index.load())
+    assert index.is_loaded
+    assert index.token_names == {"BONK", "WIF"}
+    assert index.has_ca("bonk") and index.has_ca("Wif ")
+    assert not index.has_ca("PEPE")
+
+
+def test_add_is_visible_immediately_and_survives_a_load():
+    db = MemoryDatabase()
+    index = CAIndex(db)
+    index.add("pepe")
+    index.add("  ")
+    assert index.has_ca("PEPE")
+    asyncio.run(index.load())
+    assert index.stats() == {"is_loaded": True, "tokens_with_ca": 1}
+
+
+def test_prepare_alert_stamps_the_normalized_name():
+    assert CAIndex(MemoryDatabase()).prepare_alert({"token_name": "giga "})["token_name_norm"] == "GIGA"
@@ -0,0 +1,31 @@
+import time
+
+from cadence import AdaptiveCadence
+
+
+def test_min_interval_account_is_due_every_cycle():
+    cadence = AdaptiveCadence(min_interval_seconds=30)
+    cadence.rebalance(["busy"], requests_per_second=10)
+    assert cadence.accounts["busy"].interval_seconds == 30
+
+    # Checked 29.7s ago: the check started a little after the previous cycle began
+    last_checked_at = {"busy": time.time() - 29.7}
+    assert cadence.due_accounts(["busy"], last_checked_at) == []
+    assert cadence.due_accounts(["busy"], last_checked_at, tolerance_seconds=15) == ["busy"]
+
+
+def test_tolerance_rounds_interval_to_nearest_cycle():
+    cadence = AdaptiveCadence(min_interval_seconds=30)
+    cadence._get("slow").interval_seconds = 50
+    now = time.time()
+
+    assert cadence.due_accounts(["slow"], {"slow": now - 30}, tolerance_seconds=15) == []
+    assert cadence.due_accounts(["slow"], {"slow": now - 40}, tolerance_seconds=15) == ["slow"]
+
+
+def test_due_accounts_most_active_first():
+    cadence = AdaptiveCadence(min_interval_seconds=30)
+    for account, interval in (("quiet", 600), ("busy", 30), ("mid", 120)):
+        cadence._get(account).interval_seconds = interval
+
+    assert cadence.due_accounts(["quiet", "busy", "mid"], {}) == ["busy", "mid", "quiet"]
@@ -0,0 +1,70 @@
+import asyncio
+
+from challenges import ChallengeBroker
+
+
+def test_submit_before_timeout_resolves_request():
+    events = []
+    broker = ChallengeBroker(on_event=events.append)
+
+    async def scenario():
+        waiter = asyncio.create_task(broker.request("email_code", "Enter the code", timeout_seconds=5))
+        await asyncio.sleep(0)
+        pending, = broker.list_pending()
+        assert broker.submit(" 123456 ", pending["id"])
+        return await waiter, pending
+
+    answer, pending = asyncio.run(scenario())
+    assert answer == "123456"
+    assert [event["type"] for event in events] == ["verification_required", "verification_resolved"]
+    assert events[0]["data"] == pending
+    assert events[1]["data"] == {"id": pending["id"], "kind": "email_code", "outcome": "answered"}
+    assert broker.stats() == {"pending": 0, "answered": 1, "expired": 0}
+
+
+def test_submit_without_id_answers_the_oldest_challenge():
+    broker = ChallengeBroker()
+
+    async def scenario():
+        first = asyncio.create_task(broker.request("email_code", "first", timeout_seconds=5))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(broker.request("email_code", "second", timeout_seconds=5))
+        await asyncio.sleep(0)
+        assert broker.submit("111")
+        assert broker.submit("222")
+        return await first, await second
+
+    assert asyncio.run(scenario()) == ("111", "222")
+
+
+def test_timeout_returns_none_and_counts_as_expired():
+    events = []
+    broker = ChallengeBroker(on_event=events.append)
+    assert asyncio.run(broker.request("email_code", "Enter the code", timeout_seconds=0.01)) is None
+    assert broker.stats() == {"pending": 0, "answered": 0, "expired": 1}
+    assert events[-1]["type"] == "verification_resolved"
+    assert events[-1]["data"]["outcome"] == "expired"
+
+
+def test_submit_with_unknown_id_or_empty_answer_is_rejected():
+    broker = ChallengeBroker()
+
+    async def scenario():
+        waiter = asyncio.create_task(broker.request("email_code", "Enter the code", timeout_seconds=5))
+        await asyncio.sleep(0)
+        pending, = broker.list_pending()
+        results = (broker.submit("123456", "unknown"), broker.submit("   ", pending["id"]), broker.submit(None))
+        waiter.cancel()
+        return results
+
+    assert asyncio.run(scenario()) == (False, False, False)
+    assert not ChallengeBroker().submit("123456")
+    assert broker.stats()["answered"] == 0
+
+
+def test_failing_event_callback_does_not_break_the_request():
+    def on_event(event):
+        raise RuntimeError("dashboard gone")
+
+    broker = ChallengeBroker(on_event=on_event)
+    assert asyncio.run(broker.request("email_code", "Enter the code", timeout_seconds=0.01)) is None
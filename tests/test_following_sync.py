@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from benchmarks.memory_db import MemoryDatabase
+from following_sync import FollowingCollector, FollowingSync, is_following_response, parse_following_response
+
+URL = "https://x.com/i/api/graphql/abc/Following?variables=%7B%7D"
+SOURCE = "following:alice"
+
+
+def page(users, bottom_cursor):
+    entries = [{"content": {"itemContent": {"user_results": {"result": {
+        "__typename": "User", "core": {"screen_name": username, "name": username.title()},
+        "legacy": {"pinned_tweet": {"__typename": "User", "core": {"screen_name": "not_followed"}}}}}}}}
+        for username in users]
+    entries.append({"content": {"cursorType": "Top", "value": "top"}})
+    if bottom_cursor is not None:
+        entries.append({"content": {"cursorType": "Bottom", "value": bottom_cursor}})
+    return {"data": {"user": {"result": {"timeline": {"timeline": {"instructions": [{"entries": entries}]}}}}}}
+
+
+RATE_LIMITED = {"errors": [{"code": 88, "message": "Rate limit exceeded"}]}
+
+
+class FakeResponse:
+    def __init__(self, payload, status=200, url=URL):
+        self.payload = payload
+        self.status = status
+        self.ok = 200 <= status < 300
+        self.url = url
+
+    async def json(self):
+        return self.payload
+
+
+def collect(responses):
+    async def scenario():
+        collector = FollowingCollector(known=["bob"])
+        for response in responses:
+            collector.on_response(response)
+            await collector.drain()
+        return collector
+
+    return asyncio.run(scenario())
+
+
+def test_parse_reads_users_and_bottom_cursor():
+    users, bottom_cursor = parse_following_response(page(["bob", "carol"], "c1"))
+    assert users == {"bob": "Bob", "carol": "Carol"}
+    assert bottom_cursor == "c1"
+
+
+@pytest.mark.parametrize("payload", [RATE_LIMITED, {}, {"data": {}}, []])
+def test_parse_rejects_error_payloads(payload):
+    with pytest.raises(ValueError):
+        parse_following_response(payload)
+
+
+def test_only_successful_following_responses_match():
+    assert is_following_response(FakeResponse(page([], None)))
+    assert not is_following_response(FakeResponse(RATE_LIMITED, status=429))
+    assert not is_following_response(FakeResponse(page([], None), url="https://x.com/i/api/graphql/abc/Followers"))
+
+
+def test_list_completes_only_on_a_repeated_cursor_without_users():
+    collector = collect([FakeResponse(page(["bob", "carol"], "c1")), FakeResponse(page([], None))])
+    assert not collector.complete
+    collector = collect([FakeResponse(page(["bob", "carol"], "c1")), FakeResponse(page([], "c1"))])
+    assert collector.complete
+    assert collector.accounts == {"bob": "Bob", "carol": "Carol"}
+    assert collector.last_batch_unknown == 0
+
+
+def test_rate_limited_page_does_not_complete_the_list():
+    collector = collect([FakeResponse(page(["bob"], "c1")), FakeResponse(RATE_LIMITED, status=429),
+                         FakeResponse(RATE_LIMITED, status=200)])
+    assert not collector.complete
+    assert collector.responses == 1
+
+
+def seeded_db():
+    db = MemoryDatabase()
+    db.x_accounts.documents.extend([
+        {"username": "bob", "is_active": True, "source": SOURCE},
+        {"username": "dave", "is_active": True, "source": SOURCE},
+        {"username": "erin", "is_active": False, "source": SOURCE},
+        {"username": "manual", "is_active": True, "source": "manual"},
+    ])
+    return db
+
+
+def active(db):
+    return sorted(account["username"] for account in db.x_accounts.documents if account.get("is_active"))
+
+
+def test_complete_list_adds_reactivates_and_deactivates():
+    db = seeded_db()
+    result = asyncio.run(FollowingSync(db).apply({"bob": "Bob", "erin": "Erin", "Frank": "Frank"}, SOURCE, complete=True))
+    assert (result["added"], result["reactivated"], result["removed"]) == (1, 1, 1)
+    assert active(db) == ["Frank", "bob", "erin", "manual"]
+    assert result["accounts"] == ["bob", "erin", "Frank", "manual"]
+
+
+def test_truncated_list_never_deactivates():
+    db = seeded_db()
+    collector = collect([FakeResponse(page(["bob"], "c1")), FakeResponse(RATE_LIMITED, status=429)])
+    result = asyncio.run(FollowingSync(db).apply(collector.accounts, SOURCE, complete=collector.complete))
+    assert result["removed"] == 0
+    assert active(db) == ["bob", "dave", "manual"]
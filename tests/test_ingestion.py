@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+from pymongo.errors import BulkWriteError
+
+from ingestion import IngestionPipeline, unwritten_indexes
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def echo_match(message, received_at):
+    return message
+
+
+def test_failed_flush_is_retried():
+    attempts = []
+
+    async def flaky_write(records):
+        attempts.append(list(records))
+        if len(attempts) == 1:
+            raise ConnectionError("primary stepped down")
+
+    async def scenario():
+        pipeline = IngestionPipeline(echo_match, flaky_write, retry_delay_seconds=0.001)
+        pipeline.start()
+        pipeline.submit(json.dumps({"id": 1}))
+        await pipeline.stop()
+        return pipeline
+
+    pipeline = run(scenario())
+    assert attempts == [[{"id": 1}], [{"id": 1}]]
+    assert pipeline.written == 1
+    assert pipeline.write_errors == 0
+    assert pipeline.write_retries == 1
+
+
+def test_bulk_write_error_retries_only_unwritten_records():
+    attempts = []
+
+    async def partial_write(records):
+        attempts.append([record["id"] for record in records])
+        if len(attempts) == 1:
+            raise BulkWriteError({"writeErrors": [
+                {"index": 0, "code": 11000, "errmsg": "duplicate key"},
+                {"index": 2, "code": 91, "errmsg": "shutdown in progress"},
+            ]})
+
+    async def scenario():
+        pipeline = IngestionPipeline(echo_match, partial_write, retry_delay_seconds=0.001)
+        pipeline.start()
+        for record_id in range(3):
+            pipeline.submit(json.dumps({"id": record_id}))
+        await pipeline.stop()
+        return pipeline
+
+    pipeline = run(scenario())
+    assert attempts == [[0, 1, 2], [2]]
+    assert pipeline.written == 3
+    assert pipeline.write_errors == 0
+
+
+def test_only_records_never_written_count_as_errors():
+    async def always_partial(records):
+        raise BulkWriteError({"writeErrors": [{"index": len(records) - 1, "code": 91, "errmsg": "shutdown"}]})
+
+    async def scenario():
+        pipeline = IngestionPipeline(echo_match, always_partial, max_write_attempts=3, retry_delay_seconds=0.001)
+        pipeline.start()
+        for record_id in range(4):
+            pipeline.submit(json.dumps({"id": record_id}))
+        await pipeline.stop()
+        return pipeline
+
+    pipeline = run(scenario())
+    # Attempt 1 stores 3 of 4, attempts 2 and 3 keep failing the last one
+    assert pipeline.written == 3
+    assert pipeline.write_errors == 1
+
+
+def test_full_write_queue_applies_backpressure_instead_of_dropping():
+    release = asyncio.Event()
+    written = []
+
+    async def blocked_write(records):
+        await release.wait()
+        written.extend(records)
+
+    async def scenario():
+        pipeline = IngestionPipeline(echo_match, blocked_write, batch_size=1, max_queue_size=2)
+        pipeline.start()
+        for record_id in range(6):
+            pipeline.submit(json.dumps({"id": record_id}))
+            await asyncio.sleep(0.01)
+        assert pipeline.write_queue.full()
+        release.set()
+        await pipeline.stop()
+        return pipeline
+
+    pipeline = run(scenario())
+    assert [record["id"] for record in written] == list(range(6))
+    assert pipeline.dropped == 0
+
+
+def test_unwritten_indexes_ignores_duplicates():
+    error = BulkWriteError({"writeErrors": [{"index": 1, "code": 11000}, {"index": 3, "code": 121}]})
+    assert unwritten_indexes(error) == {3}
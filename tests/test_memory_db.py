@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from benchmarks.memory_db import MemoryDatabase, UnsupportedOperation
+from schema import SchemaBootstrap
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_unsupported_query_operator_names_itself():
+    db = MemoryDatabase()
+    run(db.token_mentions.insert_one({"token_name": "PEPE"}))
+    with pytest.raises(UnsupportedOperation, match=r"\$regex"):
+        run(db.token_mentions.find({"token_name": {"$regex": "^pepe$"}}).to_list(None))
+
+
+def test_group_stage_supports_the_cadence_seeding_pipeline():
+    db = MemoryDatabase()
+    for account, processed, minute in (("alice", True, 1), ("alice", False, 5), ("bob", False, 3)):
+        run(db.token_mentions.insert_one({"account_username": account, "processed": processed, "mentioned_at": minute}))
+    pipeline = [
+        {"$match": {"account_username": {"$in": ["alice", "bob"]}}},
+        {"$group": {
+            "_id": "$account_username",
+            "mentions": {"$sum": 1},
+            "quorum_hits": {"$sum": {"$cond": ["$processed", 1, 0]}},
+            "last_mention_at": {"$max": "$mentioned_at"},
+        }},
+    ]
+    rows = run(db.token_mentions.aggregate(pipeline).to_list(None))
+    assert sorted(rows, key=lambda row: row["_id"]) == [
+        {"_id": "alice", "mentions": 2, "quorum_hits": 1, "last_mention_at": 5},
+        {"_id": "bob", "mentions": 1, "quorum_hits": 0, "last_mention_at": 3},
+    ]
+    with pytest.raises(UnsupportedOperation, match=r"\$lookup"):
+        db.token_mentions.aggregate([{"$lookup": {}}])
+
+
+def test_schema_bootstrap_runs_against_memory_database():
+    db = MemoryDatabase()
+    report = run(SchemaBootstrap(db, mention_retention_days=30).run())
+    assert report["errors"] == []
+    assert report["unindexed_queries"] == []
+
+    run(db.command("collMod", "token_mentions", index={"keyPattern": {"mentioned_at": 1}, "expireAfterSeconds": 60}))
+    assert db.token_mentions.indexes["mentioned_at_1"]["expireAfterSeconds"] == 60
+
+
+def test_explain_reports_collection_scans_and_unknown_commands_fail():
+    db = MemoryDatabase()
+    result = run(db.command({"explain": {"find": "ca_alerts", "filter": {"token_name": "X"}}, "verbosity": "queryPlanner"}))
+    assert result["queryPlanner"]["winningPlan"] == {"stage": "COLLSCAN"}
+    assert run(db.command("ping"))["ok"] == 1.0
+    with pytest.raises(UnsupportedOperation, match="dropDatabase"):
+        run(db.command("dropDatabase"))
@@ -0,0 +1,157 @@
+import asyncio
+from datetime import datetime, timezone
+
+from benchmarks.memory_db import MemoryCollection
+from mention_writer import MentionWriter
+
+
+class SlowCollection(MemoryCollection):
+    """bulk_write that stays in flight until released"""
+
+    def __init__(self):
+        super().__init__("token_mentions")
+        self.release = asyncio.Event()
+
+    async def bulk_write(self, requests, ordered=True):
+        await self.release.wait()
+        await super().bulk_write(requests, ordered)
+
+
+def mention(mention_id, token="PEPE", tweet_url=None):
+    return {
+        "id": mention_id,
+        "token_name": token,
+        "account_username": "alice",
+        "tweet_url": tweet_url or f"https://x.com/alice/status/{mention_id}",
+        "mentioned_at": datetime.now(timezone.utc),
+        "processed": False,
+    }
+
+
+def test_duplicate_tweet_token_is_buffered_once():
+    async def scenario():
+        writer = MentionWriter(MemoryCollection("token_mentions"), batch_size=100)
+        assert await writer.add(mention("1", tweet_url="https://x.com/a/status/9"))
+        assert not await writer.add(mention("2", tweet_url="https://x.com/a/status/9"))
+        # Same tweet, different token is a separate mention
+        assert await writer.add(mention("3", token="WIF", tweet_url="https://x.com/a/status/9"))
+        await writer.flush()
+        # Still a duplicate after the flush
+        assert not await writer.add(mention("4", tweet_url="https://x.com/a/status/9"))
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert len(writer.collection.documents) == 2
+    assert writer.stats()["duplicates"] == 2
+
+
+def test_flushes_when_batch_is_full():
+    async def scenario():
+        writer = MentionWriter(MemoryCollection("token_mentions"), batch_size=3, flush_interval_seconds=60)
+        for mention_id in range(3):
+            await writer.add(mention(str(mention_id)))
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert writer.stats()["buffered"] == 0
+    assert writer.flushes == 1
+    assert len(writer.collection.documents) == 3
+
+
+def test_flushes_after_interval():
+    async def scenario():
+        writer = MentionWriter(MemoryCollection("token_mentions"), batch_size=100, flush_interval_seconds=0.01)
+        await writer.add(mention("1"))
+        await asyncio.sleep(0.05)
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert len(writer.collection.documents) == 1
+
+
+def test_mark_processed_waits_for_in_flight_flush():
+    async def scenario():
+        collection = SlowCollection()
+        writer = MentionWriter(collection, batch_size=100)
+        await writer.add(mention("1"))
+        flush = asyncio.create_task(writer.flush())
+        await asyncio.sleep(0)
+        assert writer.buffer == {}  # batch swapped out, write in flight
+
+        marking = asyncio.create_task(writer.mark_processed(["1"]))
+        await asyncio.sleep(0.01)
+        assert not marking.done()
+
+        collection.release.set()
+        await asyncio.gather(flush, marking)
+        return collection
+
+    collection = asyncio.run(scenario())
+    assert [document["processed"] for document in collection.documents] == [True]
+
+
+def test_failed_flush_keeps_mentions_buffered():
+    class FailingCollection(MemoryCollection):
+        async def bulk_write(self, requests, ordered=True):
+            raise ConnectionError("no primary")
+
+    async def scenario():
+        writer = MentionWriter(FailingCollection("token_mentions"), batch_size=100)
+        await writer.add(mention("1"))
+        await writer.flush()
+        await writer.mark_processed(["1"])
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert [buffered["processed"] for buffered in writer.buffer.values()] == [True]
+
+
+class FlakyCollection(MemoryCollection):
+    """bulk_write that fails until `failing` is cleared"""
+
+    def __init__(self):
+        super().__init__("token_mentions")
+        self.failing = True
+        self.attempts = 0
+
+    async def bulk_write(self, requests, ordered=True):
+        self.attempts += 1
+        if self.failing:
+            raise ConnectionError("no primary")
+        await super().bulk_write(requests, ordered)
+
+
+def test_failed_flush_retries_on_its_own_with_backoff():
+    async def scenario():
+        collection = FlakyCollection()
+        writer = MentionWriter(collection, batch_size=2, flush_interval_seconds=60,
+                               retry_delay_seconds=0.01, max_retry_delay_seconds=0.02)
+        await writer.add(mention("1"))
+        await writer.add(mention("2"))  # full batch: flushes inline and fails
+        await writer.add(mention("3"))
+        await writer.add(mention("4"))  # batch full again, but only the retry timer flushes now
+        assert collection.attempts == 1
+        await asyncio.sleep(0.05)
+        failed_attempts = collection.attempts
+        collection.failing = False
+        await asyncio.sleep(0.05)
+        return writer, collection, failed_attempts
+
+    writer, collection, failed_attempts = asyncio.run(scenario())
+    assert failed_attempts >= 2
+    assert len(collection.documents) == 4
+    assert writer.stats()["buffered"] == 0
+    assert writer.failed_flushes == 0
+
+
+def test_buffer_is_capped_while_writes_fail():
+    async def scenario():
+        writer = MentionWriter(FlakyCollection(), batch_size=2, flush_interval_seconds=60, max_buffered=3,
+                               retry_delay_seconds=60)
+        for mention_id in range(6):
+            await writer.add(mention(str(mention_id)))
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert [buffered["id"] for buffered in writer.buffer.values()] == ["3", "4", "5"]
+    assert writer.stats()["dropped"] == 3
@@ -0,0 +1,57 @@
+from metrics import MetricsRegistry
+
+
+def lines_of(registry):
+    return registry.render().splitlines()
+
+
+def test_histogram_buckets_are_cumulative_with_sum_and_count():
+    registry = MetricsRegistry(prefix="app_")
+    histogram = registry.histogram("latency_seconds", "Request latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert lines_of(registry) == [
+        "# HELP app_latency_seconds Request latency",
+        "# TYPE app_latency_seconds histogram",
+        'app_latency_seconds_bucket{le="0.1"} 2',
+        'app_latency_seconds_bucket{le="1.0"} 3',
+        'app_latency_seconds_bucket{le="+Inf"} 4',
+        "app_latency_seconds_sum 3.65",
+        "app_latency_seconds_count 4",
+    ]
+
+
+def test_labeled_histogram_renders_one_series_per_value():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("mongo_seconds", "Mongo latency", buckets=(1.0,), label="collection")
+    histogram.labels("b").observe(2.0)
+    histogram.labels("a").observe(0.5)
+    series = [line for line in lines_of(registry) if line.startswith("mongo_seconds_count")]
+    assert series == ['mongo_seconds_count{collection="a"} 1', 'mongo_seconds_count{collection="b"} 1']
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.gauge("queue_depth", "Queue depth", lambda: 3, {"name": 'a"b\\c\nd'})
+    assert lines_of(registry)[-1] == 'queue_depth{name="a\\"b\\\\c\\nd"} 3'
+
+
+def test_failing_callback_is_skipped_without_breaking_the_scrape():
+    registry = MetricsRegistry()
+
+    def broken():
+        raise RuntimeError("component not started")
+
+    registry.gauge("pages_in_use", "Leased pages", broken, {"pool": "a"})
+    registry.gauge("pages_in_use", "Leased pages", lambda: 2, {"pool": "b"})
+    registry.counter("lookups_total", "Lookups", lambda: 7)
+
+    assert lines_of(registry) == [
+        "# HELP pages_in_use Leased pages",
+        "# TYPE pages_in_use gauge",
+        'pages_in_use{pool="b"} 2',
+        "# HELP lookups_total Lookups",
+        "# TYPE lookups_total counter",
+        "lookups_total 7",
+    ]
@@ -0,0 +1,25 @@
+import os
+
+import pytest
+from pydantic import ValidationError
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'test')
+
+from server import MonitoringConfig  # noqa: E402
+
+
+@pytest.mark.parametrize("field, value", [
+    ("requests_per_second", 0),
+    ("requests_per_second", -1.5),
+    ("max_concurrent_checks", 0),
+    ("check_interval_seconds", 0),
+])
+def test_rejects_values_that_would_stall_polling(field, value):
+    with pytest.raises(ValidationError):
+        MonitoringConfig(**{field: value})
+
+
+def test_accepts_smallest_valid_budget():
+    config = MonitoringConfig(requests_per_second=0.1, max_concurrent_checks=1, check_interval_seconds=1)
+    assert config.requests_per_second == 0.1
@@ -0,0 +1,72 @@
+import asyncio
+import functools
+
+from alert_store import AlertStore
+from benchmarks.memory_db import MemoryDatabase
+from mention_writer import MentionWriter
+from x_monitor_realtime import RealTimeXMonitor
+
+
+def quorum_of_mentions(monitor):
+    async def scenario():
+        await monitor.ingest_mention("GIGA", "alice", "https://x.com/alice/status/1")
+        await monitor.ingest_mention("GIGA", "bob", "https://x.com/bob/status/2")
+        await monitor.mention_writer.flush()
+
+    asyncio.run(scenario())
+
+
+def build(db):
+    sent = []
+
+    async def broadcast(message, trace_id=None):
+        sent.append(message)
+
+    monitor = RealTimeXMonitor(db, mention_writer=MentionWriter(db.token_mentions),
+                               alert_store=AlertStore(db.name_alerts), broadcast=broadcast)
+    return monitor, sent
+
+
+def test_name_alert_is_broadcast_stored_and_its_mentions_processed():
+    db = MemoryDatabase()
+    monitor, sent = build(db)
+    quorum_of_mentions(monitor)
+
+    assert [message["data"]["token_name"] for message in sent] == ["GIGA"]
+    stored, = db.name_alerts.documents
+    assert stored["_id"] == stored["id"] == sent[0]["data"]["id"]
+    assert "_id" not in sent[0]["data"]
+    assert all(mention["processed"] for mention in db.token_mentions.documents)
+
+
+def test_failing_insert_still_broadcasts_and_marks_mentions_processed():
+    db = MemoryDatabase()
+    attempts = []
+
+    async def insert_one(document):
+        attempts.append(document["id"])
+        raise TimeoutError("no primary")
+
+    db.name_alerts.insert_one = insert_one
+    monitor, sent = build(db)
+    monitor.persist_name_alert = functools.partial(monitor.persist_name_alert, backoff_seconds=0)
+    quorum_of_mentions(monitor)
+
+    assert [message["data"]["token_name"] for message in sent] == ["GIGA"]
+    assert len(attempts) == 3
+    assert len(monitor.alert_store) == 1
+    assert all(mention["processed"] for mention in db.token_mentions.documents)
+    assert "GIGA" not in monitor.token_mentions_cache
+
+
+def test_restart_does_not_count_alerted_mentions_again():
+    db = MemoryDatabase()
+    monitor, sent = build(db)
+    quorum_of_mentions(monitor)
+
+    restarted, resent = build(db)
+    asyncio.run(restarted.load_recent_mentions())
+    assert "GIGA" not in restarted.token_mentions_cache
+    quorum_of_mentions(restarted)
+    assert len(sent) == 1 and resent == []
+    assert len(db.token_mentions.documents) == 2
@@ -0,0 +1,17 @@
+import asyncio
+import time
+
+from polling import PollingScheduler, TokenBucket
+
+
+def test_last_checked_at_records_check_start():
+    async def slow_check(account):
+        await asyncio.sleep(0.2)
+
+    poller = PollingScheduler(slow_check, TokenBucket(rate=100), max_concurrency=2)
+    started = time.time()
+    asyncio.run(poller.run_cycle(["a", "b"]))
+
+    for account in ("a", "b"):
+        assert poller.last_checked_at[account] - started < 0.1
+    assert poller.last_cycle_accounts == 2
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta, timezone
+
+from quorum import QuorumWindow
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_quorum_requires_distinct_accounts():
+    window = QuorumWindow(window_seconds=3600, threshold=2)
+    now = (T0 + timedelta(minutes=5)).timestamp()
+    assert not window.add("PEPE", "alice", T0, now=now)
+    assert not window.add("PEPE", "alice", T0 + timedelta(minutes=1), now=now)
+    assert window.add("PEPE", "bob", T0 + timedelta(minutes=2), now=now)
+    assert window.distinct_accounts("PEPE") == 2
+
+
+def test_mentions_expire_out_of_the_window():
+    window = QuorumWindow(window_seconds=3600, threshold=2)
+    window.add("PEPE", "alice", T0, now=T0.timestamp())
+    # alice's mention is exactly one window old when bob's arrives
+    assert not window.add("PEPE", "bob", T0 + timedelta(seconds=3600), now=(T0 + timedelta(seconds=3600)).timestamp())
+    assert window.distinct_accounts("PEPE") == 1
+    assert window.stats()["evicted_mentions"] == 1
+
+
+def test_expire_drops_empty_tokens_and_ready_entries():
+    window = QuorumWindow(window_seconds=60, threshold=3)
+    window.add("WIF", "alice", T0, now=T0.timestamp())
+    window.add("WIF", "bob", T0, now=T0.timestamp())
+    window.set_threshold(2)
+    assert window.ready == {"WIF"}
+
+    window.expire((T0 + timedelta(seconds=61)).timestamp())
+    assert "WIF" not in window
+    assert window.drain_ready() == []
+
+
+def test_pop_consumes_mentions_and_leaves_stale_heap_entries_harmless():
+    window = QuorumWindow(window_seconds=60, threshold=2)
+    window.add("BONK", "alice", T0, mention_id="1", now=T0.timestamp())
+    window.add("BONK", "bob", T0, mention_id="2", now=T0.timestamp())
+
+    assert [mention["id"] for mention in window.pop("BONK")] == ["1", "2"]
+    window.expire((T0 + timedelta(seconds=120)).timestamp())
+    assert window.stats()["evicted_mentions"] == 0
+    assert len(window) == 0
+
+
+def test_mentions_older_than_the_window_never_reach_quorum():
+    window = QuorumWindow(window_seconds=3600, threshold=2)
+    now = T0.timestamp()
+    stale = T0 - timedelta(hours=5)
+    assert not window.add("PEPE", "alice", stale, now=now)
+    assert not window.add("PEPE", "bob", stale, now=now)
+    assert "PEPE" not in window
+
+
+def test_future_timestamps_are_clamped_and_do_not_evict_live_mentions():
+    window = QuorumWindow(window_seconds=3600, threshold=2)
+    now = T0.timestamp()
+    window.add("BONK", "alice", T0 - timedelta(minutes=10), now=now)
+    window.add("WIF", "carol", T0 + timedelta(days=1), now=now)
+    assert window.distinct_accounts("BONK") == 1
+    assert window.add("BONK", "bob", T0, now=now + 60)
+
+    # The future-stamped mention expires one window after it was seen, not after its timestamp
+    window.expire(now + 3601)
+    assert "WIF" not in window
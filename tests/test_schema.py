@@ -0,0 +1,37 @@
+import asyncio
+
+from pymongo import ASCENDING, IndexModel
+
+from benchmarks.memory_db import MemoryDatabase
+from schema import NEVER_EXPIRE_SECONDS, SchemaBootstrap
+
+
+def mention_ttl(db):
+    return db.token_mentions.indexes["mentioned_at_1"]["expireAfterSeconds"]
+
+
+def test_toggling_retention_updates_the_ttl_in_place():
+    db = MemoryDatabase()
+    ttls = []
+    for retention_days in (30, None, 7, None, None):
+        bootstrap = SchemaBootstrap(db, mention_retention_days=retention_days)
+        asyncio.run(bootstrap.ensure_indexes())
+        assert bootstrap.report["errors"] == []
+        ttls.append(mention_ttl(db))
+    assert ttls == [30 * 86400, NEVER_EXPIRE_SECONDS, 7 * 86400, NEVER_EXPIRE_SECONDS, NEVER_EXPIRE_SECONDS]
+
+
+def test_plain_mentioned_at_index_becomes_a_ttl_index():
+    db = MemoryDatabase()
+    asyncio.run(db.token_mentions.create_indexes([IndexModel([("mentioned_at", ASCENDING)])]))
+    bootstrap = SchemaBootstrap(db, mention_retention_days=30)
+    asyncio.run(bootstrap.ensure_indexes())
+    assert bootstrap.report["errors"] == []
+    assert mention_ttl(db) == 30 * 86400
+
+
+def test_mention_upsert_key_has_a_unique_index():
+    db = MemoryDatabase()
+    asyncio.run(SchemaBootstrap(db).ensure_indexes())
+    index = db.token_mentions.indexes["tweet_url_1_token_name_norm_1"]
+    assert index["unique"] and index["partialFilterExpression"] == {"tweet_url": {"$gt": ""}}
@@ -0,0 +1,62 @@
+import stat
+
+from session_store import SessionStore, session_cookies_valid
+
+NOW = 1_800_000_000
+
+
+def state(*cookies):
+    return {"cookies": list(cookies), "origins": []}
+
+
+def cookie(name, domain=".x.com", expires=NOW + 3600):
+    return {"name": name, "value": "v", "domain": domain, "expires": expires}
+
+
+def test_both_session_cookies_are_required():
+    assert session_cookies_valid(state(cookie("auth_token"), cookie("ct0")), now=NOW)
+    assert not session_cookies_valid(state(cookie("auth_token")), now=NOW)
+    assert not session_cookies_valid(None, now=NOW)
+    assert not session_cookies_valid({}, now=NOW)
+
+
+def test_expired_and_foreign_cookies_do_not_count():
+    assert not session_cookies_valid(state(cookie("auth_token", expires=NOW - 1), cookie("ct0")), now=NOW)
+    assert not session_cookies_valid(state(cookie("auth_token", domain=".evil.com"), cookie("ct0")), now=NOW)
+
+
+def test_session_cookies_without_expiry_are_valid():
+    assert session_cookies_valid(state(cookie("auth_token", expires=-1), cookie("ct0", domain="twitter.com")), now=NOW)
+
+
+def test_save_load_round_trip_with_private_file(tmp_path):
+    store = SessionStore(tmp_path / ".x_session", "passphrase")
+    storage_state = state(cookie("auth_token"), cookie("ct0"))
+    store.save(storage_state)
+
+    assert stat.S_IMODE((tmp_path / ".x_session").stat().st_mode) == 0o600
+    assert b"auth_token" not in (tmp_path / ".x_session").read_bytes()
+    assert store.load() == storage_state
+    assert store.stats()["saves"] == 1 and store.stats()["loads"] == 1
+
+
+def test_wrong_passphrase_or_missing_file_loads_nothing(tmp_path):
+    SessionStore(tmp_path / ".x_session", "passphrase").save(state(cookie("ct0")))
+    assert SessionStore(tmp_path / ".x_session", "other").load() is None
+    assert SessionStore(tmp_path / "missing", "passphrase").load() is None
+
+
+def test_store_without_passphrase_is_disabled(tmp_path):
+    store = SessionStore(tmp_path / ".x_session", None)
+    store.save(state(cookie("ct0")))
+    assert not store.enabled
+    assert not (tmp_path / ".x_session").exists()
+    assert store.load() is None
+
+
+def test_clear_removes_the_file(tmp_path):
+    store = SessionStore(tmp_path / ".x_session", "passphrase")
+    store.save(state(cookie("ct0")))
+    store.clear()
+    store.clear()
+    assert not store.stats()["saved"]
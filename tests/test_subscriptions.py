@@ -0,0 +1,81 @@
+import pytest
+
+from subscriptions import Subscription, SubscriptionIndex
+
+CA_ALERT = {"token_name": "pepe", "priority": "HIGH", "market_cap": 50000}
+TRENDING_CA_ALERT = {"token_name": "PEPE2", "trending_name": "PEPE", "priority": "HIGH", "market_cap": 9000}
+NAME_ALERT = {"token_name": "WIF", "accounts_mentioned": ["Alice", "bob"]}
+
+
+@pytest.mark.parametrize("filters", [
+    "ca_alert",
+    {"colour": "red"},
+    {"types": 5},
+    {"token_names": ["PEPE", 3]},
+    {"min_market_cap": "1000"},
+    {"min_market_cap": True},
+])
+def test_invalid_filters_are_rejected(filters):
+    with pytest.raises(ValueError):
+        Subscription(filters)
+
+
+def test_filters_only_constrain_events_carrying_the_field():
+    subscription = Subscription({"min_market_cap": 10000, "accounts": ["@ALICE"]})
+    assert subscription.matches("ca_alert", CA_ALERT)
+    assert not subscription.matches("ca_alert", TRENDING_CA_ALERT)
+    assert subscription.matches("name_alert", NAME_ALERT)
+    assert not subscription.matches("name_alert", {**NAME_ALERT, "accounts_mentioned": ["carol"]})
+
+
+def test_token_names_match_trending_name_and_normalize():
+    subscription = Subscription({"token_names": ["$pepe "]})
+    assert subscription.matches("ca_alert", CA_ALERT)
+    assert subscription.matches("ca_alert", TRENDING_CA_ALERT)
+    assert not subscription.matches("name_alert", NAME_ALERT)
+    # Events without a token are not hidden by a token filter
+    assert subscription.matches("stats", {"clients": 3})
+
+
+def test_types_and_priority():
+    subscription = Subscription({"types": "ca_alert", "priority": ["high"]})
+    assert subscription.matches("ca_alert", CA_ALERT)
+    assert not subscription.matches("ca_alert", {**CA_ALERT, "priority": "NORMAL"})
+    assert not subscription.matches("name_alert", NAME_ALERT)
+
+
+def test_index_recipients_agree_with_full_evaluation():
+    index = SubscriptionIndex()
+    filters = {
+        "everything": None,
+        "ca_only": {"types": ["ca_alert"]},
+        "pepe": {"token_names": ["PEPE"]},
+        "high_wif": {"token_names": ["WIF", "BONK"], "priority": "HIGH"},
+        "big_caps": {"types": ["ca_alert"], "min_market_cap": 20000},
+        "alice": {"accounts": ["alice"]},
+    }
+    for client, client_filters in filters.items():
+        index.add(client)
+        index.subscribe(client, Subscription(client_filters) if client_filters else None)
+
+    events = [("ca_alert", CA_ALERT), ("ca_alert", TRENDING_CA_ALERT), ("name_alert", NAME_ALERT),
+              ("stats", {}), ("ca_alert", {"token_name": "WIF", "priority": "HIGH", "market_cap": 1})]
+    for event_type, data in events:
+        expected = {client for client, client_filters in filters.items()
+                    if not client_filters or Subscription(client_filters).matches(event_type, data)}
+        assert set(index.recipients(event_type, data)) == expected, (event_type, data)
+
+
+def test_resubscribe_and_remove_clean_up_the_index():
+    index = SubscriptionIndex()
+    index.add("client")
+    index.subscribe("client", Subscription({"types": ["ca_alert"], "token_names": ["PEPE"]}))
+    index.subscribe("client", Subscription({"token_names": ["WIF"]}))
+    assert set(index.by_token) == {"WIF"}
+    assert set(index.by_type) == {None}
+
+    index.subscribe("client", None)
+    assert index.recipients("name_alert", NAME_ALERT) == ["client"]
+    index.remove("client")
+    assert len(index) == 0
+    assert index.stats() == {"unfiltered": 0, "subscribed": 0, "indexed_types": 0, "indexed_tokens": 0}
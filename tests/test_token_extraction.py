@@ -0,0 +1,44 @@
+import pytest
+
+from benchmarks.corpus import GOLDEN_TWEETS, generate_tweets
+from benchmarks.extraction import check_equivalence, reference_extract
+from token_extraction import TokenExtractor, build_token_patterns
+from x_monitor_realtime import RealTimeXMonitor
+
+
+@pytest.fixture(scope="module")
+def monitor():
+    return RealTimeXMonitor(db=None)
+
+
+@pytest.fixture(scope="module")
+def reference(monitor):
+    return reference_extract(monitor.token_patterns, monitor.established_tokens)
+
+
+@pytest.mark.parametrize("tweet", GOLDEN_TWEETS)
+def test_golden_tweets_match_regex_reference(monitor, reference, tweet):
+    assert sorted(monitor.extract_token_names(tweet)) == sorted(reference(tweet))
+
+
+def test_seeded_corpus_matches_regex_reference(monitor, reference):
+    corpus = generate_tweets(2000)
+    assert check_equivalence(corpus, monitor.extract_token_names, reference) == []
+
+
+def test_excluded_tokens_apply_after_construction():
+    excluded = set()
+    extractor = TokenExtractor(excluded)
+    assert "GIGA" in extractor.extract("$GIGA to the moon")
+
+    excluded.add("GIGA")
+    assert "GIGA" not in extractor.extract("$GIGA to the moon")
+
+
+def test_custom_rules_match_their_regex_form():
+    rules = dict(keywords=["coin", "to the moon"], meme_tokens=["FROG"], meme_suffixes=["army"])
+    extractor = TokenExtractor(**rules)
+    reference = reference_extract(build_token_patterns(**rules), set())
+
+    for tweet in ("FROG army and TOAD coin", "DUCK to  the moon, $CAT", "FROG armys and token"):
+        assert sorted(extractor.extract(tweet)) == sorted(reference(tweet))
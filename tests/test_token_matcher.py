@@ -0,0 +1,66 @@
+import asyncio
+import os
+import time
+
+from token_matcher import TokenMatcher, match_keys
+
+
+def test_match_keys_normalize_and_add_base_form():
+    assert match_keys("$Pepe Coin 2") == ["PEPECOIN2", "PEPECOIN"]
+    assert match_keys("pepe") == ["PEPE"]
+    assert match_keys("420") == ["420"]
+    assert match_keys("$ --") == []
+
+
+def test_exact_match_beats_variant_and_name_beats_symbol():
+    matcher = TokenMatcher()
+    matcher.watch("PEPE", mention_count=3)
+    matcher.watch("PEPE2", mention_count=1)
+    matcher.watch("WIF", mention_count=5)
+
+    exact = matcher.match("Pepe 2", "WIF")
+    assert (exact["token"].name, exact["matched_on"], exact["match_type"]) == ("PEPE2", "name", "exact")
+
+    by_symbol = matcher.match("Something", "$wif")
+    assert (by_symbol["token"].name, by_symbol["matched_on"], by_symbol["match_type"]) == ("WIF", "symbol", "exact")
+
+    variant = matcher.match("PEPE3")
+    assert (variant["token"].name, variant["match_type"]) == ("PEPE", "variant")
+
+
+def test_watched_names_are_not_prefixes():
+    matcher = TokenMatcher()
+    matcher.watch("PEPE2")
+    assert matcher.match("PEPE") is None
+    assert matcher.match("PEPE22") is None
+
+
+def test_watch_merges_and_expired_tokens_are_unwatched_on_lookup():
+    matcher = TokenMatcher(ttl_hours=1)
+    matcher.watch("BONK", mention_count=2, watched_at=time.time() - 7200)
+    matcher.watch("bonk", mention_count=1, watched_at=time.time() - 7200)
+    assert matcher.watched["BONK"].mention_count == 2
+    assert matcher.match("BONK") is None
+    assert len(matcher) == 0
+    assert matcher.by_key == {}
+
+
+def test_variant_launch_does_not_use_up_the_watch():
+    os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+    os.environ.setdefault('DB_NAME', 'test')
+    import server
+
+    def frame(name):
+        return {"type": "tokenCreate", "data": {"name": name, "mint": f"{name}mint", "marketCap": 1000}}
+
+    async def scenario():
+        server.token_matcher.watch("MOONFROG", mention_count=4)
+        copycat = await server.pump_client.match_pump_message(frame("MOONFROG2"))
+        real = await server.pump_client.match_pump_message(frame("MOONFROG"))
+        again = await server.pump_client.match_pump_message(frame("MOONFROG"))
+        return copycat, real, again
+
+    copycat, real, again = asyncio.run(scenario())
+    assert (copycat["was_trending"], copycat["match_type"]) == (True, "variant")
+    assert (real["was_trending"], real["match_type"]) == (True, "exact")
+    assert again["was_trending"] is False
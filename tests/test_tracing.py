@@ -0,0 +1,77 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.memory_db import MemoryDatabase
+from tracing import AlertTracer, percentile_summary
+
+
+def stored_alert(db, alert_id, kind="ca"):
+    collection = db.ca_alerts if kind == "ca" else db.name_alerts
+    collection.documents.append({"id": alert_id, "created_at": datetime.now(timezone.utc)})
+
+
+def test_trace_finishes_once_persisted_and_every_send_went_out():
+    db = MemoryDatabase()
+    stored_alert(db, "a1")
+    tracer = AlertTracer(db)
+    observed = time.monotonic() - 0.05
+    trace = tracer.start("a1", "ca", observed)
+    trace.mark("ca_matched", observed + 0.01)
+
+    tracer.expect_sends("a1", 2)
+    tracer.record_send("a1")
+    tracer.mark_persisted(["a1"])
+    assert tracer.stats() == {"active": 1, "pending_write": 0, "written": 0}
+    tracer.record_send("a1")
+    assert tracer.stats() == {"active": 0, "pending_write": 1, "written": 0}
+
+    asyncio.run(tracer.flush())
+    stored = db.ca_alerts.documents[0]["trace"]
+    assert stored["client_sends"] == 2
+    assert list(stored["stages_ms"]) == ["observed", "ca_matched", "first_send", "last_send", "persisted"]
+    assert stored["stages_ms"]["ca_matched"] == 10.0
+    assert tracer.stats()["written"] == 1
+
+
+def test_flush_finishes_traces_that_timed_out():
+    db = MemoryDatabase()
+    stored_alert(db, "n1", kind="name")
+    stored_alert(db, "n2", kind="name")
+    tracer = AlertTracer(db, completion_timeout_seconds=30)
+    tracer.start("n1", "name", time.monotonic() - 60)  # never sent, never persisted
+    tracer.start("n2", "name")
+
+    asyncio.run(tracer.flush())
+    assert [document.get("trace") is not None for document in db.name_alerts.documents] == [True, False]
+    assert tracer.stats() == {"active": 1, "pending_write": 0, "written": 1}
+
+    asyncio.run(tracer.stop())
+    assert all("trace" in document for document in db.name_alerts.documents)
+
+
+def test_percentile_summary():
+    assert percentile_summary([]) == {"count": 0}
+    summary = percentile_summary([float(value) for value in range(1, 101)])
+    assert summary == {"count": 100, "p50_ms": 51.0, "p90_ms": 91.0, "p99_ms": 100.0, "max_ms": 100.0}
+
+
+def test_latency_breakdown_reports_offsets_and_segments():
+    db = MemoryDatabase()
+    now = datetime.now(timezone.utc)
+    for index, (matched, persisted) in enumerate([(10.0, 30.0), (20.0, 50.0)]):
+        db.ca_alerts.documents.append({"id": f"a{index}", "created_at": now, "trace": {
+            "stages_ms": {"observed": 0.0, "ca_matched": matched, "first_send": matched + 1, "persisted": persisted},
+            "client_sends_ms": [matched + 1, matched + 2],
+        }})
+    db.ca_alerts.documents.append({"id": "old", "created_at": now - timedelta(days=2),
+                                   "trace": {"stages_ms": {"observed": 0.0, "ca_matched": 999.0}}})
+
+    breakdown = asyncio.run(AlertTracer(db).latency_breakdown("ca", since=now - timedelta(hours=1)))
+    assert breakdown["alerts"] == 2
+    assert list(breakdown["stage_offsets"]) == ["observed", "ca_matched", "persisted", "first_send"]
+    assert breakdown["stage_offsets"]["ca_matched"]["max_ms"] == 20.0
+    assert breakdown["stage_durations"]["observed->ca_matched"]["p50_ms"] == 20.0
+    assert breakdown["stage_durations"]["first_send->persisted"]["count"] == 2
+    assert breakdown["stage_durations"]["first_send->persisted"]["max_ms"] == 29.0
+    assert breakdown["client_sends"]["count"] == 4
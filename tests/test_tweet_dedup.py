@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime, timezone
+
+from account_cursors import TWITTER_EPOCH_MS, newer_than
+from benchmarks.memory_db import MemoryDatabase
+from mention_writer import MentionWriter
+from tweet_dedup import BloomFilter, SeenTweets, status_id
+from x_monitor_realtime import RealTimeXMonitor
+
+
+def test_status_id_from_urls_and_ids():
+    assert status_id("https://x.com/alice/status/1234567890?s=20") == 1234567890
+    assert status_id("https://twitter.com/i/web/statuses/42") == 42
+    assert status_id("777") == 777
+    assert status_id(5) == 5
+    assert status_id("https://x.com/alice") is None
+
+
+def test_lookup_does_not_remember_until_added():
+    seen = SeenTweets(capacity=10)
+    assert not seen.seen("https://x.com/a/status/1")
+    assert not seen.seen(1)
+    seen.add("https://x.com/a/status/1")
+    assert seen.seen(1)
+    assert (seen.hits, seen.misses) == (1, 2)
+
+
+def test_lru_evicts_oldest_and_bloom_still_remembers():
+    seen = SeenTweets(capacity=2, bloom_capacity=1000)
+    for tweet_id in (1, 2, 3):
+        seen.add(tweet_id)
+    assert list(seen.recent) == [2, 3]
+    assert seen.seen(1)
+    assert seen.bloom_hits == 1
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    for key in range(0, 5000, 5):
+        bloom.add(key)
+    assert all(key in bloom for key in range(0, 5000, 5))
+
+
+def test_state_round_trips_through_the_database():
+    async def scenario():
+        db = MemoryDatabase()
+        seen = SeenTweets(capacity=10, bloom_capacity=100)
+        for tweet_id in (11, 12):
+            seen.add(tweet_id)
+        await seen.save(db)
+        restored = SeenTweets(capacity=10, bloom_capacity=100)
+        await restored.load(db)
+        return restored
+
+    restored = asyncio.run(scenario())
+    assert list(restored.recent) == [11, 12]
+    assert not restored.dirty
+
+
+class StaticSource:
+    name = 'static'
+
+    def __init__(self, tweets):
+        self.tweets = tweets
+
+    async def fetch(self, account_username, since_id=None):
+        return newer_than(self.tweets, since_id)
+
+
+def tweet(offset_ms, text):
+    created_at = datetime.now(timezone.utc)
+    tweet_id = (int(created_at.timestamp() * 1000) - TWITTER_EPOCH_MS + offset_ms) << 22
+    return {'status_id': tweet_id, 'url': f"https://x.com/alice/status/{tweet_id}", 'text': text,
+            'created_at': created_at}
+
+
+def test_failed_check_leaves_tweets_unseen_and_cursor_in_place():
+    class FlakyWriter(MentionWriter):
+        fail = True
+
+        async def add(self, mention):
+            if self.fail:
+                raise ConnectionError("no primary")
+            return await super().add(mention)
+
+    async def scenario():
+        db = MemoryDatabase()
+        tweets = [tweet(2, "$GIGA sending"), tweet(1, "$FWOG too")]
+        writer = FlakyWriter(db.token_mentions)
+        monitor = RealTimeXMonitor(db, mention_writer=writer, mention_sources=[StaticSource(tweets)])
+
+        await monitor.check_account_for_tokens("alice")
+        failed = (monitor.cursors.since_id("alice"), len(monitor.seen_tweets))
+
+        writer.fail = False
+        await monitor.check_account_for_tokens("alice")
+        await writer.flush()
+        return failed, monitor, tweets, db
+
+    failed, monitor, tweets, db = asyncio.run(scenario())
+    assert failed == (None, 0)
+    assert monitor.cursors.since_id("alice") == tweets[0]['status_id']
+    assert all(monitor.seen_tweets.seen(item['status_id']) for item in tweets)
+    assert sorted(document['token_name'] for document in db.token_mentions.documents) == ["FWOG", "GIGA"]